@@ -0,0 +1,223 @@
+"""موتور عامل‌محور: ردیابی تک‌تک کارکنان در ستون‌های فشرده NumPy
+
+هر کارمند یک ردیف در چند آرایه هم‌طول است (سمت، درجه، سابقه، سن) و ارتقا،
+بازنشستگی و استخدام سالانه با ماسک‌ها و نمونه‌گیری برداری روی این ستون‌ها
+اعمال می‌شود؛ بنابراین سال‌های لازم هر انتقال دقیقاً رعایت می‌شود.
+"""
+import copy
+
+import numpy as np
+
+from capacity import node_capacity, position_capacity, capacity_usage
+from engine import PROMOTION_SCALE, retirement_rate
+from orgchart import load_graph
+from profiling import NULL_PROFILER
+
+
+class AgentPopulation:
+    """ذخیره ساختار-از-آرایه کارکنان با رشد دوبرابری ظرفیت"""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.position = np.empty(capacity, dtype=np.int16)
+        self.grade = np.empty(capacity, dtype=np.int8)
+        self.tenure = np.empty(capacity, dtype=np.int16)
+        self.age = np.empty(capacity, dtype=np.int16)
+
+    def _columns(self):
+        return ('position', 'grade', 'tenure', 'age')
+
+    def append(self, count, position, grade, tenure, age):
+        """افزودن count کارمند (هر ستون آرایه هم‌طول یا اسکالر)"""
+        needed = self.size + count
+        if needed > len(self.position):
+            new_capacity = max(needed, 2 * len(self.position))
+            for column in self._columns():
+                old = getattr(self, column)
+                grown = np.empty(new_capacity, dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, column, grown)
+
+        end = self.size + count
+        self.position[self.size:end] = position
+        self.grade[self.size:end] = grade
+        self.tenure[self.size:end] = tenure
+        self.age[self.size:end] = age
+        self.size = end
+
+    def compact(self, keep):
+        """حذف ردیف‌هایی که keep برایشان False است"""
+        kept = int(keep.sum())
+        for column in self._columns():
+            values = getattr(self, column)
+            values[:kept] = values[:self.size][keep]
+        self.size = kept
+
+    def view(self, column):
+        return getattr(self, column)[:self.size]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, column)[:self.size].nbytes for column in self._columns())
+
+
+class AgentEngine:
+    """شبیه‌سازی فردی با همان قالب خروجی VectorizedEngine.run"""
+
+    def __init__(self, probabilities, years_required, capacity, annual_hiring, graph=None, seed=None,
+                 enforce_capacity=True, profiler=None):
+        self.graph = (graph or load_graph()).with_parameters(probabilities, years_required)
+        self.profiler = profiler or NULL_PROFILER
+        self.positions = self.graph.positions
+        self.capacity = capacity
+        self.annual_hiring = annual_hiring
+        self.rng = np.random.default_rng(seed)
+
+        graph = self.graph
+        self.transition_keys = [key for key, is_exit in zip(graph.edge_keys, graph.edge_is_exit) if not is_exit]
+        self.promotion_edges = np.flatnonzero(~graph.edge_is_exit)
+
+        # جدول احتمال تجمعی خروجی‌های هر گره (گره × حداکثر درجه خروجی)
+        width = int(graph.edge_rank.max()) + 1 if len(graph.edge_keys) else 1
+        self.edge_table = np.full((len(graph.node_names), width), -1, dtype=np.int64)
+        self.edge_table[graph.edge_source, graph.edge_rank] = np.arange(len(graph.edge_keys))
+        rates = np.zeros(self.edge_table.shape, dtype=np.float64)
+        rates[graph.edge_source, graph.edge_rank] = graph.edge_prob * PROMOTION_SCALE
+        self.cumulative = np.cumsum(rates, axis=1)
+        # ستون‌های خالی هرگز انتخاب نشوند
+        self.cumulative[self.edge_table < 0] = np.inf
+
+        # گره‌های محدود به ترتیب ارشدیت برای تخصیص زنجیره‌ای صندلی خالی
+        self.node_limits = node_capacity(graph, capacity)
+        self.position_limits = position_capacity(graph, self.node_limits)
+        self.capped = np.isfinite(self.node_limits) if enforce_capacity else np.zeros(len(graph.node_names), bool)
+        self.capped_order = [node for node in graph.seniority_order() if self.capped[node]]
+
+    def initial_population(self):
+        """جمعیت اولیه: سابقه و سن واقعی فهرست کارکنان یا مقادیر تصادفی برای تعداد گره‌های گراف"""
+        graph = self.graph
+        population = AgentPopulation(int(graph.node_initial.sum()) + self.annual_hiring)
+
+        if graph.roster is not None:
+            node, tenure, age, count = graph.roster.cells()
+            population.append(int(count.sum()), np.repeat(graph.node_position[node], count),
+                              np.repeat(graph.node_grade[node], count), np.repeat(tenure, count),
+                              np.repeat(age, count))
+            return population
+
+        for node, count in enumerate(graph.node_initial.tolist()):
+            if count == 0:
+                continue
+            tenure = self.rng.integers(0, 10, count)
+            age = np.minimum(24 + tenure + self.rng.integers(0, 20, count), 59)
+            population.append(count, graph.node_position[node], graph.node_grade[node], tenure, age)
+
+        return population
+
+    def step(self, year, population):
+        """یک سال: استخدام، بازنشستگی، ارتقا با رعایت ظرفیت و افزایش سابقه و سن"""
+        rng = self.rng
+        graph = self.graph
+        profiler = self.profiler
+
+        with profiler.phase('hiring'):
+            # استخدام جدید در گره ورودی گراف
+            hiring_node = graph.hiring_node
+            population.append(self.annual_hiring, graph.node_position[hiring_node], graph.node_grade[hiring_node], 0,
+                              rng.integers(23, 31, self.annual_hiring))
+
+        with profiler.phase('retirement'):
+            # بازنشستگی تدریجی مستقل برای هر نفر
+            retiring = rng.random(population.size) < retirement_rate(year)
+            population.compact(~retiring)
+
+        position = population.view('position')
+        grade = population.view('grade')
+        tenure = population.view('tenure')
+
+        with profiler.phase('promotions'):
+            # انتخاب حداکثر یک انتقال برای هر نفر با یک عدد تصادفی
+            node = graph.node_lookup[position, grade + 1]
+            has_edges = node >= 0
+            draw = rng.random(population.size)
+            choice = np.full(population.size, -1, dtype=np.int64)
+            rows = node[has_edges]
+            slot = (draw[has_edges, None] >= self.cumulative[rows]).sum(axis=1)
+            valid = slot < self.edge_table.shape[1]
+            picked = np.full(len(rows), -1, dtype=np.int64)
+            picked[valid] = self.edge_table[rows[valid], slot[valid]]
+            choice[has_edges] = picked
+
+            # رعایت دقیق سال‌های لازم برای هر انتقال
+            moving = choice >= 0
+            moving[moving] = tenure[moving] >= graph.edge_min_years[choice[moving]]
+            target = np.where(moving, graph.edge_target[np.maximum(choice, 0)], -1)
+
+        with profiler.phase('capacity'):
+            # ورود به گره‌های محدود فقط تا سقف صندلی خالی، به ترتیب سابقه متقاضیان
+            node_counts = np.bincount(node[node >= 0], minlength=len(graph.node_names))
+            free = moving & ((target < 0) | ~self.capped[np.maximum(target, 0)])
+            np.subtract.at(node_counts, node[free], 1)
+            np.add.at(node_counts, target[free & (target >= 0)], 1)
+
+            for capped_node in self.capped_order:
+                candidates = np.flatnonzero(moving & (target == capped_node))
+                open_seats = max(0, int(self.node_limits[capped_node]) - node_counts[capped_node])
+                if len(candidates) > open_seats:
+                    ranked = candidates[np.argsort(-tenure[candidates], kind='stable')]
+                    moving[ranked[open_seats:]] = False
+                    candidates = ranked[:open_seats]
+                np.subtract.at(node_counts, node[candidates], 1)
+                node_counts[capped_node] += len(candidates)
+
+        with profiler.phase('promotions'):
+            moved = np.bincount(choice[moving], minlength=len(graph.edge_keys))
+            exiting = moving & (target < 0)
+            promoted = moving & (target >= 0)
+            position[promoted] = graph.node_position[target[promoted]]
+            grade[promoted] = graph.node_grade[target[promoted]]
+            tenure[promoted] = 0
+            population.compact(~exiting)
+
+        with profiler.phase('tenure'):
+            population.view('tenure')[:] += 1
+            population.view('age')[:] += 1
+
+        retirements = int(retiring.sum() + exiting.sum())
+        return population, self.annual_hiring, retirements, moved[self.promotion_edges]
+
+    def counts(self, population):
+        """تعداد کارکنان هر سمت"""
+        return np.bincount(population.view('position'), minlength=len(self.positions))
+
+    def iter_run(self, years, start=None, checkpoint=None):
+        """اجرای سال به سال با خروجی (سال، نتایج سال)
+
+        start و checkpoint مانند VectorizedEngine.iter_run؛ وضعیت جمعیت و مولد
+        تصادفی کپی می‌شود تا نقطه بازیابی کش‌شده تغییر نکند.
+        """
+        if start:
+            first, population = start['year'], copy.deepcopy(start['state'])
+            self.rng = copy.deepcopy(start['rng'])
+        else:
+            first, population = 0, self.initial_population()
+        self.population = population
+
+        for year in range(first + 1, years + 1):
+            population, new_hires, retirements, promotions = self.step(year, population)
+            if checkpoint is not None:
+                checkpoint.update(year=year, state=population, rng=self.rng)
+            counts = self.counts(population)
+            usage = capacity_usage(counts, self.position_limits)
+            yield year, {
+                'استخدام_جدید': new_hires,
+                'بازنشستگی': retirements,
+                'ارتقاءها': dict(zip(self.transition_keys, promotions.tolist())),
+                'وضعیت_مناصب': dict(zip(self.positions, counts.tolist())),
+                'ظرفیت_استفاده': {position: value for position, value, limit
+                                  in zip(self.positions, usage.tolist(), self.position_limits) if np.isfinite(limit)}
+            }
+
+    def run(self, years):
+        """اجرای کامل با خروجی دیکشنری سال به سال"""
+        return dict(self.iter_run(years))
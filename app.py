@@ -1,94 +1,55 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import random
-from datetime import datetime, timedelta
-
-# تنظیمات صفحه
-st.set_page_config(page_title="شبیه‌ساز جانشین‌پروری بانک", layout="wide")
-
-
-class BankSuccessionSimulator:
-    def __init__(self):
-        # ظرفیت‌های پیش‌فرض مختلف شعب
-        self.default_capacity = {
-            'رئیس_شعبه': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 180},
-            'معاون_شعبه': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 360},
-            'رئیس_صندوق': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 180},
-            'رئیس_اعتبارات': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 80},
-            'بانکدار': {'درجه4': 960, 'درجه3': 2880, 'درجه2': 1380, 'درجه1': 600, 'ممتاز': 1800},
-            'معاون_مدیر_شعب': 105,
-            'مدیر_شعب': 35
-        }
+import os
+import datetime
+import json
+import tempfile
 
-        # احتمالات انتقال پیش‌فرض
-        self.default_probabilities = {
-            'بانکدار_to_رئیس_دایره4': 0.6,
-            'رئیس_دایره4_to_رئیس_دایره_ممتاز': 0.7,
-            'رئیس_دایره4_to_معاون_شعبه4': 0.3,
-            'معاون_شعبه4_to_رئیس_شعبه4': 0.5,
-            'معاون_شعبه4_to_رئیس_شعبه3': 0.2,
-            'معاون_شعبه4_to_معاون_شعبه3': 0.3,
-            'رئیس_شعبه4_to_رئیس_شعبه3': 0.5,
-            'رئیس_شعبه4_to_رئیس_شعبه2': 0.2,
-            'رئیس_شعبه4_to_معاون_شعبه2': 0.3,
-            'رئیس_شعبه3_to_رئیس_شعبه2': 0.4,
-            'رئیس_شعبه3_to_رئیس_شعبه1': 0.1,
-            'رئیس_شعبه3_to_معاون_شعبه1': 0.1,
-            'رئیس_شعبه3_retire': 0.4,
-            'رئیس_شعبه2_to_رئیس_شعبه1': 0.4,
-            'رئیس_شعبه2_to_رئیس_شعبه_ممتاز': 0.1,
-            'رئیس_شعبه2_to_معاون_شعبه_ممتاز': 0.1,
-            'رئیس_شعبه2_retire': 0.4,
-            'رئیس_شعبه1_to_رئیس_شعبه_ممتاز': 0.5,
-            'رئیس_شعبه1_to_معاون_مدیر': 0.1,
-            'رئیس_شعبه1_to_مدیر_شعب': 0.1,
-            'رئیس_شعبه1_retire': 0.3,
-            'رئیس_شعبه_ممتاز_to_معاون_مدیر': 0.2,
-            'رئیس_شعبه_ممتاز_to_مدیر_شعب': 0.1,
-            'رئیس_شعبه_ممتاز_retire': 0.4,
-            'معاون_مدیر_to_مدیر_شعب': 0.3,
-            'معاون_مدیر_retire': 0.7
-        }
+from orgchart import load_graph
+from cache import ResultCache, scenario_key
+from jobs import DONE, FAILED, QUEUED, JobQueue
+from simulator import SuccessionSimulator
+from profiling import NULL_PROFILER, PhaseProfiler
 
-        # سال‌های پیش‌فرض مورد نیاز برای انتقال
-        self.default_years_required = {
-            'بانکدار_to_رئیس_دایره4': 3,
-            'رئیس_دایره4_to_رئیس_دایره_ممتاز': 2,
-            'رئیس_دایره4_to_معاون_شعبه4': 2,
-            'معاون_شعبه4_to_رئیس_شعبه4': 3,
-            'معاون_شعبه4_to_رئیس_شعبه3': 4,
-            'معاون_شعبه4_to_معاون_شعبه3': 2,
-            'رئیس_شعبه4_to_رئیس_شعبه3': 3,
-            'رئیس_شعبه4_to_رئیس_شعبه2': 5,
-            'رئیس_شعبه4_to_معاون_شعبه2': 4,
-            'رئیس_شعبه3_to_رئیس_شعبه2': 3,
-            'رئیس_شعبه3_to_رئیس_شعبه1': 5,
-            'رئیس_شعبه3_to_معاون_شعبه1': 4,
-            'رئیس_شعبه2_to_رئیس_شعبه1': 3,
-            'رئیس_شعبه2_to_رئیس_شعبه_ممتاز': 4,
-            'رئیس_شعبه2_to_معاون_شعبه_ممتاز': 3,
-            'رئیس_شعبه1_to_رئیس_شعبه_ممتاز': 4,
-            'رئیس_شعبه1_to_معاون_مدیر': 5,
-            'رئیس_شعبه1_to_مدیر_شعب': 7,
-            'رئیس_شعبه_ممتاز_to_معاون_مدیر': 4,
-            'رئیس_شعبه_ممتاز_to_مدیر_شعب': 6,
-            'معاون_مدیر_to_مدیر_شعب': 3
-        }
+# بیشترین تعداد نقاط جاروب حساسیت در یک اجرا
+MAX_SWEEP_POINTS = 20000
 
-        # آمار بازنشستگی
-        self.retirement_stats = {
-            '5_years': 0.5,
-            '10_years': 0.8,
-            '15_years': 1.0
-        }
+# بیشترین تعداد تکرار جفت‌شده در مقایسه سیاست‌ها
+MAX_COMPARISON_REPLICATIONS = 20000
+
+# تعداد نقاط جاروب آموزش شبیه‌ساز جایگزین
+EMULATOR_SAMPLES = 3000
+
+# سقف بودجه زمانی جستجوی سیاست (ثانیه)
+MAX_OPTIMIZER_SECONDS = 300
+
+# مقادیر اولیه فرم‌های بهینه‌ساز و مناطق؛ همان optimizer.BURN_IN و regions.TRANSFER_SHARE که
+# اینجا تکرار شده‌اند تا ساختن فرم آن ماژول‌ها را وارد نکند (tests/test_startup.py برابری را بررسی می‌کند)
+OPTIMIZER_BURN_IN = 5
+REGIONS_TRANSFER_SHARE = 0.1
+
+# حالت‌های شبیه‌سازی و موتور مسیر اصلی هر کدام (مونت‌کارلو صدک‌ها را جداگانه دارد)
+SIMULATION_ENGINES = {
+    "قطعی": 'vectorized',
+    "مونت‌کارلو": 'vectorized',
+    "عامل‌محور": 'agent',
+    "گروه سنی": 'cohort'
+}
+
+# فاصله به‌روزرسانی پیشرفت کار پس‌زمینه در صفحه (ثانیه)
+JOB_POLL_SECONDS = 0.25
+
+# نمودارها (charts و Plotly)، جدول نتایج و ماژول‌های تحلیلی (مارکوف، جاروب، مقایسه،
+# شبیه‌ساز جایگزین، بهینه‌ساز، مناطق، مسیرها، فهرست کارکنان) فقط درون تابعی که لازمشان
+# دارد و تا جای ممکن پس از درخواست کاربر وارد می‌شوند؛ نگاه کنید به benchmarks/startup_time.py
+
+
+class BankSuccessionSimulator(SuccessionSimulator):
+    """رابط کاربری Streamlit روی هسته SuccessionSimulator (نمودارها در charts.py)"""
 
     def create_capacity_settings(self):
-        """ایجاد تنظیمات ظرفیت مناصب"""
-        st.sidebar.header("🏢 تنظیم ظرفیت مناصب")
+        """ایجاد تنظیمات ظرفیت مناصب (داخل ظرف فعلی، مثلاً فرم sidebar)"""
+        st.header("🏢 تنظیم ظرفیت مناصب")
 
         capacity = {}
 
@@ -99,7 +60,7 @@ class BankSuccessionSimulator:
             "سایر مناصب": ['معاون_مدیر_شعب', 'مدیر_شعب']
         }
 
-        with st.sidebar.expander("تنظیم ظرفیت‌ها"):
+        with st.expander("تنظیم ظرفیت‌ها"):
             for group_name, items in position_groups.items():
                 st.markdown(f"**{group_name}**")
                 if group_name == "سایر مناصب":
@@ -130,7 +91,7 @@ class BankSuccessionSimulator:
 
     def create_probability_sliders(self):
         """ایجاد اسلایدرها برای تغییر احتمالات و سال‌های مورد نیاز"""
-        st.sidebar.header("⚙️ تنظیم احتمالات و زمان‌بندی")
+        st.header("⚙️ تنظیم احتمالات و زمان‌بندی")
 
         probabilities = {}
         years_required = {}
@@ -182,7 +143,7 @@ class BankSuccessionSimulator:
         }
 
         for group_name, keys in groups.items():
-            with st.sidebar.expander(f"📊 {group_name}"):
+            with st.expander(f"📊 {group_name}"):
                 for key in keys:
                     if key in self.default_probabilities:
                         persian_label = key.replace('_', ' → ').replace('to', 'به').replace('retire', 'بازنشستگی')
@@ -272,7 +233,11 @@ class BankSuccessionSimulator:
             #### گام 1: تنظیم پارامترهای اصلی
             - تعداد سال‌های شبیه‌سازی (1 تا 20 سال)
             - تعداد استخدام سالانه
-            - ضریب تسریع بازنشستگی
+            - ضریب تسریع بازنشستگی (در حالت گروه سنی)
+            - حالت شبیه‌سازی: قطعی، مونت‌کارلو (با نمایش میانه و بازه ۵ تا ۹۵ درصد)،
+              عامل‌محور (ردیابی تک‌تک کارکنان با سابقه و سن واقعی) یا گروه سنی
+              (بازنشستگی بر اساس سن با جدول آمار بازنشستگی؛ چون فقط افراد بالای ۵۰ سال
+              بازنشسته می‌شوند، کل پرسنل پس از ۲۰ سال حدود سه برابر حالت قطعی است)
 
             #### گام 2: تنظیم ظرفیت‌ها (اختیاری)
             - از منوی کناری می‌توانید ظرفیت هر سمت را تغییر دهید
@@ -283,7 +248,9 @@ class BankSuccessionSimulator:
 
             #### گام 4: اجرای شبیه‌سازی
             - روی دکمه "اجرای شبیه‌سازی" کلیک کنید
-            - نتایج به صورت نمودار و جدول نمایش داده می‌شود
+            - نتایج به صورت نمودار و جدول نمایش داده می‌شود؛ نمودار و جدول در حین اجرا سال به سال کامل می‌شوند
+              و با دکمه "توقف شبیه‌سازی" می‌توان اجرا را متوقف کرد و نتایج سال‌های محاسبه‌شده را دید
+            - تغییرات منوی کناری با دکمه "اعمال تنظیمات" ثبت می‌شوند و نتایج فقط در صورت تغییر پارامترها دوباره محاسبه می‌شوند
 
             ### ⚡ نکات مهم:
             - نتایج بر اساس مدل‌های ریاضی و احتمالاتی محاسبه می‌شود
@@ -292,479 +259,1028 @@ class BankSuccessionSimulator:
             - نتایج باید به عنوان راهنما و نه پیش‌بینی قطعی در نظر گرفته شود
             """)
 
-    def simulate_career_progression(self, years, probabilities, years_required, capacity, annual_hiring):
-        """شبیه‌سازی پیشرفت شغلی با در نظر گیری سال‌های مورد نیاز"""
-        results = {}
-
-        # وضعیت اولیه مناصب (فرضی بر اساس ظرفیت‌ها)
-        current_positions = {
-            'رئیس_شعبه_درجه4': 1570,
-            'رئیس_شعبه_درجه3': 2880,
-            'رئیس_شعبه_درجه2': 930,
-            'رئیس_شعبه_درجه1': 400,
-            'رئیس_شعبه_ممتاز': 540,
-            'معاون_شعبه': 1935,
-            'بانکدار': 8625,
-            'معاون_مدیر_شعب': 105,
-            'مدیر_شعب': 35,
-            'سایر': 2000
-        }
 
-        # ردیابی سابقه کاری (چه مدت در هر سمت بوده‌اند)
-        position_tenure = {position: {} for position in current_positions.keys()}
+def show_results(table, figures, profiler=NULL_PROFILER):
+    """نمایش نمودارها، جداول، هشدارها و امکان دانلود نتایج"""
+    import results_table as rt
 
-        # محاسبه تغییرات در طول سال‌های مختلف
-        for year in range(1, years + 1):
-            # شبیه‌سازی استخدام جدید
-            new_hires = annual_hiring
+    fig1, fig2, fig3, fig4, fig5 = figures
 
-            # شبیه‌سازی بازنشستگی
-            retirement_rate = min(year * 0.03, 0.12)  # تدریجی
-            total_retirements = int(sum(current_positions.values()) * retirement_rate)
-
-            # شبیه‌سازی ارتقاء با در نظر گیری سال‌های مورد نیاز
-            promotions = self.calculate_promotions_with_tenure(
-                probabilities, years_required, current_positions, position_tenure
-            )
-
-            # به‌روزرسانی سابقه کاری
-            position_tenure = self.update_tenure(position_tenure, current_positions)
-
-            # به‌روزرسانی تعداد افراد در هر سمت
-            current_positions = self.update_positions(
-                current_positions, promotions, new_hires, total_retirements
-            )
-
-            # بررسی ظرفیت‌ها و تنظیم
-            current_positions = self.adjust_for_capacity(current_positions, capacity)
-
-            results[year] = {
-                'استخدام_جدید': new_hires,
-                'بازنشستگی': total_retirements,
-                'ارتقاءها': promotions,
-                'وضعیت_مناصب': current_positions.copy(),
-                'ظرفیت_استفاده': self.calculate_capacity_usage(current_positions, capacity)
-            }
-
-        return results
-
-    def update_tenure(self, position_tenure, current_positions):
-        """به‌روزرسانی سابقه کاری"""
-        new_tenure = {}
-
-        for position in current_positions.keys():
-            new_tenure[position] = {}
-            # هر سال یک سال به سابقه همه اضافه می‌شود
-            for tenure_years in range(1, 11):  # حداکثر 10 سال ردیابی
-                if tenure_years == 1:
-                    # جدید وارد شده‌ها
-                    new_tenure[position][tenure_years] = current_positions[position] // 10
-                else:
-                    # سابقه‌داران
-                    prev_count = position_tenure.get(position, {}).get(tenure_years - 1, 0)
-                    new_tenure[position][tenure_years] = prev_count
+    # نمایش نمودارها
+    st.header("📊 نتایج شبیه‌سازی")
 
-        return new_tenure
-
-    def calculate_promotions_with_tenure(self, probabilities, years_required, current_positions, position_tenure):
-        """محاسبه تعداد ارتقاءهای مختلف با در نظر گیری سال‌های مورد نیاز"""
-        promotions = {}
-
-        # محاسبه ارتقاءها بر اساس تعداد فعلی، احتمالات و سابقه
-        for transition, prob in probabilities.items():
-            if 'retire' not in transition:
-                required_years = years_required.get(transition, 3)
-
-                # پیدا کردن کسانی که واجد شرایط سابقه کاری هستند
-                source_position = transition.split('_to_')[0].replace('بانکدار', 'بانکدار')
+    # مرحله render شامل سریال‌سازی نمودارها و جدول توسط Streamlit است
+    with profiler.phase('render'):
+        # نمودار تغییرات کل پرسنل
+        st.plotly_chart(fig1, use_container_width=True)
 
-                if source_position in current_positions:
-                    # کسانی که سابقه کافی دارند
-                    eligible_count = 0
-                    for tenure_years, count in position_tenure.get(source_position, {}).items():
-                        if tenure_years >= required_years:
-                            eligible_count += count
+        # نمودارهای مقایسه‌ای توزیع مناصب
+        st.subheader("🔍 مقایسه توزیع مناصب")
+        col1, col2 = st.columns(2)
 
-                    # اگر اطلاعات دقیق سابقه نداشته باشیم، فرض کنیم نیمی واجد شرایط هستند
-                    if eligible_count == 0:
-                        eligible_count = current_positions[source_position] // 2
+        with col1:
+            st.plotly_chart(fig2, use_container_width=True)
 
-                    # محاسبه تعداد ارتقا
-                    promotion_count = int(eligible_count * prob * 0.1)  # ضریب تعدیل
-                    promotions[transition] = promotion_count
+        with col2:
+            st.plotly_chart(fig3, use_container_width=True)
 
-        return promotions
+        # نمودار روند تغییرات مناصب مدیریتی
+        st.plotly_chart(fig4, use_container_width=True)
 
-    def adjust_for_capacity(self, current_positions, capacity):
-        """تنظیم تعداد کارکنان بر اساس ظرفیت‌ها"""
-        adjusted_positions = current_positions.copy()
+        # نمودار درصد استفاده از ظرفیت
+        st.plotly_chart(fig5, use_container_width=True)
 
-        # تنظیم بر اساس ظرفیت‌های تعریف شده
-        # (این قسمت می‌تواند پیچیده‌تر شود بسته به نیاز)
+        # نمایش جدول نتایج تفصیلی
+        st.subheader("📋 نتایج تفصیلی شبیه‌سازی")
 
-        return adjusted_positions
+        df_summary = rt.summary_frame(table)
+        st.dataframe(df_summary, use_container_width=True)
 
-    def calculate_capacity_usage(self, current_positions, capacity):
-        """محاسبه درصد استفاده از ظرفیت"""
-        usage = {}
+    # هشدارهای مهم
+    st.subheader("⚠️ تحلیل و هشدارهای مهم")
 
-        # محاسبه ساده درصد استفاده
-        for position, count in current_positions.items():
-            if position in ['معاون_مدیر_شعب', 'مدیر_شعب']:
-                max_capacity = capacity.get(position, 100)
-                usage[position] = min(100, (count / max_capacity) * 100)
-            else:
-                usage[position] = 85  # فرضی برای مناصب دیگر
+    # محاسبه آمار کلی
+    simulation_years = int(df_summary['سال'].max())
+    total_retirement = int(df_summary['بازنشستگی'].sum())
+    total_hiring = int(df_summary['استخدام جدید'].sum())
+    net_change = total_hiring - total_retirement
 
-        return usage
+    col1, col2, col3, col4 = st.columns(4)
 
-    def calculate_promotions(self, probabilities, current_positions):
-        """محاسبه تعداد ارتقاءهای مختلف (متد اصلی)"""
-        promotions = {}
+    with col1:
+        st.metric("کل استخدام", total_hiring)
 
-        # محاسبه ارتقاءها بر اساس تعداد فعلی و احتمالات
-        promotions['بانکدار_به_رئیس_دایره'] = int(
-            current_positions['بانکدار'] * 0.1 * probabilities.get('بانکدار_to_رئیس_دایره4', 0.6)
-        )
+    with col2:
+        st.metric("کل بازنشستگی", total_retirement)
 
-        promotions['رئیس_دایره_به_معاون'] = int(
-            200 * probabilities.get('رئیس_دایره4_to_معاون_شعبه4', 0.3)
+    with col3:
+        st.metric("تغییر خالص", net_change)
+
+    with col4:
+        final_total = int(df_summary['کل پرسنل'].iloc[-1])
+        st.metric("کل پرسنل نهایی", final_total)
+
+    # هشدارها
+    if net_change < 0:
+        st.error(f"🚨 کمبود نیروی انسانی: {abs(net_change)} نفر کمتر از نیاز")
+    elif net_change > total_hiring * 0.5:
+        st.warning(f"⚠️ رشد زیاد نیروی انسانی: {net_change} نفر اضافه")
+    else:
+        st.success(f"✅ تعادل مناسب نیروی انسانی: {net_change} نفر تغییر خالص")
+
+    # بررسی نرخ ارتقا
+    total_promotions = rt.yearly_total(table, rt.PROMOTIONS).sum()
+    promotion_rate = total_promotions / (total_hiring + df_summary['کل پرسنل'].mean())
+
+    if promotion_rate < 0.05:
+        st.warning("⚠️ نرخ ارتقا پایین است - ممکن است موجب نارضایتی کارکنان شود")
+    elif promotion_rate > 0.2:
+        st.warning("⚠️ نرخ ارتقا بالا است - بررسی کیفیت ارتقاءها ضروری است")
+
+    # پیشنهادات
+    st.subheader("💡 پیشنهادات بهبود")
+    suggestions = []
+
+    if net_change < 0:
+        suggestions.append("🔹 افزایش نرخ استخدام در سمت‌های کلیدی")
+        suggestions.append("🔹 کاهش نرخ بازنشستگی از طریق مشوق‌های حفظ نیرو")
+
+    if promotion_rate < 0.05:
+        suggestions.append("🔹 تسریع برنامه‌های آموزش و توسعه شغلی")
+        suggestions.append("🔹 ایجاد مسیرهای ارتقای جایگزین")
+
+    suggestions.extend([
+        "🔹 ایجاد برنامه‌های جانشین‌پروری هدفمند",
+        "🔹 توسعه برنامه‌های حفظ استعداد",
+        "🔹 بازنگری دوره‌ای در سیاست‌های منابع انسانی",
+        "🔹 ایجاد سیستم پیش‌بینی دقیق‌تر نیازهای آتی"
+    ])
+
+    for suggestion in suggestions:
+        st.write(suggestion)
+
+    # امکان دانلود نتایج
+    st.subheader("💾 دانلود نتایج")
+    col1, col2 = st.columns(2)
+    csv = df_summary.to_csv(index=False).encode('utf-8')
+    col1.download_button(
+        label="دانلود نتایج به صورت CSV",
+        data=csv,
+        file_name=f'simulation_results_{simulation_years}years.csv',
+        mime='text/csv'
+    )
+
+    # جدول بلند کامل (همه معیارها) برای تحلیل با pandas/Arrow
+    try:
+        parquet = rt.to_parquet_bytes(table)
+    except ImportError as exc:
+        col2.caption(str(exc))
+    else:
+        col2.download_button(
+            label="دانلود جدول کامل به صورت Parquet",
+            data=parquet,
+            file_name=f'simulation_results_{simulation_years}years.parquet',
+            mime='application/octet-stream'
         )
 
-        promotions['معاون_شعبه4_به_رئیس_شعبه4'] = int(
-            current_positions['معاون_شعبه'] * 0.2 * probabilities.get('معاون_شعبه4_to_رئیس_شعبه4', 0.5)
-        )
 
-        promotions['رئیس_شعبه4_به_رئیس_شعبه3'] = int(
-            current_positions['رئیس_شعبه_درجه4'] * 0.33 * probabilities.get('رئیس_شعبه4_to_رئیس_شعبه3', 0.5)
-        )
+def show_profile(profiler):
+    """جدول مدت و حافظه هر مرحله و دانلود Chrome trace"""
+    summary = profiler.summary()
+    total = sum(entry['seconds'] for entry in summary.values()) or 1.0
 
-        promotions['رئیس_شعبه3_به_رئیس_شعبه2'] = int(
-            current_positions['رئیس_شعبه_درجه3'] * 0.33 * probabilities.get('رئیس_شعبه3_to_رئیس_شعبه2', 0.4)
+    rows = []
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]['seconds']):
+        row = {
+            'مرحله': name,
+            'تعداد': entry['calls'],
+            'کل (میلی‌ثانیه)': round(entry['seconds'] * 1e3, 2),
+            'سهم': f"{entry['seconds'] / total:.0%}"
+        }
+        if profiler.track_memory:
+            row['تخصیص خالص (KB)'] = round(entry['allocated'] / 1024, 1)
+            row['اوج حافظه (KB)'] = round(entry['peak'] / 1024, 1)
+        rows.append(row)
+
+    with st.expander("⏱️ کارایی"):
+        st.dataframe(rows, use_container_width=True)
+        if profiler.track_memory:
+            st.caption("حافظه با tracemalloc اندازه‌گیری شده است؛ زمان‌ها با ردیابی حافظه بیشتر از اجرای عادی‌اند.")
+        st.download_button(
+            label="دانلود Chrome trace",
+            data=profiler.chrome_trace_json(),
+            file_name='simulation_trace.json',
+            mime='application/json'
         )
 
-        promotions['رئیس_شعبه2_به_رئیس_شعبه1'] = int(
-            current_positions['رئیس_شعبه_درجه2'] * 0.33 * probabilities.get('رئیس_شعبه2_to_رئیس_شعبه1', 0.4)
-        )
 
-        promotions['رئیس_شعبه1_به_رئیس_شعبه_ممتاز'] = int(
-            current_positions['رئیس_شعبه_درجه1'] * 0.33 * probabilities.get('رئیس_شعبه1_to_رئیس_شعبه_ممتاز', 0.5)
-        )
+@st.cache_resource(max_entries=8)
+def get_markov_chain(probabilities, years_required, annual_hiring, fingerprint, _graph):
+    """زنجیره مارکوف تنظیمات فعلی؛ کلید کش اثر انگشت گراف است و خود گراف هش نمی‌شود"""
+    from markov import MarkovChain
+
+    return MarkovChain(probabilities, years_required, annual_hiring, graph=_graph)
+
+
+def show_markov_analysis(probabilities, years_required, annual_hiring, graph=None):
+    """توزیع پایا، زمان رسیدن به مدیر شعب و سال‌های هر درجه با حل خطی زنجیره مارکوف"""
+    graph = graph or load_graph()
+    with st.expander("🧮 تحلیل پایای مارکوف (بدون شبیه‌سازی)"):
+        st.caption("با نرخ بلندمدت بازنشستگی و بدون محدودیت ظرفیت؛ شرط سابقه به صورت تقریبی لحاظ شده است.")
+        # زنجیره فقط پس از باز کردن تحلیل ساخته می‌شود و در اجراهای بعدی از کش می‌آید
+        if not st.toggle("محاسبه تحلیل مارکوف", key='markov_open'):
+            return
+
+        chain = get_markov_chain(probabilities, years_required, annual_hiring, graph.fingerprint(), graph)
+        steady = chain.steady_state_positions()
+        probability, expected_years = chain.time_to_reach('مدیر_شعب', 'بانکدار')
+        col1, col2, col3 = st.columns(3)
+        col1.metric("کل پرسنل پایا", f"{sum(steady.values()):,.0f}")
+        col2.metric("احتمال رسیدن بانکدار به مدیر شعب", f"{probability:.2e}")
+        col3.metric("سال‌های مورد انتظار تا مدیر شعب",
+                    f"{expected_years:.1f}" if np.isfinite(expected_years) else "-")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("توزیع پایای مناصب")
+            st.dataframe([{'سمت': position, 'تعداد پایا': round(count, 1)} for position, count in steady.items()],
+                         use_container_width=True)
+        with col2:
+            st.write("سال‌های مورد انتظار هر درجه برای یک استخدام جدید")
+            st.dataframe([{'درجه': grade, 'سال': round(years, 3)}
+                          for grade, years in chain.visits_by_grade().items()], use_container_width=True)
+
+        if st.button("مقایسه با موتور تکراری (مونت‌کارلو ۶۰ ساله)"):
+            check = chain.cross_check()
+            st.dataframe([
+                {'سمت': position, 'تحلیلی': round(analytical, 1), 'شبیه‌سازی': round(simulated, 1)}
+                for position, analytical, simulated
+                in zip(check['positions'], check['analytical'].tolist(), check['simulated'].tolist())
+            ], use_container_width=True)
+            st.caption(f"خطای نسبی کل پرسنل: {check['total_error']:.1%} - "
+                       f"بیشترین اختلاف یک سمت: {check['max_abs_error']:.0f} نفر")
+
+
+def show_sensitivity(simulation_years, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """جاروب دسته‌ای پارامترهای انتخابی و نمودار گردبادی مدیر شعب و رئیس شعبه"""
+    import sweep
+
+    names = {sweep.parameter_label(name): name
+             for name in sweep.parameter_names(probabilities, years_required, capacity, graph)}
+
+    with st.expander("🎯 تحلیل حساسیت پارامترها"):
+        with st.form("sensitivity"):
+            labels = st.multiselect("پارامترها", list(names), default=list(names)[:6])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                spread = st.slider("دامنه تغییر (± درصد)", 5, 50, 20) / 100
+            with col2:
+                method = st.radio("روش نمونه‌گیری", ["ابرمکعب لاتین", "شبکه کامل"], horizontal=True)
+            with col3:
+                samples = st.number_input("تعداد نمونه", 2, MAX_SWEEP_POINTS, 1000,
+                                          help="در شبکه کامل: تعداد سطوح هر پارامتر (حداکثر ۵)")
+            submitted = st.form_submit_button("اجرای تحلیل حساسیت")
+
+        if submitted and labels:
+            selected = [names[label] for label in labels]
+            ranges = sweep.relative_ranges(selected, spread, probabilities, years_required, capacity,
+                                           annual_hiring, graph)
+            if method == "شبکه کامل":
+                levels = min(samples, 5)
+                if levels ** len(selected) > MAX_SWEEP_POINTS:
+                    st.error(f"شبکه {levels}^{len(selected)} نقطه بیش از {MAX_SWEEP_POINTS} است؛ "
+                             "پارامترهای کمتری انتخاب کنید یا از ابرمکعب لاتین استفاده کنید.")
+                    return
+                selected, values = sweep.grid_points(ranges, levels)
+            else:
+                selected, values = sweep.latin_hypercube(ranges, samples, seed=0)
 
-        promotions['رئیس_شعبه_ممتاز_به_معاون_مدیر'] = int(
-            current_positions['رئیس_شعبه_ممتاز'] * 0.33 * probabilities.get('رئیس_شعبه_ممتاز_to_معاون_مدیر', 0.2)
-        )
+            with st.spinner(f"ارزیابی {len(values)} نقطه..."):
+                outputs, base = sweep.run_sweep(selected, values, simulation_years, probabilities,
+                                                years_required, capacity, annual_hiring, graph=graph)
+            st.session_state['last_sweep'] = {
+                target: sweep.tornado(selected, values, outputs[target], base[target]) for target in outputs
+            }
+            st.session_state['last_sweep_points'] = len(values)
 
-        promotions['معاون_مدیر_به_مدیر'] = int(
-            current_positions['معاون_مدیر_شعب'] * 0.33 * probabilities.get('معاون_مدیر_to_مدیر_شعب', 0.3)
-        )
+        last_sweep = st.session_state.get('last_sweep')
+        if last_sweep:
+            import charts
 
-        return promotions
-
-    def update_positions(self, current_positions, promotions, new_hires, retirements):
-        """به‌روزرسانی تعداد افراد در هر سمت"""
-        new_positions = current_positions.copy()
-
-        # اضافه کردن افراد جدید (عمدتاً بانکدار)
-        new_positions['بانکدار'] += new_hires
-
-        # کم کردن بازنشسته‌ها (تناسبی از همه سمت‌ها)
-        total_current = sum(current_positions.values())
-        for position in new_positions:
-            retirement_from_position = int(retirements * (current_positions[position] / total_current))
-            new_positions[position] = max(0, new_positions[position] - retirement_from_position)
-
-        # اعمال ارتقاءها
-        # کم کردن از سمت‌های پایین‌تر
-        new_positions['بانکدار'] -= promotions.get('بانکدار_به_رئیس_دایره', 0)
-        new_positions['معاون_شعبه'] -= promotions.get('معاون_شعبه4_به_رئیس_شعبه4', 0)
-        new_positions['رئیس_شعبه_درجه4'] -= promotions.get('رئیس_شعبه4_به_رئیس_شعبه3', 0)
-        new_positions['رئیس_شعبه_درجه3'] -= promotions.get('رئیس_شعبه3_به_رئیس_شعبه2', 0)
-        new_positions['رئیس_شعبه_درجه2'] -= promotions.get('رئیس_شعبه2_به_رئیس_شعبه1', 0)
-        new_positions['رئیس_شعبه_درجه1'] -= promotions.get('رئیس_شعبه1_به_رئیس_شعبه_ممتاز', 0)
-        new_positions['رئیس_شعبه_ممتاز'] -= promotions.get('رئیس_شعبه_ممتاز_به_معاون_مدیر', 0)
-        new_positions['معاون_مدیر_شعب'] -= promotions.get('معاون_مدیر_به_مدیر', 0)
-
-        # اضافه کردن به سمت‌های بالاتر
-        new_positions['معاون_شعبه'] += promotions.get('رئیس_دایره_به_معاون', 0)
-        new_positions['رئیس_شعبه_درجه4'] += promotions.get('معاون_شعبه4_به_رئیس_شعبه4', 0)
-        new_positions['رئیس_شعبه_درجه3'] += promotions.get('رئیس_شعبه4_به_رئیس_شعبه3', 0)
-        new_positions['رئیس_شعبه_درجه2'] += promotions.get('رئیس_شعبه3_به_رئیس_شعبه2', 0)
-        new_positions['رئیس_شعبه_درجه1'] += promotions.get('رئیس_شعبه2_به_رئیس_شعبه1', 0)
-        new_positions['رئیس_شعبه_ممتاز'] += promotions.get('رئیس_شعبه1_به_رئیس_شعبه_ممتاز', 0)
-        new_positions['معاون_مدیر_شعب'] += promotions.get('رئیس_شعبه_ممتاز_به_معاون_مدیر', 0)
-        new_positions['مدیر_شعب'] += promotions.get('معاون_مدیر_به_مدیر', 0)
-
-        # اطمینان از مثبت بودن تمام مقادیر
-        for position in new_positions:
-            new_positions[position] = max(0, new_positions[position])
-
-        return new_positions
-
-    def create_visualizations(self, simulation_results):
-        """ایجاد تجسم‌های مختلف"""
+            st.caption(f"{st.session_state['last_sweep_points']} نقطه؛ میله‌ها میانگین تعداد نهایی در ربع "
+                       "پایین و بالای بازه هر پارامتر و خط‌چین مقدار تنظیمات فعلی است.")
+            col1, col2 = st.columns(2)
+            for column, (target, rows) in zip((col1, col2), last_sweep.items()):
+                column.plotly_chart(charts.create_tornado_chart(
+                    rows, f"حساسیت تعداد نهایی {target.replace('_', ' ')}", sweep.parameter_label
+                ), use_container_width=True)
 
-        # نمودار تغییرات کل پرسنل
-        years = list(simulation_results.keys())
-        total_staff = []
-        new_hires = []
-        retirements = []
-
-        for year in years:
-            new_hires.append(simulation_results[year]['استخدام_جدید'])
-            retirements.append(simulation_results[year]['بازنشستگی'])
-            total_current = sum(simulation_results[year]['وضعیت_مناصب'].values())
-            total_staff.append(total_current)
-
-        # نمودار خطی تغییرات پرسنل
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=years, y=total_staff, name='کل پرسنل', line=dict(color='blue', width=3)))
-        fig1.add_trace(go.Bar(x=years, y=new_hires, name='استخدام جدید', marker_color='green'))
-        fig1.add_trace(go.Bar(x=years, y=[-x for x in retirements], name='بازنشستگی', marker_color='red'))
-
-        fig1.update_layout(
-            title='پیش‌بینی تغییرات پرسنل بانک',
-            xaxis_title='سال',
-            yaxis_title='تعداد نفر',
-            hovermode='x unified'
-        )
 
-        # نمودار دایره‌ای توزیع مناصب فعلی (فرضی)
-        positions = ['رئیس شعبه درجه 4', 'رئیس شعبه درجه 3', 'رئیس شعبه درجه 2',
-                     'رئیس شعبه درجه 1', 'رئیس شعبه ممتاز', 'معاونین', 'بانکداران', 'سایر']
-        initial_values = [1570, 2880, 930, 400, 540, 1935, 8625, 2000]  # فرضی
-
-        fig2 = px.pie(values=initial_values, names=positions, title='توزیع فعلی مناصب (ابتدای شبیه‌سازی)')
-
-        # نمودار دایره‌ای توزیع مناصب در انتهای شبیه‌سازی
-        final_year = max(years)
-        final_positions = simulation_results[final_year]['وضعیت_مناصب']
-
-        # تبدیل نام‌های کلیدها به فارسی برای نمایش
-        persian_position_names = {
-            'رئیس_شعبه_درجه4': 'رئیس شعبه درجه 4',
-            'رئیس_شعبه_درجه3': 'رئیس شعبه درجه 3',
-            'رئیس_شعبه_درجه2': 'رئیس شعبه درجه 2',
-            'رئیس_شعبه_درجه1': 'رئیس شعبه درجه 1',
-            'رئیس_شعبه_ممتاز': 'رئیس شعبه ممتاز',
-            'معاون_شعبه': 'معاونین شعبه',
-            'بانکدار': 'بانکداران',
-            'معاون_مدیر_شعب': 'معاون مدیر شعب',
-            'مدیر_شعب': 'مدیر شعب',
-            'سایر': 'سایر مناصب'
+def show_comparison(simulation_years, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """مقایسه جفت‌شده سیاست فعلی با یک سیاست جایگزین با اعداد تصادفی مشترک"""
+    with st.expander("⚖️ مقایسه دو سیاست (اعداد تصادفی مشترک)"):
+        with st.form("comparison"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                alternative_hiring = st.number_input("استخدام سالانه سیاست جایگزین", 0, 2000, annual_hiring)
+            with col2:
+                edge = st.selectbox("احتمال تغییرکننده", ["بدون تغییر"] + list(probabilities))
+            with col3:
+                change = st.slider("تغییر نسبی احتمال (درصد)", -50, 100, 20)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                tolerance = st.number_input("دقت لازم تفاضل (± نفر)", 0.1, 100.0, 5.0)
+            with col2:
+                max_replications = st.number_input("حداکثر تکرار", 200, MAX_COMPARISON_REPLICATIONS, 5000,
+                                                   step=100)
+            with col3:
+                seed = st.number_input("بذر تصادفی مقایسه", 0, 2 ** 31 - 1, 0)
+            submitted = st.form_submit_button("اجرای مقایسه")
+
+        if submitted:
+            from comparison import iter_comparison
+
+            alternative = dict(probabilities)
+            if edge in alternative:
+                alternative[edge] = min(1.0, alternative[edge] * (1 + change / 100))
+            scenarios = [
+                dict(name='فعلی', probabilities=probabilities, years_required=years_required, capacity=capacity,
+                     annual_hiring=annual_hiring),
+                dict(name='جایگزین', probabilities=alternative, years_required=years_required, capacity=capacity,
+                     annual_hiring=alternative_hiring)
+            ]
+            progress = st.progress(0.0, text="مقایسه سناریوها...")
+            for summary in iter_comparison(scenarios, simulation_years, seed=seed, tolerance=tolerance,
+                                           max_replications=max_replications, graph=graph):
+                unresolved = sum(not row['resolved'] for row in summary['rows'])
+                progress.progress(summary['replications'] / max_replications,
+                                  text=f"{summary['replications']:,} تکرار جفت‌شده؛ {unresolved} معیار حل‌نشده")
+            progress.empty()
+            st.session_state['last_comparison'] = summary
+
+        summary = st.session_state.get('last_comparison')
+        if summary:
+            import charts
+
+            rows = summary['rows']
+            # اجرای مستقل برای همین دقت به اندازه ضریب کاهش واریانس تکرار بیشتر لازم دارد
+            equivalent = summary['replications'] * min(row['variance_reduction'] for row in rows)
+            status = "همه تفاضل‌ها حل شدند" if summary['resolved'] else "سقف تکرار پیش از حل همه تفاضل‌ها رسید"
+            st.caption(f"{status}: {summary['replications']:,} تکرار جفت‌شده؛ اجرای مستقل برای همین دقت "
+                       f"دست‌کم حدود {equivalent:,.0f} تکرار لازم داشت.")
+            st.plotly_chart(charts.create_difference_chart(rows, "تفاضل سیاست جایگزین با سیاست فعلی (۹۵٪)"),
+                            use_container_width=True)
+            st.dataframe([{
+                'معیار': row['metric'],
+                'فعلی': round(row['baseline_mean'], 1),
+                'جایگزین': round(row['mean'], 1),
+                'تفاضل': round(row['difference'], 2),
+                'بازه اطمینان': f"[{row['low']:.2f}, {row['high']:.2f}]",
+                'کاهش واریانس': f"{row['variance_reduction']:,.0f}×" if np.isfinite(row['variance_reduction'])
+                else "-",
+                'حل‌شده': "✅" if row['resolved'] else "⏳"
+            } for row in rows], use_container_width=True)
+
+
+def show_emulator(simulation_years, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """پیش‌نمایش فوری خروجی‌ها با شبیه‌ساز جایگزین و تأیید با شبیه‌سازی کامل
+
+    اسلایدرهای این بخش بیرون از فرم‌اند تا هر جابه‌جایی بلافاصله پیش‌بینی تازه بدهد؛
+    بقیه پارامترها همان تنظیمات فعلی sidebar هستند.
+    """
+    graph = graph or load_graph()
+    with st.expander("⚡ پیش‌نمایش فوری (شبیه‌ساز جایگزین)"):
+        emulator = st.session_state.get('emulator')
+        train = st.button("آموزش شبیه‌ساز جایگزین اطراف تنظیمات فعلی")
+        if emulator is None and not train:
+            st.caption("شبیه‌ساز جایگزین یک بار با جاروب دسته‌ای آموزش می‌بیند و پس از آن هر تغییر اسلایدر "
+                       "در چند میلی‌ثانیه پیش‌بینی می‌شود.")
+            return
+
+        import sweep
+        from emulator import PROMOTION_RATE, TOTAL, cached_emulator, emulator_context, simulate_outputs
+
+        if emulator is not None and emulator.context != emulator_context(graph, capacity, simulation_years):
+            st.info("ساختار سازمانی، ظرفیت یا افق شبیه‌سازی تغییر کرده است؛ شبیه‌ساز جایگزین باید دوباره آموزش ببیند.")
+            emulator = st.session_state['emulator'] = None
+
+        if train:
+            with st.spinner(f"جاروب {EMULATOR_SAMPLES} نقطه و برازش رگرسیون..."):
+                emulator = cached_emulator(get_emulator_cache(), probabilities, years_required, capacity,
+                                           annual_hiring, simulation_years, graph, EMULATOR_SAMPLES)
+            st.session_state['emulator'] = emulator
+        if emulator is None:
+            return
+
+        labels = {sweep.parameter_label(name): name for name in emulator.names}
+        chosen = st.multiselect("پارامترهای پیش‌نمایش", list(labels), default=list(labels)[:4],
+                                key='emulator_parameters')
+        what_if_probabilities, what_if_years, what_if_hiring = dict(probabilities), dict(years_required), annual_hiring
+        for label in chosen:
+            name = labels[label]
+            if name == sweep.ANNUAL_HIRING:
+                what_if_hiring = st.slider(label, 100, 1000, annual_hiring, key=f"emulator_{name}")
+            elif name.startswith(sweep.YEARS_PREFIX):
+                key = name[len(sweep.YEARS_PREFIX):]
+                what_if_years[key] = st.slider(label, 1, 10, years_required[key], key=f"emulator_{name}")
+            else:
+                what_if_probabilities[name] = st.slider(label, 0.0, 1.0, probabilities[name], 0.01,
+                                                        key=f"emulator_{name}")
+
+        prediction = emulator.predict(what_if_probabilities, what_if_years, what_if_hiring)
+        mean, std = prediction['mean'], prediction['std']
+        if prediction['extrapolation']:
+            st.warning("این تنظیمات بیرون از محدوده آموزش است و پیش‌بینی قابل اعتماد نیست؛ "
+                       "شبیه‌ساز را اطراف این تنظیمات دوباره آموزش دهید.")
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("کل پرسنل نهایی (پیش‌بینی)", f"{mean[TOTAL]:,.0f}", f"±{2 * std[TOTAL]:,.0f}",
+                    delta_color='off')
+        col2.metric("مدیر شعب نهایی (پیش‌بینی)", f"{mean['مدیر_شعب']:,.1f}", f"±{2 * std['مدیر_شعب']:,.1f}",
+                    delta_color='off')
+        col3.metric("نرخ ارتقا (در صد نفر در سال)", f"{mean[PROMOTION_RATE]:.2f}",
+                    f"±{2 * std[PROMOTION_RATE]:.2f}", delta_color='off')
+        st.caption("بازه ±۲σ تقریبی است (پوشش حدود ۹۵٪)؛ برای تصمیم نهایی با شبیه‌سازی کامل تأیید کنید.")
+
+        # تأیید با اجرای کامل موتور برداری برای همین تنظیمات
+        check_key = scenario_key(probabilities=what_if_probabilities, years_required=what_if_years,
+                                 annual_hiring=what_if_hiring, context=emulator.context)
+        if st.button("✅ تأیید با شبیه‌سازی کامل"):
+            simulated = simulate_outputs(what_if_probabilities, what_if_years, capacity, what_if_hiring,
+                                         simulation_years, graph)
+            st.session_state['emulator_check'] = (check_key, simulated)
+        check = st.session_state.get('emulator_check')
+        simulated = check[1] if check and check[0] == check_key else None
+
+        import charts
+
+        positions = list(graph.positions)
+        st.plotly_chart(charts.create_emulator_chart(
+            positions, [mean[position] for position in positions], [std[position] for position in positions],
+            None if simulated is None else [simulated[position] for position in positions]
+        ), use_container_width=True)
+
+        rows = []
+        for output in emulator.outputs:
+            row = {'خروجی': output, 'پیش‌بینی': round(mean[output], 2), '±۲σ': round(2 * std[output], 2),
+                   'R² اعتبارسنجی': round(emulator.validation['r2'][output], 3)}
+            if simulated is not None:
+                row['شبیه‌سازی کامل'] = round(simulated[output], 2)
+            rows.append(row)
+        st.dataframe(rows, use_container_width=True)
+
+
+def show_optimizer(probabilities, years_required, capacity, annual_hiring, graph=None):
+    """جستجوی سیاست استخدام و ارتقایی که سمت‌های دارای ظرفیت را نزدیک ظرفیتشان نگه دارد"""
+    import sweep
+
+    graph = graph or load_graph()
+    with st.expander("🧭 بهینه‌سازی سیاست استخدام و ارتقا"):
+        labels = {sweep.parameter_label(name): name for name in sweep.policy_names(probabilities)}
+        with st.form("optimizer"):
+            chosen = st.multiselect("پارامترهای قابل تغییر", list(labels), default=list(labels))
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                years = st.slider("افق هدف (سال)", 5, 40, 20)
+                burn_in = st.number_input("سال‌های آغازین بی‌امتیاز", 0, 10, OPTIMIZER_BURN_IN,
+                                          help="مازاد اولیه نمودار در این سال‌ها با هیچ سیاستی اصلاح‌پذیر نیست")
+            with col2:
+                time_budget = st.number_input("بودجه زمانی (ثانیه)", 1, MAX_OPTIMIZER_SECONDS, 10)
+            with col3:
+                population = st.number_input("جمعیت هر نسل", 20, 2000, 200, step=20)
+            with col4:
+                max_hiring = st.number_input("سقف استخدام سالانه", 100, 10000, 1000, step=100)
+            submitted = st.form_submit_button("جستجوی سیاست")
+
+        if submitted and not chosen:
+            st.warning("دست‌کم یک پارامتر را برای جستجو انتخاب کنید.")
+        elif submitted:
+            from optimizer import capacity_objective, iter_optimize, policy_values, recommended_policy
+
+            names = [labels[label] for label in chosen]
+            progress = st.progress(0.0, text="ارزیابی نسل اول...")
+            trace = []
+            for row in iter_optimize(probabilities, years_required, capacity, annual_hiring, years, names,
+                                     population=population, time_budget=time_budget, hiring_range=(0, max_hiring),
+                                     graph=graph, burn_in=burn_in):
+                trace.append(row)
+                progress.progress(min(row['seconds'] / time_budget, 1.0),
+                                  text=f"نسل {row['generation']}: انحراف {row['best']:.1%}")
+            progress.empty()
+            recommended, hiring = recommended_policy(names, trace[-1]['best_values'], probabilities, annual_hiring)
+            # مقدار هدف همان سیاست گردشده‌ای که نمایش و دانلود می‌شود
+            objective = float(capacity_objective(names, [policy_values(names, recommended, hiring)], years,
+                                                 probabilities, years_required, capacity, annual_hiring, graph,
+                                                 burn_in)[0])
+            st.session_state['last_optimization'] = dict(names=names, years=years, burn_in=burn_in, trace=trace,
+                                                         probabilities=recommended, annual_hiring=hiring,
+                                                         objective=objective)
+
+        result = st.session_state.get('last_optimization')
+        if not result:
+            st.caption("هر نسل جمعیتی از سیاست‌ها را در یک اجرای دسته‌ای ارزیابی می‌کند؛ هدف کمینه کردن ریشه "
+                       "میانگین مربع انحراف نسبی تعداد هر سمت از ظرفیتش در سال‌های افق پس از سال‌های آغازین است.")
+            return
+
+        import charts
+        from optimizer import capacity_table, policy_values
+
+        trace, names = result['trace'], result['names']
+        last = trace[-1]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("انحراف تنظیمات فعلی", f"{last['baseline']:.1%}")
+        col2.metric("انحراف سیاست پیشنهادی", f"{result['objective']:.1%}",
+                    f"{result['objective'] - last['baseline']:+.1%}", delta_color='inverse')
+        col3.metric("نسل‌ها", f"{last['generation']}", f"{last['seconds']:.1f} ثانیه", delta_color='off')
+        st.plotly_chart(charts.create_convergence_chart(trace), use_container_width=True)
+
+        current = dict(zip(names, policy_values(names, probabilities, annual_hiring)))
+        st.dataframe([{
+            'پارامتر': sweep.parameter_label(name),
+            'فعلی': current[name],
+            'پیشنهادی': result['annual_hiring'] if name == sweep.ANNUAL_HIRING else result['probabilities'][name]
+        } for name in names], use_container_width=True)
+
+        # مقایسه هر سمت زیر سیاست فعلی و پیشنهادی (با همان مقادیر گردشده‌ای که دانلود می‌شود)
+        values = [[current[name] for name in names],
+                  policy_values(names, result['probabilities'], result['annual_hiring'])]
+        table = capacity_table(names, values, result['years'], probabilities, years_required, capacity,
+                               annual_hiring, graph, result['burn_in'])
+        st.dataframe([{
+            'سمت': position,
+            'میانگین انحراف فعلی (٪)': round(now[0], 1),
+            'میانگین انحراف پیشنهادی (٪)': round(proposed[0], 1),
+            'بیشترین انحراف پیشنهادی (٪)': round(proposed[1], 1)
+        } for position, (now, proposed) in table.items()], use_container_width=True)
+
+        scenario = {
+            'name': 'سیاست_پیشنهادی',
+            'years': result['years'],
+            'annual_hiring': result['annual_hiring'],
+            'probabilities': result['probabilities'],
+            'years_required': years_required,
+            'capacity': capacity
         }
+        st.download_button(
+            label="📥 دانلود سیاست پیشنهادی (سناریوی cli.py)",
+            data=json.dumps(scenario, ensure_ascii=False, indent=2),
+            file_name='recommended_policy.json',
+            mime='application/json'
+        )
 
-        final_position_names = [persian_position_names.get(k, k) for k in final_positions.keys()]
-        final_values = list(final_positions.values())
-
-        fig3 = px.pie(values=final_values, names=final_position_names,
-                      title=f'توزیع پیش‌بینی شده مناصب (سال {final_year})')
 
-        # نمودار مقایسه‌ای تغییرات مناصب مهم
-        key_positions = ['رئیس_شعبه_درجه4', 'رئیس_شعبه_درجه3', 'رئیس_شعبه_درجه2',
-                         'رئیس_شعبه_درجه1', 'رئیس_شعبه_ممتاز', 'معاون_مدیر_شعب', 'مدیر_شعب']
+def show_regions(simulation_years, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """شبیه‌سازی شعبه به شعبه با انتقال بین مناطق و نمایش جزئیات هر منطقه و شعبه"""
+    graph = graph or load_graph()
+    with st.expander("🗺️ شبیه‌سازی شعبه و منطقه"):
+        with st.form("regions"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                transfer_share = st.slider("سهم انتقال مازاد بین مناطق (درصد)", 0, 50,
+                                           int(REGIONS_TRANSFER_SHARE * 100)) / 100
+            with col2:
+                seed = st.number_input("بذر تصادفی", 0, 2 ** 31 - 1, 0, key='regions_seed')
+            with col3:
+                workers = st.number_input("تعداد پردازه", 1, os.cpu_count() or 1, 1)
+            submitted = st.form_submit_button("اجرای شبیه‌سازی منطقه‌ای")
+
+        if submitted:
+            from regions import RegionalSimulation
+
+            try:
+                simulation = RegionalSimulation(probabilities, years_required, capacity, annual_hiring, graph=graph,
+                                                seed=seed, transfer_share=transfer_share)
+            except ValueError as exc:
+                st.error(str(exc))
+                return
+            progress = st.progress(0.0, text="شبیه‌سازی مناطق...")
+            yearly = []
+            for year, totals in simulation.iter_years(simulation_years, workers):
+                yearly.append(totals)
+                progress.progress(year / simulation_years, text=f"سال {year} از {simulation_years}")
+            progress.empty()
+            branches, offices = simulation.branch_positions()
+            st.session_state['last_regions'] = dict(
+                years=list(range(1, simulation_years + 1)), positions=simulation.positions,
+                region_positions=np.stack([simulation.region_positions(totals['counts']) for totals in yearly]),
+                region_limits=simulation.region_positions(simulation.limits),
+                transfers=np.stack([totals['transfers'] for totals in yearly]),
+                branches=branches, offices=offices, layout=simulation.layout, grades=graph.grades
+            )
 
-        fig4 = go.Figure()
+        result = st.session_state.get('last_regions')
+        if not result:
+            st.caption("شعب هر درجه (از ظرفیت رئیس شعبه) به نوبت بین مناطق (ظرفیت مدیر شعب) پخش می‌شوند؛ "
+                       "ارتقا در هر منطقه و انتقال مازاد بین مناطق انجام می‌شود.")
+            return
+
+        import charts
+        import pandas as pd
+
+        layout, positions = result['layout'], result['positions']
+        regions = [f"منطقه {i + 1}" for i in range(layout.regions)]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("شعب", f"{len(layout.branch_grade):,}")
+        col2.metric("مناطق", f"{layout.regions:,}")
+        col3.metric("انتقال بین مناطق", f"{int(result['transfers'].sum()):,}")
+
+        capped = [p for i, p in enumerate(positions) if result['region_limits'][:, i].sum() > 0]
+        position = st.selectbox("سمت", capped, key='regions_position')
+        index = positions.index(position)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            usage = result['region_positions'][:, :, index] / result['region_limits'][:, index] * 100
+        st.plotly_chart(charts.create_region_heatmap(result['years'], regions, usage.T, position),
+                        use_container_width=True)
+
+        grades = np.array(result['grades'])
+        branch_table = pd.DataFrame(result['branches'], columns=positions)
+        branch_table.insert(0, 'درجه', grades[layout.branch_grade])
+        branch_table.insert(0, 'منطقه', layout.branch_region + 1)
+        branch_table.index.name = 'شعبه'
+        st.dataframe(branch_table, use_container_width=True)
+        st.download_button(
+            label="📥 دانلود وضعیت نهایی شعب (CSV)",
+            data=branch_table.to_csv().encode('utf-8'),
+            file_name=f'branches_{len(result["years"])}years.csv',
+            mime='text/csv'
+        )
 
-        for position in key_positions:
-            position_data = [simulation_results[year]['وضعیت_مناصب'][position] for year in years]
-            persian_name = persian_position_names.get(position, position)
-            fig4.add_trace(go.Scatter(x=years, y=position_data, name=persian_name, mode='lines+markers'))
 
-        fig4.update_layout(
-            title='روند تغییرات مناصب مدیریتی کلیدی',
-            xaxis_title='سال',
-            yaxis_title='تعداد نفر',
-            hovermode='x unified'
-        )
+def show_trajectory_explorer(store):
+    """پرس‌وجوی شرطی روی مسیرهای ذخیره‌شده و نمودار کاوش تکرارهای منطبق"""
+    import charts
+    from trajectories import OPERATORS
 
-        # نمودار جدید: درصد استفاده از ظرفیت
-        fig5 = go.Figure()
-
-        capacity_usage_data = {}
-        for year in years:
-            capacity_data = simulation_results[year].get('ظرفیت_استفاده', {})
-            for position, usage in capacity_data.items():
-                if position not in capacity_usage_data:
-                    capacity_usage_data[position] = []
-                capacity_usage_data[position].append(usage)
-
-        for position, usage_list in capacity_usage_data.items():
-            persian_name = persian_position_names.get(position, position)
-            fig5.add_trace(go.Scatter(x=years, y=usage_list, name=persian_name, mode='lines+markers'))
-
-        fig5.update_layout(
-            title='درصد استفاده از ظرفیت مناصب',
-            xaxis_title='سال',
-            yaxis_title='درصد استفاده',
-            yaxis=dict(range=[0, 120])
+    with st.expander("🔎 کاوش مسیرهای مونت‌کارلو"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            position = st.selectbox("سمت", store.positions, index=store.positions.index('مدیر_شعب')
+                                    if 'مدیر_شعب' in store.positions else 0)
+        with col2:
+            op = st.selectbox("شرط", list(OPERATORS), index=0)
+        with col3:
+            median = float(store.position_percentiles(position, (50,))[0, -1])
+            threshold = st.number_input("مقدار", value=int(median))
+        with col4:
+            year = st.selectbox("سال", [None] + store.years.tolist(),
+                                format_func=lambda value: "هر سالی" if value is None else str(value))
+
+        matches = store.where(position, op, threshold, year)
+        st.metric("تکرارهای منطبق", f"{len(matches):,} از {store.replications:,}",
+                  f"{len(matches) / store.replications:.1%}", delta_color='off')
+        if len(matches) == 0:
+            st.info("هیچ تکراری با این شرط وجود ندارد.")
+            return
+
+        samples = store.trajectories(matches[:20], [position])[:, :, 0]
+        st.plotly_chart(charts.create_drilldown_chart(
+            store.years.tolist(), f"{position.replace('_', ' ')}: همه تکرارها و تکرارهای منطبق",
+            store.position_percentiles(position), store.position_percentiles(position, replications=matches),
+            samples
+        ), use_container_width=True)
+
+
+def trajectory_directory(key):
+    """پوشه مسیرهای ذخیره‌شده یک سناریو (SIMULATION_TRAJECTORY_DIR یا پوشه موقت سیستم)
+
+    فقط زمان استفاده ثبت می‌شود؛ ذخیره‌های قدیمی پس از نوشتن ذخیره تازه در compute_scenario پاک می‌شوند.
+    """
+    from trajectories import store_directory
+
+    root = os.environ.get('SIMULATION_TRAJECTORY_DIR') or os.path.join(tempfile.gettempdir(),
+                                                                       'succession_trajectories')
+    return store_directory(root, key[:16])
+
+
+@st.cache_resource
+def get_result_cache():
+    """کش مشترک نتایج بین همه نشست‌ها (لایه دیسک با متغیر SIMULATION_CACHE_DIR)"""
+    return ResultCache(directory=os.environ.get('SIMULATION_CACHE_DIR'))
+
+
+@st.cache_resource
+def get_emulator_cache():
+    """کش شبیه‌سازهای جایگزین آموزش‌دیده (هر کدام چند مگابایت است)"""
+    directory = os.environ.get('SIMULATION_CACHE_DIR')
+    return ResultCache(max_entries=4, directory=directory and os.path.join(directory, 'emulator'))
+
+
+@st.cache_resource
+def get_roster_cache():
+    """کش تصویر فشرده فهرست کارکنان تا نشست‌های بعدی فایل را دوباره نخوانند"""
+    directory = os.environ.get('SIMULATION_CACHE_DIR')
+    return ResultCache(max_entries=4, directory=directory and os.path.join(directory, 'roster'))
+
+
+def load_active_graph():
+    """گراف سازمانی با وضعیت اولیه فهرست کارکنان (فایل بارگذاری‌شده یا ROSTER_PATH) در صورت وجود"""
+    graph = load_graph()
+
+    with st.sidebar.expander("👥 فهرست کارکنان"):
+        uploaded = st.file_uploader("فایل CSV یا Parquet (position, grade, hire_date, birth_date)",
+                                    type=['csv', 'parquet'])
+        as_of = st.date_input("تاریخ مبنای سابقه و سن", datetime.date.today())
+        source = uploaded or os.environ.get('ROSTER_PATH')
+        if not source:
+            st.caption("وضعیت اولیه از نمودار سازمانی خوانده می‌شود.")
+            return graph
+
+        from roster import cached_roster
+
+        try:
+            snapshot = cached_roster(source, get_roster_cache(), graph, as_of)
+        except (OSError, ValueError, ImportError) as exc:
+            st.error(f"خطا در خواندن فهرست کارکنان: {exc}")
+            return graph
+        st.caption(f"{snapshot.rows:,} ردیف خوانده شد؛ {snapshot.skipped:,} ردیف نامعتبر کنار گذاشته شد.")
+
+    return graph.with_roster(snapshot)
+
+
+@st.cache_resource
+def get_checkpoint_cache():
+    """کش جداگانه نقاط بازیابی افق (حالت مونت‌کارلو بزرگ است، پس تعداد کمتری نگه داشته می‌شود)"""
+    directory = os.environ.get('SIMULATION_CACHE_DIR')
+    return ResultCache(max_entries=8, directory=directory and os.path.join(directory, 'checkpoints'))
+
+
+def compute_scenario(job, simulator, graph, cache, checkpoints, profiler, *, simulation_years, probabilities,
+                     years_required, capacity, annual_hiring, monte_carlo, engine_name, retirement_acceleration,
+                     replications, seed, workers, cache_key, horizon_key, trajectory_dir, use_horizon):
+    """اجرای کامل یک سناریو در رشته کارگر صف (بدون فراخوانی Streamlit)
+
+    سال‌های محاسبه‌شده و صدک‌های مونت‌کارلو با job.report به عنوان نتیجه جزئی
+    گزارش می‌شوند تا نشست‌ها نمودار زنده را بکشند و اجرای متوقف‌شده نتایج تا همان
+    سال را نشان دهد.
+    """
+    import charts
+    import results_table as rt
+    from engine import VectorizedEngine
+    from parallel import iter_ensemble_bands, stack_bands
+    from trajectories import TrajectoryStore, prune_stores, write_ensemble
+
+    # طولانی‌ترین افق اجراشده با همین پارامترها: افق کوتاه‌تر برش آن است و
+    # افق بلندتر فقط سال‌های جدید را از نقطه بازیابی آخر محاسبه می‌کند
+    horizon = checkpoints.get(horizon_key) if use_horizon else None
+    horizon_years = horizon['years'] if horizon else 0
+    computed = False
+
+    results = {year: data for year, data in (horizon['results'] if horizon else {}).items()
+               if year <= simulation_years}
+    job.report(len(results) / simulation_years, "در حال انجام شبیه‌سازی...", results=dict(results))
+
+    checkpoint = horizon['checkpoint'] if horizon else None
+    if len(results) < simulation_years:
+        checkpoint, computed = {}, True
+        stream = simulator.iter_career_progression(
+            simulation_years, probabilities, years_required, capacity, annual_hiring,
+            engine=engine_name, seed=seed, profiler=profiler, graph=graph,
+            start=horizon['checkpoint'] if horizon else None, checkpoint=checkpoint,
+            retirement_acceleration=retirement_acceleration
         )
-
-        return fig1, fig2, fig3, fig4, fig5
+        for year, data in stream:
+            results[year] = data
+            job.report(year / simulation_years, f"سال {year} از {simulation_years}", results=dict(results))
+    table = rt.from_results(results, graph)
+
+    bands = None
+    band_rows, ensemble_checkpoint = None, None
+    if trajectory_dir is not None:
+        # مسیرهای کامل بخش به بخش روی دیسک نوشته و صدک‌ها از همان خوانده می‌شوند
+        if not TrajectoryStore.exists(trajectory_dir):
+            engine = VectorizedEngine(probabilities, years_required, capacity, annual_hiring,
+                                      graph=graph, profiler=profiler)
+            for done in write_ensemble(engine, trajectory_dir, simulation_years, replications, seed):
+                job.report(done / replications, f"ذخیره مسیرهای مونت‌کارلو: {done} از {replications} تکرار")
+            # پاک‌سازی فقط پس از پایان کار، نه در هر اجرای مجدد صفحه
+            prune_stores(os.path.dirname(trajectory_dir), trajectory_dir)
+        bands = TrajectoryStore(trajectory_dir).percentiles()
+    elif monte_carlo:
+        # صدک‌های ذخیره‌شده فقط همراه نقطه بازیابی مجموعه قابل ادامه‌اند
+        if horizon and horizon['ensemble'] is not None:
+            band_rows, ensemble_checkpoint = horizon['band_rows'][:simulation_years], horizon['ensemble']
+        if band_rows is not None and len(band_rows) == simulation_years:
+            bands = stack_bands(graph.positions, (5, 50, 95), np.stack(band_rows, axis=1))
+        elif workers > 1:
+            job.report(1.0, "در حال اجرای موازی مونت‌کارلو...")
+            bands = simulator.simulate_ensemble(
+                simulation_years, probabilities, years_required, capacity, annual_hiring,
+                replications, seed, workers, profiler, graph=graph
+            )
+            band_rows, ensemble_checkpoint, computed = None, None, True
+        else:
+            # فقط صدک‌های هر سال نگه داشته می‌شود، نه مسیرهای همه تکرارها
+            engine = VectorizedEngine(probabilities, years_required, capacity, annual_hiring,
+                                      graph=graph, profiler=profiler)
+            start, band_rows = ensemble_checkpoint, list(band_rows or [])
+            ensemble_checkpoint, computed = {}, True
+            for year, band in iter_ensemble_bands(engine, simulation_years, replications, seed,
+                                                  start=start, checkpoint=ensemble_checkpoint):
+                band_rows.append(band)
+                job.report(year / simulation_years, f"مونت‌کارلو: سال {year} از {simulation_years}",
+                           band_rows=list(band_rows))
+            bands = stack_bands(engine.positions, (5, 50, 95), np.stack(band_rows, axis=1))
+
+    if computed and simulation_years >= horizon_years:
+        checkpoints.put(horizon_key, {
+            'years': simulation_years, 'results': results, 'checkpoint': checkpoint,
+            'band_rows': band_rows, 'ensemble': ensemble_checkpoint
+        })
+
+    # ایجاد نمودارها
+    figures = charts.create_visualizations(table, bands, profiler, graph.initial_positions())
+    cache.put(cache_key, (table, figures))
+    return {'table': table, 'figures': figures}
+
+
+def follow_job(job, jobs, graph, profiler=NULL_PROFILER):
+    """نمایش پیشرفت و نمودار زنده کار تا پایان آن (اجرای مجدد اسکریپت حلقه را قطع می‌کند)"""
+    import charts
+    import results_table as rt
+
+    progress = st.progress(0.0, text="در حال انجام شبیه‌سازی...")
+    chart_placeholder = st.empty()
+    table_placeholder = st.empty()
+
+    shown = None
+    while not job.wait(JOB_POLL_SECONDS):
+        if job.state == QUEUED:
+            progress.progress(0.0, text=f"در صف اجرا؛ {jobs.position(job)} کار جلوتر")
+            continue
+        progress.progress(job.progress, text=job.text or "در حال انجام شبیه‌سازی...")
+
+        partial = job.partial
+        if partial is not shown and partial and partial.get('results'):
+            shown = partial
+            with profiler.phase('live_update'):
+                table = rt.from_results(partial['results'], graph)
+                chart_placeholder.plotly_chart(charts.create_live_chart(table, partial.get('band_rows', ())),
+                                               use_container_width=True)
+                table_placeholder.dataframe(rt.summary_frame(table), use_container_width=True)
+
+    for placeholder in (progress, chart_placeholder, table_placeholder):
+        placeholder.empty()
+
+
+def settle_job(last_run, job):
+    """last_run پس از پایان یا توقف کار: نتیجه کامل، یا نتایج جزئی تا آخرین سال گزارش‌شده"""
+    if job.state == DONE:
+        return {**last_run, 'job': None, 'table': job.result['table'], 'figures': job.result['figures'],
+                'complete': True}
+    return {**last_run, 'job': None, 'results': (job.partial or {}).get('results')}
+
+
+@st.cache_resource
+def get_job_queue():
+    """صف مشترک کارهای پس‌زمینه بین همه نشست‌ها (تعداد کارگر با SIMULATION_JOB_WORKERS)"""
+    workers = os.environ.get('SIMULATION_JOB_WORKERS')
+    return JobQueue(int(workers) if workers else None)
 
 
 def main():
+    # تنظیمات صفحه
+    st.set_page_config(page_title="شبیه‌ساز جانشین‌پروری بانک", layout="wide")
+
     st.title("🏛️ شبیه‌ساز جانشین‌پروری بانک")
     st.markdown("---")
 
     simulator = BankSuccessionSimulator()
+    cache = get_result_cache()
+    checkpoints = get_checkpoint_cache()
+    jobs = get_job_queue()
 
     # نمایش توضیحات کامل
     simulator.create_simulation_explanation()
 
     st.markdown("---")
 
-    # تنظیمات اصلی
+    # تنظیمات اصلی (در قالب فرم تا تغییر هر ویجت اجرای مجدد کامل ایجاد نکند)
     st.header("🎛️ تنظیمات اصلی شبیه‌سازی")
-    col1, col2, col3 = st.columns(3)
+    with st.form("main_settings"):
+        col1, col2, col3 = st.columns(3)
 
-    with col1:
-        simulation_years = st.slider("تعداد سال‌های شبیه‌سازی", 1, 20, 10)
+        with col1:
+            simulation_years = st.slider("تعداد سال‌های شبیه‌سازی", 1, 20, 10)
 
-    with col2:
-        annual_hiring = st.number_input("تعداد استخدام سالانه", 100, 1000, 500)
+        with col2:
+            annual_hiring = st.number_input("تعداد استخدام سالانه", 100, 1000, 500)
 
-    with col3:
-        retirement_acceleration = st.slider("ضریب تسریع بازنشستگی", 0.5, 2.0, 1.0)
+        with col3:
+            retirement_acceleration = st.slider("ضریب تسریع بازنشستگی", 0.5, 2.0, 1.0,
+                                                help="در حالت گروه سنی، ضریب نرخ بازنشستگی سالانه هر سن")
 
-    # تنظیمات تفصیلی در sidebar
-    capacity = simulator.create_capacity_settings()
-    probabilities, years_required = simulator.create_probability_sliders()
+        col1, col2, col3, col4 = st.columns(4)
 
-    # دکمه اجرای شبیه‌سازی
-    st.markdown("---")
-    if st.button("🚀 اجرای شبیه‌سازی", type="primary"):
-        with st.spinner("در حال انجام شبیه‌سازی..."):
-            # اجرای شبیه‌سازی
-            results = simulator.simulate_career_progression(
-                simulation_years, probabilities, years_required, capacity, annual_hiring
-            )
+        with col1:
+            simulation_mode = st.radio("حالت شبیه‌سازی", list(SIMULATION_ENGINES), horizontal=True)
 
-            # نمایش نتایج
-            st.success("شبیه‌سازی با موفقیت انجام شد!")
+        with col2:
+            replications = st.number_input("تعداد تکرار مونت‌کارلو", 100, 20000, 1000, step=100)
 
-            # ایجاد نمودارها
-            fig1, fig2, fig3, fig4, fig5 = simulator.create_visualizations(results)
+        with col3:
+            seed = st.number_input("بذر تصادفی", 0, 2 ** 31 - 1, 42)
 
-            # نمایش نمودارها
-            st.header("📊 نتایج شبیه‌سازی")
+        with col4:
+            workers = st.number_input("تعداد پردازه‌های موازی", 1, os.cpu_count() or 1, 1)
 
-            # نمودار تغییرات کل پرسنل
-            st.plotly_chart(fig1, use_container_width=True)
+        col1, col2, col3 = st.columns(3)
 
-            # نمودارهای مقایسه‌ای توزیع مناصب
-            st.subheader("🔍 مقایسه توزیع مناصب")
-            col1, col2 = st.columns(2)
+        with col1:
+            profile_run = st.checkbox("⏱️ پروفایل مراحل اجرا",
+                                      help="زمان هر مرحله ثبت می‌شود و نتیجه از کش خوانده نمی‌شود")
 
-            with col1:
-                st.plotly_chart(fig2, use_container_width=True)
+        with col2:
+            profile_memory = st.checkbox("ردیابی حافظه در پروفایل",
+                                         help="با tracemalloc؛ اجرا به‌طور محسوسی کندتر می‌شود")
 
-            with col2:
-                st.plotly_chart(fig3, use_container_width=True)
-
-            # نمودار روند تغییرات مناصب مدیریتی
-            st.plotly_chart(fig4, use_container_width=True)
-
-            # نمودار درصد استفاده از ظرفیت
-            st.plotly_chart(fig5, use_container_width=True)
-
-            # نمایش جدول نتایج تفصیلی
-            st.subheader("📋 نتایج تفصیلی شبیه‌سازی")
-
-            # تبدیل نتایج به DataFrame برای نمایش
-            summary_data = []
-            for year, data in results.items():
-                summary_data.append({
-                    'سال': year,
-                    'استخدام جدید': data['استخدام_جدید'],
-                    'بازنشستگی': data['بازنشستگی'],
-                    'کل پرسنل': sum(data['وضعیت_مناصب'].values()),
-                    'رئیس شعبه درجه 4': data['وضعیت_مناصب']['رئیس_شعبه_درجه4'],
-                    'رئیس شعبه درجه 3': data['وضعیت_مناصب']['رئیس_شعبه_درجه3'],
-                    'رئیس شعبه درجه 2': data['وضعیت_مناصب']['رئیس_شعبه_درجه2'],
-                    'رئیس شعبه درجه 1': data['وضعیت_مناصب']['رئیس_شعبه_درجه1'],
-                    'رئیس شعبه ممتاز': data['وضعیت_مناصب']['رئیس_شعبه_ممتاز'],
-                    'معاون مدیر شعب': data['وضعیت_مناصب']['معاون_مدیر_شعب'],
-                    'مدیر شعب': data['وضعیت_مناصب']['مدیر_شعب']
-                })
-
-            df_summary = pd.DataFrame(summary_data)
-            st.dataframe(df_summary, use_container_width=True)
-
-            # هشدارهای مهم
-            st.subheader("⚠️ تحلیل و هشدارهای مهم")
-
-            # محاسبه آمار کلی
-            final_year_data = results[simulation_years]
-            total_retirement = sum([results[year]['بازنشستگی'] for year in results])
-            total_hiring = sum([results[year]['استخدام_جدید'] for year in results])
-            net_change = total_hiring - total_retirement
+        with col3:
+            store_trajectories = st.checkbox("💽 ذخیره مسیرهای کامل مونت‌کارلو",
+                                             help="مسیر همه تکرارها روی دیسک (memmap) برای پرس‌وجو و کاوش جزئی")
 
-            col1, col2, col3, col4 = st.columns(4)
+        # دکمه اجرای شبیه‌سازی
+        run_requested = st.form_submit_button("🚀 اجرای شبیه‌سازی", type="primary")
 
-            with col1:
-                st.metric("کل استخدام", total_hiring)
+    # تنظیمات تفصیلی در sidebar
+    with st.sidebar.form("detailed_settings"):
+        capacity = simulator.create_capacity_settings()
+        probabilities, years_required = simulator.create_probability_sliders()
+        st.form_submit_button("✅ اعمال تنظیمات")
 
-            with col2:
-                st.metric("کل بازنشستگی", total_retirement)
+    graph = load_active_graph()
 
-            with col3:
-                st.metric("تغییر خالص", net_change)
+    for warning in graph.with_parameters(probabilities, years_required).warnings():
+        st.sidebar.warning(warning)
 
-            with col4:
-                final_total = sum(final_year_data['وضعیت_مناصب'].values())
-                st.metric("کل پرسنل نهایی", final_total)
-
-            # هشدارها
-            if net_change < 0:
-                st.error(f"🚨 کمبود نیروی انسانی: {abs(net_change)} نفر کمتر از نیاز")
-            elif net_change > total_hiring * 0.5:
-                st.warning(f"⚠️ رشد زیاد نیروی انسانی: {net_change} نفر اضافه")
-            else:
-                st.success(f"✅ تعادل مناسب نیروی انسانی: {net_change} نفر تغییر خالص")
-
-            # بررسی نرخ ارتقا
-            total_promotions = sum([sum(results[year]['ارتقاءها'].values()) for year in results])
-            promotion_rate = total_promotions / (
-                        total_hiring + sum([sum(data['وضعیت_مناصب'].values()) for data in results.values()]) / len(
-                    results))
-
-            if promotion_rate < 0.05:
-                st.warning("⚠️ نرخ ارتقا پایین است - ممکن است موجب نارضایتی کارکنان شود")
-            elif promotion_rate > 0.2:
-                st.warning("⚠️ نرخ ارتقا بالا است - بررسی کیفیت ارتقاءها ضروری است")
-
-            # پیشنهادات
-            st.subheader("💡 پیشنهادات بهبود")
-            suggestions = []
-
-            if net_change < 0:
-                suggestions.append("🔹 افزایش نرخ استخدام در سمت‌های کلیدی")
-                suggestions.append("🔹 کاهش نرخ بازنشستگی از طریق مشوق‌های حفظ نیرو")
-
-            if promotion_rate < 0.05:
-                suggestions.append("🔹 تسریع برنامه‌های آموزش و توسعه شغلی")
-                suggestions.append("🔹 ایجاد مسیرهای ارتقای جایگزین")
-
-            suggestions.extend([
-                "🔹 ایجاد برنامه‌های جانشین‌پروری هدفمند",
-                "🔹 توسعه برنامه‌های حفظ استعداد",
-                "🔹 بازنگری دوره‌ای در سیاست‌های منابع انسانی",
-                "🔹 ایجاد سیستم پیش‌بینی دقیق‌تر نیازهای آتی"
-            ])
-
-            for suggestion in suggestions:
-                st.write(suggestion)
-
-            # امکان دانلود نتایج
-            st.subheader("💾 دانلود نتایج")
-            csv = df_summary.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="دانلود نتایج به صورت CSV",
-                data=csv,
-                file_name=f'simulation_results_{simulation_years}years.csv',
-                mime='text/csv'
+    st.markdown("---")
+
+    # کلید سناریو فقط به پارامترهایی وابسته است که روی نتیجه اثر دارند
+    monte_carlo = simulation_mode == "مونت‌کارلو"
+    engine_name = SIMULATION_ENGINES[simulation_mode]
+    scenario = dict(
+        org_chart=graph.fingerprint(),
+        mode=simulation_mode,
+        probabilities=probabilities,
+        years_required=years_required,
+        capacity=capacity,
+        annual_hiring=annual_hiring,
+        retirement_acceleration=retirement_acceleration if engine_name == 'cohort' else None,
+        replications=replications if monte_carlo else None,
+        seed=seed if monte_carlo or engine_name == 'agent' else None
+    )
+    cache_key = scenario_key(years=simulation_years, **scenario)
+    # نقطه بازیابی افق به تعداد سال‌ها وابسته نیست
+    horizon_key = scenario_key(horizon=True, **scenario)
+    trajectory_dir = trajectory_directory(cache_key) if monte_carlo and store_trajectories else None
+
+    # نتایج آخرین اجرا بین اجراهای مجدد اسکریپت در session_state می‌ماند؛
+    # اجرای متوقف‌شده فقط با دکمه اجرا دوباره شروع می‌شود
+    last_run = st.session_state.get('last_run')
+    dirty = last_run is None or last_run['key'] != cache_key or not last_run['complete']
+    resume = last_run is not None and last_run['complete']
+
+    # اجرای پروفایل‌شده همیشه محاسبه تازه است
+    profiler = PhaseProfiler(track_memory=profile_memory) if profile_run else NULL_PROFILER
+    render_profiler = NULL_PROFILER
+    dirty = dirty or (profile_run and run_requested)
+
+    # کار پس‌زمینه همین نشست که هنوز تمام نشده است؛ با تغییر سناریو اشتراک نشست برداشته می‌شود
+    job = last_run.get('job') if last_run is not None else None
+    if job is not None and not job.finished and last_run['key'] != cache_key:
+        jobs.cancel(job)
+        last_run = settle_job(last_run, job)
+        st.session_state['last_run'] = last_run
+        job = None
+
+    if job is None and dirty and (run_requested or resume):
+        cached = None if profile_run else cache.get(cache_key)
+
+        if cached is None:
+            # اجرای تکراری همین سناریو توسط نشست‌های دیگر با همان کار ادغام می‌شود
+            job_key = None if profile_run else scenario_key(run=cache_key, trajectories=trajectory_dir is not None)
+            job = jobs.submit(
+                job_key, compute_scenario, simulator, graph, cache, checkpoints, profiler,
+                label=f"{simulation_mode} - {simulation_years} سال",
+                simulation_years=simulation_years, probabilities=probabilities, years_required=years_required,
+                capacity=capacity, annual_hiring=annual_hiring, monte_carlo=monte_carlo, engine_name=engine_name,
+                retirement_acceleration=retirement_acceleration, replications=replications, seed=seed,
+                workers=workers, cache_key=cache_key,
+                horizon_key=horizon_key, trajectory_dir=trajectory_dir, use_horizon=not profile_run
             )
+            last_run = {'key': cache_key, 'job': job, 'results': None, 'table': None, 'figures': None,
+                        'complete': False, 'profile': profiler if profile_run else None,
+                        'trajectories': trajectory_dir}
+            st.session_state['last_run'] = last_run
+        else:
+            table, figures = cached
+            last_run = {'key': cache_key, 'job': None, 'results': None, 'table': table, 'figures': figures,
+                        'complete': True, 'profile': None, 'trajectories': trajectory_dir}
+            st.session_state['last_run'] = last_run
+            st.success("شبیه‌سازی با موفقیت انجام شد!")
+
+    if job is not None:
+        if not job.finished:
+            # دکمه توقف در اجرای مجدد بعدی همان‌جا True برمی‌گرداند؛ هر تعامل دیگری فقط
+            # حلقه نمایش را قطع می‌کند و کار در پس‌زمینه ادامه می‌یابد
+            stop_placeholder = st.empty()
+            if stop_placeholder.button("⏹️ توقف شبیه‌سازی", key='stop_job'):
+                jobs.cancel(job)
+            else:
+                follow_job(job, jobs, graph, last_run['profile'] or NULL_PROFILER)
+            stop_placeholder.empty()
+
+        last_run = settle_job(last_run, job)
+        st.session_state['last_run'] = last_run
+        if last_run['complete']:
+            render_profiler = last_run['profile'] or NULL_PROFILER
+            st.success("شبیه‌سازی با موفقیت انجام شد!")
+        elif job.state == FAILED:
+            st.error(f"خطا در اجرای شبیه‌سازی: {job.error}")
+
+    if last_run is not None and last_run['complete']:
+        if engine_name == 'cohort':
+            st.caption("در حالت گروه سنی فقط کارکنان بالای ۵۰ سال بازنشسته می‌شوند و نرخ سالانه ثابت حالت قطعی "
+                       "اعمال نمی‌شود؛ با تنظیمات پیش‌فرض پس از ۲۰ سال حدود ۱۶٬۵۰۰ نفر می‌مانند در برابر "
+                       "حدود ۵٬۴۰۰ نفر در حالت قطعی. سابقه بازنشسته‌ها تقریبی است (از باسابقه‌ترین‌ها کم می‌شود).")
+        show_results(last_run['table'], last_run['figures'], render_profiler)
+        if last_run['profile'] is not None:
+            show_profile(last_run['profile'])
+        if last_run['trajectories']:
+            from trajectories import TrajectoryStore
+
+            if TrajectoryStore.exists(last_run['trajectories']):
+                show_trajectory_explorer(TrajectoryStore(last_run['trajectories']))
+    elif last_run is not None and last_run['results']:
+        # اجرای متوقف‌شده: نتایج سال‌های محاسبه‌شده
+        import charts
+        import results_table as rt
+
+        table = rt.from_results(last_run['results'], graph)
+        st.warning(f"شبیه‌سازی متوقف شد؛ نتایج تا سال {max(last_run['results'])} نمایش داده می‌شود.")
+        show_results(table, charts.create_visualizations(table, initial=graph.initial_positions()))
+
+    show_markov_analysis(probabilities, years_required, annual_hiring, graph)
+    show_sensitivity(simulation_years, probabilities, years_required, capacity, annual_hiring, graph)
+    show_comparison(simulation_years, probabilities, years_required, capacity, annual_hiring, graph)
+    show_emulator(simulation_years, probabilities, years_required, capacity, annual_hiring, graph)
+    show_optimizer(probabilities, years_required, capacity, annual_hiring, graph)
+    show_regions(simulation_years, probabilities, years_required, capacity, annual_hiring, graph)
+
+    # وضعیت کش نتایج
+    cache_stats = cache.stats()
+    with st.sidebar.expander("📦 کش نتایج"):
+        col1, col2 = st.columns(2)
+        col1.metric("برخورد", cache_stats['hits'])
+        col2.metric("عدم برخورد", cache_stats['misses'])
+        st.caption(f"نرخ برخورد: {cache_stats['hit_rate']:.0%} - "
+                   f"موارد در حافظه: {cache_stats['entries']} - برخورد از دیسک: {cache_stats['disk_hits']}")
+
+    # وضعیت صف مشترک اجرا
+    job_stats = jobs.stats()
+    with st.sidebar.expander("🧵 صف اجرا"):
+        col1, col2 = st.columns(2)
+        col1.metric("در حال اجرا", job_stats['running'])
+        col2.metric("در صف", job_stats['queued'])
+        st.caption(f"کارگرها: {job_stats['workers']} - اجراهای تکراری ادغام‌شده: {job_stats['deduplicated']}")
 
     # اطلاعات اضافی در پایان صفحه
     st.markdown("---")
@@ -0,0 +1,70 @@
+"""مقایسه نتایج بنچمارک با یک خط پایه ذخیره‌شده و گزارش پسرفت‌ها
+
+برای هر کلید مشترک نسبت کمترین زمان فعلی به خط پایه محاسبه می‌شود. موردی پسرفت
+است که هم نسبت از 1 + threshold و هم اختلاف مطلق از min-delta بیشتر باشد؛
+در این صورت کد خروج 1 است.
+
+اجرا از ریشه مخزن:
+    python benchmarks/compare.py benchmarks/results/baseline.json current.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return report.get('meta', {}), {result['key']: result for result in report['results']}
+
+
+def compare(baseline, current, threshold, min_delta):
+    """سطرهای (کلید، زمان پایه، زمان فعلی، نسبت، وضعیت) برای کلیدهای مشترک"""
+    rows = []
+    for key in baseline.keys() & current.keys():
+        before, after = baseline[key]['min'], current[key]['min']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold and after - before > min_delta:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold) and before - after > min_delta:
+            status = 'faster'
+        else:
+            status = ''
+        rows.append((key, before, after, ratio, status))
+    return sorted(rows, key=lambda row: -row[3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10, help="کندی نسبی مجاز (0.10 یعنی 10 درصد)")
+    parser.add_argument('--min-delta', type=float, default=1e-5, help="اختلاف مطلق مجاز به ثانیه")
+    args = parser.parse_args()
+
+    baseline_meta, baseline = load(args.baseline)
+    current_meta, current = load(args.current)
+    print(f"baseline: {baseline_meta.get('commit')} ({baseline_meta.get('timestamp')})")
+    print(f"current:  {current_meta.get('commit')} ({current_meta.get('timestamp')})")
+    for field in ('python', 'numpy', 'machine', 'cpu_count'):
+        if baseline_meta.get(field) != current_meta.get(field):
+            print(f"هشدار: {field} متفاوت است ({baseline_meta.get(field)} / {current_meta.get(field)})")
+
+    rows = compare(baseline, current, args.threshold, args.min_delta)
+    print(f"{'case':<90} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for key, before, after, ratio, status in rows:
+        print(f"{key:<90} {before * 1e3:>10.3f} {after * 1e3:>10.3f} {ratio:>7.2f} {status}")
+
+    for label, keys in (('فقط در خط پایه', baseline.keys() - current.keys()),
+                        ('فقط در نتایج فعلی', current.keys() - baseline.keys())):
+        if keys:
+            print(f"{label}: {len(keys)} مورد")
+
+    regressions = [row for row in rows if row[4] == 'REGRESSION']
+    if regressions:
+        print(f"{len(regressions)} پسرفت بیش از {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
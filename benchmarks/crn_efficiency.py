@@ -0,0 +1,50 @@
+"""سنجش اثر اعداد تصادفی مشترک: تکرار لازم برای یک دقت با CRN و با اجرای مستقل
+
+سیاست جایگزین ضریب factor روی احتمال یک یال (پیش‌فرض بازنشستگی رئیس شعبه ۱) است.
+
+اجرا از ریشه مخزن:
+    python benchmarks/crn_efficiency.py --tolerance 0.5 --max-replications 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comparison import compare_scenarios  # noqa: E402
+from simulator import SuccessionSimulator  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edge', default='رئیس_شعبه1_retire')
+    parser.add_argument('--factor', type=float, default=1.3)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--relative', type=float, default=0.05)
+    parser.add_argument('--max-replications', type=int, default=20000)
+    args = parser.parse_args()
+
+    simulator = SuccessionSimulator()
+    baseline = dict(name='فعلی', probabilities=simulator.default_probabilities,
+                    years_required=simulator.default_years_required, capacity=simulator.default_capacity,
+                    annual_hiring=500)
+    probabilities = dict(simulator.default_probabilities)
+    probabilities[args.edge] = min(1.0, probabilities[args.edge] * args.factor)
+    alternative = dict(baseline, name='جایگزین', probabilities=probabilities)
+
+    print(f"{'mode':>12} {'reps':>7} {'resolved':>9} {'seconds':>8}  max half-width")
+    for common in (True, False):
+        start = time.perf_counter()
+        summary = compare_scenarios([baseline, alternative], args.years, seed=0, common=common,
+                                    tolerance=args.tolerance, relative=args.relative,
+                                    max_replications=args.max_replications)
+        elapsed = time.perf_counter() - start
+        widest = max(row['half_width'] for row in summary['rows'])
+        print(f"{'common' if common else 'independent':>12} {summary['replications']:>7} "
+              f"{str(summary['resolved']):>9} {elapsed:>8.2f}  {widest:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""سنجش مقیاس‌پذیری اجرای موازی مجموعه مونت‌کارلو
+
+اجرا از ریشه مخزن:
+    python benchmarks/parallel_scaling.py --replications 40000 --years 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import VectorizedEngine  # noqa: E402
+from parallel import run_parallel_ensemble  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replications', type=int, default=40000)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # احتمالات و سال‌های پیش‌فرض نمودار سازمانی
+    engine = VectorizedEngine({}, {}, {}, 500)
+    baseline = None
+
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'efficiency':>10}")
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        run_parallel_ensemble(engine, args.years, args.replications, seed=0, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>8} {elapsed:>9.3f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
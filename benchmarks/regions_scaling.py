@@ -0,0 +1,61 @@
+"""سنجش شبیه‌سازی منطقه‌ای در مقیاس چند هزار شعبه و مقیاس‌پذیری پردازه‌ها
+
+ظرفیت‌ها، تعداد اولیه و استخدام پیش‌فرض به نسبت --branches / تعداد شعب پیش‌فرض
+بزرگ می‌شوند. نتیجه همه تعداد پردازه‌ها باید یکسان باشد (بخش‌ها بذر ثابت دارند).
+
+اجرا از ریشه مخزن:
+    python benchmarks/regions_scaling.py --branches 3200 --years 30
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from orgchart import load_graph  # noqa: E402
+from regions import BRANCH_POSITION, run_regions  # noqa: E402
+from simulator import SuccessionSimulator  # noqa: E402
+
+
+def scaled(value, factor):
+    if isinstance(value, dict):
+        return {key: scaled(item, factor) for key, item in value.items()}
+    return int(round(value * factor))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--branches', type=int, default=3200)
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    simulator = SuccessionSimulator()
+    factor = args.branches / sum(simulator.default_capacity[BRANCH_POSITION].values())
+    capacity = scaled(simulator.default_capacity, factor)
+    graph = copy.copy(load_graph())
+    graph.node_initial = np.round(graph.node_initial * factor).astype(np.int64)
+    hiring = scaled(500, factor)
+
+    print(f"{sum(capacity[BRANCH_POSITION].values())} branches, {capacity['مدیر_شعب']} regions, "
+          f"{graph.node_initial.sum():,} staff, {args.years} years")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'same result':>12}")
+    baseline, reference = None, None
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        result = run_regions(simulator.default_probabilities, simulator.default_years_required, capacity, hiring,
+                             args.years, seed=0, workers=workers, graph=graph)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        reference = reference if reference is not None else result['region_positions']
+        same = np.array_equal(reference, result['region_positions'])
+        print(f"{workers:>8} {elapsed:>9.3f} {baseline / elapsed:>8.2f} {str(same):>12}")
+
+
+if __name__ == '__main__':
+    main()
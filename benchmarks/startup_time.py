@@ -0,0 +1,102 @@
+"""سنجش زمان شروع سرد داشبورد و بررسی بودجه آن
+
+بودجه و ماژول‌های تنبل در tests/test_startup.py هم با pytest بررسی می‌شوند؛ این اسکریپت
+زمان‌ها را با چند تکرار دقیق‌تر گزارش می‌کند.
+
+هر اندازه‌گیری در یک پردازه تازه پایتون انجام می‌شود. اگر زمان وارد کردن app،
+سهم خود app پس از Streamlit یا اولین اجرای صفحه (بدون نتیجه) از بودجه بیشتر
+شود، یا ماژول‌های نمودار و تحلیلی پیش از وجود نتیجه وارد شوند، با کد خروج 1 تمام می‌شود.
+
+اجرا از ریشه مخزن:
+    python benchmarks/startup_time.py --repeats 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ماژول‌هایی که نباید پیش از اولین نتیجه یا درخواست کاربر وارد شوند؛ فقط جاروب برای ساختن
+# فرم تحلیل حساسیت و بهینه‌ساز در اولین اجرا لازم است (همین فهرست در tests/test_startup.py)
+LAZY_MODULES = ('charts', 'plotly.express', 'results_table', 'parallel', 'comparison', 'trajectories', 'roster',
+                'agents', 'cohorts', 'markov', 'optimizer', 'regions', 'emulator')
+
+PROBES = {
+    'import_app': """
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+""",
+    'import_app_after_streamlit': """
+import time
+import streamlit
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+""",
+    'first_paint': """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file('app.py', default_timeout=60).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'exceptions': len(at.exception),
+                  'loaded': [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+}
+
+
+def measure(probe, repeats):
+    """کمترین زمان چند اجرای probe در پردازه‌های تازه"""
+    outputs = []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, '-c', PROBES[probe]], cwd=ROOT, capture_output=True,
+                                   text=True, check=True, env={**os.environ, 'PYTHONPATH': ROOT})
+        outputs.append(completed.stdout.strip().splitlines()[-1])
+
+    if probe == 'first_paint':
+        runs = [json.loads(output) for output in outputs]
+        best = min(runs, key=lambda run: run['seconds'])
+        return best['seconds'], runs
+    return min(float(output) for output in outputs), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--import-budget', type=float, default=2.0, help="ثانیه برای import app")
+    parser.add_argument('--app-budget', type=float, default=0.05,
+                        help="ثانیه برای import app وقتی Streamlit از قبل وارد شده است")
+    parser.add_argument('--paint-budget', type=float, default=3.0, help="ثانیه برای اولین اجرای صفحه")
+    args = parser.parse_args()
+
+    budgets = {
+        'import_app': args.import_budget,
+        'import_app_after_streamlit': args.app_budget,
+        'first_paint': args.paint_budget
+    }
+    failures = []
+
+    print(f"{'probe':>28} {'seconds':>9} {'budget':>8}")
+    for probe, budget in budgets.items():
+        seconds, runs = measure(probe, args.repeats)
+        print(f"{probe:>28} {seconds:>9.3f} {budget:>8.3f}")
+        if seconds > budget:
+            failures.append(f"{probe}: {seconds:.3f}s > {budget:.3f}s")
+
+        for run in runs or ():
+            if run['exceptions']:
+                failures.append(f"{probe}: اجرای صفحه با خطا همراه بود")
+            if run['loaded']:
+                failures.append(f"{probe}: ماژول‌های تنبل پیش از نتیجه وارد شدند: {', '.join(run['loaded'])}")
+
+    for failure in dict.fromkeys(failures):
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+"""مجموعه بنچمارک مسیرهای داغ شبیه‌ساز با خروجی JSON
+
+موارد: simulate_career_progression (قطعی و مونت‌کارلو)، موتور گروه‌های سنی، حل تحلیلی مارکوف، جاروب حساسیت،
+پیش‌بینی شبیه‌ساز جایگزین، ارزیابی یک نسل بهینه‌ساز سیاست، مسیر قدیمی
+update_tenure / calculate_promotions_with_tenure / update_positions و
+charts.create_visualizations در مقیاس‌های سال، اندازه نیرو، تعداد سمت و تکرار.
+نمودار ۱۰ سمتی همان org_chart.json (مقیاس‌شده) است و نمودار ۱۰۰ سمتی یک
+نردبان مصنوعی؛ توابع مسیر قدیمی و نمودارها نام سمت‌های واقعی را لازم دارند و
+فقط با ۱۰ سمت اجرا می‌شوند.
+
+اجرا از ریشه مخزن:
+    python benchmarks/suite.py --output benchmarks/results/current.json
+    python benchmarks/suite.py --quick --output /tmp/quick.json
+    python benchmarks/compare.py benchmarks/results/baseline.json /tmp/current.json
+"""
+import argparse
+import contextlib
+import copy
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import results_table as rt  # noqa: E402
+from markov import MarkovChain  # noqa: E402
+import sweep  # noqa: E402
+from emulator import train_emulator  # noqa: E402
+from optimizer import capacity_objective, policy_names  # noqa: E402
+from orgchart import DEFAULT_CHART_PATH, load_graph, read_chart  # noqa: E402
+from simulator import SuccessionSimulator  # noqa: E402
+
+YEARS = (10, 20, 40)
+WORKFORCE = (20000, 200000)
+POSITIONS = (10, 100)
+REPLICATIONS = (1, 1000, 10000)
+SWEEP_POINTS = (1000,)
+OPTIMIZER_POPULATION = 200
+
+ANNUAL_HIRING_SHARE = 500 / 19020  # نسبت استخدام سالانه به نیروی نمودار واقعی
+
+
+def scaled_chart(workforce):
+    """نمودار واقعی با تعداد اولیه مقیاس‌شده به workforce"""
+    chart = copy.deepcopy(read_chart(DEFAULT_CHART_PATH))
+    initial = np.array([node.get('initial', 0) for node in chart['nodes']], dtype=np.float64)
+    scaled = np.floor(initial * workforce / initial.sum()).astype(np.int64)
+    scaled[np.argmax(scaled)] += workforce - scaled.sum()
+    for node, count in zip(chart['nodes'], scaled.tolist()):
+        node['initial'] = count
+    return chart
+
+
+def ladder_chart(positions, workforce):
+    """نردبان مصنوعی: هر سمت یک گره، ارتقا به یک و دو پله بالاتر و خروج از سمت‌های بالایی"""
+    names = [f"سمت_{i}" for i in range(positions)]
+    weights = 0.85 ** np.arange(positions)
+    initial = np.floor(weights / weights.sum() * workforce).astype(np.int64)
+    initial[0] += workforce - initial.sum()
+
+    transitions = []
+    for i, name in enumerate(names):
+        for step, prob, years in ((1, 0.5, 2), (2, 0.1, 4)):
+            if i + step < positions:
+                transitions.append({'key': f"{name}_to_{names[i + step]}", 'source': name,
+                                    'target': names[i + step], 'probability': prob, 'min_years': years})
+        if i >= positions * 4 // 5:
+            transitions.append({'key': f"{name}_retire", 'source': name, 'target': None, 'probability': 0.3})
+
+    return {
+        'name': f"نردبان {positions} سمتی",
+        'positions': names,
+        'grades': [],
+        'hiring_node': names[0],
+        'nodes': [{'name': name, 'position': name, 'initial': int(count)} for name, count in zip(names, initial)],
+        'transitions': transitions
+    }
+
+
+@contextlib.contextmanager
+def use_chart(chart):
+    """نمودار موقت به عنوان ORG_CHART_PATH برای همه موتورها"""
+    previous = os.environ.get('ORG_CHART_PATH')
+    with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as f:
+        json.dump(chart, f, ensure_ascii=False)
+    os.environ['ORG_CHART_PATH'] = f.name
+    load_graph.cache_clear()
+    try:
+        yield load_graph()
+    finally:
+        if previous is None:
+            os.environ.pop('ORG_CHART_PATH', None)
+        else:
+            os.environ['ORG_CHART_PATH'] = previous
+        load_graph.cache_clear()
+        os.remove(f.name)
+
+
+def measure(fn, repeats, min_seconds=0.05):
+    """زمان هر فراخوانی در repeats تکرار؛ توابع سریع چند بار در هر تکرار اجرا می‌شوند"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or number >= 100000:
+            break
+        number *= 10
+
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+def cases(args):
+    """(نام، پارامترها، سازنده تابع) برای همه ترکیب‌های انتخاب‌شده"""
+    simulator = SuccessionSimulator()
+
+    for years, workforce, positions, replications in itertools.product(
+            args.years, args.workforce, args.positions, args.replications):
+        params = {'years': years, 'workforce': workforce, 'positions': positions, 'replications': replications}
+        yield 'simulate_career_progression', params, _simulate_case(simulator, params)
+        if replications == 1:
+            yield 'cohort_progression', params, _cohort_case(simulator, params)
+
+    for workforce, positions in itertools.product(args.workforce, args.positions):
+        yield 'markov_steady_state', {'workforce': workforce, 'positions': positions}, \
+            _markov_case(simulator, workforce, positions)
+
+    # مسیر قدیمی، جاروب حساسیت و نمودارها فقط روی نمودار واقعی
+    if 10 not in args.positions:
+        return
+    for years, workforce, points in itertools.product(args.years, args.workforce, SWEEP_POINTS):
+        params = {'years': years, 'workforce': workforce, 'positions': 10, 'points': points}
+        yield 'run_sweep', params, _sweep_case(simulator, params)
+    for workforce in args.workforce:
+        params = {'workforce': workforce, 'positions': 10}
+        yield 'emulator_predict', params, _emulator_case(simulator, workforce)
+        yield 'optimizer_generation', params, _optimizer_case(simulator, workforce)
+        for name in ('update_tenure', 'calculate_promotions_with_tenure', 'update_positions'):
+            yield name, params, _legacy_case(simulator, name, workforce)
+        for years in args.years:
+            yield 'create_visualizations', {**params, 'years': years}, _charts_case(simulator, years, workforce)
+
+
+def _chart_for(positions, workforce):
+    return scaled_chart(workforce) if positions == 10 else ladder_chart(positions, workforce)
+
+
+def _scenario_capacity(simulator, positions):
+    return simulator.default_capacity if positions == 10 else {}
+
+
+def _simulate_case(simulator, params):
+    def build():
+        chart = _chart_for(params['positions'], params['workforce'])
+        hiring = int(params['workforce'] * ANNUAL_HIRING_SHARE)
+        capacity = _scenario_capacity(simulator, params['positions'])
+        probabilities = simulator.default_probabilities if params['positions'] == 10 else {}
+        years_required = simulator.default_years_required if params['positions'] == 10 else {}
+
+        if params['replications'] == 1:
+            def fn():
+                simulator.simulate_career_progression(params['years'], probabilities, years_required,
+                                                      capacity, hiring)
+        else:
+            def fn():
+                simulator.simulate_ensemble(params['years'], probabilities, years_required, capacity, hiring,
+                                            params['replications'], seed=0, workers=1)
+        return chart, fn
+    return build
+
+
+def _cohort_case(simulator, params):
+    def build():
+        chart = _chart_for(params['positions'], params['workforce'])
+        hiring = int(params['workforce'] * ANNUAL_HIRING_SHARE)
+        capacity = _scenario_capacity(simulator, params['positions'])
+        probabilities = simulator.default_probabilities if params['positions'] == 10 else {}
+        years_required = simulator.default_years_required if params['positions'] == 10 else {}
+        return chart, lambda: simulator.simulate_career_progression(params['years'], probabilities, years_required,
+                                                                    capacity, hiring, engine='cohort')
+    return build
+
+
+def _markov_case(simulator, workforce, positions):
+    def build():
+        chart = _chart_for(positions, workforce)
+        hiring = int(workforce * ANNUAL_HIRING_SHARE)
+        probabilities = simulator.default_probabilities if positions == 10 else {}
+        years_required = simulator.default_years_required if positions == 10 else {}
+        target = chart['nodes'][-1]['name']
+
+        def fn():
+            chain = MarkovChain(probabilities, years_required, hiring)
+            chain.steady_state()
+            chain.visits_by_grade()
+            chain.time_to_reach(target)
+        return chart, fn
+    return build
+
+
+def _sweep_case(simulator, params):
+    def build():
+        chart = scaled_chart(params['workforce'])
+        hiring = int(params['workforce'] * ANNUAL_HIRING_SHARE)
+        probabilities = simulator.default_probabilities
+        years_required = simulator.default_years_required
+        capacity = simulator.default_capacity
+        names = sweep.parameter_names(probabilities, years_required, capacity)
+        with use_chart(chart):
+            ranges = sweep.relative_ranges(names, 0.2, probabilities, years_required, capacity, hiring)
+        names, values = sweep.latin_hypercube(ranges, params['points'], seed=0)
+        return chart, lambda: sweep.run_sweep(names, values, params['years'], probabilities, years_required,
+                                              capacity, hiring)
+    return build
+
+
+def _emulator_case(simulator, workforce):
+    def build():
+        chart = scaled_chart(workforce)
+        hiring = int(workforce * ANNUAL_HIRING_SHARE)
+        probabilities = simulator.default_probabilities
+        years_required = simulator.default_years_required
+        # آموزش بیرون از زمان‌سنجی؛ فقط پیش‌بینی یک تنظیم اندازه‌گیری می‌شود
+        with use_chart(chart):
+            emulator = train_emulator(probabilities, years_required, simulator.default_capacity, hiring, 10)
+        return chart, lambda: emulator.predict(probabilities, years_required, hiring)
+    return build
+
+
+def _optimizer_case(simulator, workforce):
+    def build():
+        chart = scaled_chart(workforce)
+        hiring = int(workforce * ANNUAL_HIRING_SHARE)
+        probabilities = simulator.default_probabilities
+        names = policy_names(probabilities)
+        values = np.random.default_rng(0).uniform(0, 1, (OPTIMIZER_POPULATION, len(names)))
+        values[:, 0] = hiring
+        return chart, lambda: capacity_objective(names, values, 20, probabilities, simulator.default_years_required,
+                                                 simulator.default_capacity, hiring)
+    return build
+
+
+def _legacy_case(simulator, name, workforce):
+    def build():
+        chart = scaled_chart(workforce)
+        graph_positions = {node['position'] for node in chart['nodes']}
+        current = {position: 0 for position in chart['positions'] if position in graph_positions}
+        for node in chart['nodes']:
+            current[node['position']] += node['initial']
+        tenure = simulator.update_tenure({position: {} for position in current}, current)
+        probabilities = simulator.default_probabilities
+        years_required = simulator.default_years_required
+        promotions = simulator.calculate_promotions_with_tenure(probabilities, years_required, current, tenure)
+        hiring = int(workforce * ANNUAL_HIRING_SHARE)
+
+        calls = {
+            'update_tenure': lambda: simulator.update_tenure(tenure, current),
+            'calculate_promotions_with_tenure': lambda: simulator.calculate_promotions_with_tenure(
+                probabilities, years_required, current, tenure),
+            'update_positions': lambda: simulator.update_positions(current, promotions, hiring, hiring)
+        }
+        return chart, calls[name]
+    return build
+
+
+def _charts_case(simulator, years, workforce):
+    def build():
+        import charts
+
+        chart = scaled_chart(workforce)
+        hiring = int(workforce * ANNUAL_HIRING_SHARE)
+        with use_chart(chart) as graph:
+            results = simulator.simulate_career_progression(
+                years, simulator.default_probabilities, simulator.default_years_required,
+                simulator.default_capacity, hiring)
+            table = rt.from_results(results, graph)
+        return chart, lambda: charts.create_visualizations(table)
+    return build
+
+
+def case_key(name, params):
+    return f"{name}[{','.join(f'{key}={value}' for key, value in sorted(params.items()))}]"
+
+
+def metadata():
+    """اطلاعات محیط اجرا برای مقایسه منصفانه"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, nargs='+', default=list(YEARS))
+    parser.add_argument('--workforce', type=int, nargs='+', default=list(WORKFORCE))
+    parser.add_argument('--positions', type=int, nargs='+', default=list(POSITIONS))
+    parser.add_argument('--replications', type=int, nargs='+', default=list(REPLICATIONS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help="فقط کوچک‌ترین مقیاس‌ها (برای بررسی سریع)")
+    parser.add_argument('--filter', default='', help="فقط مواردی که کلیدشان شامل این متن است")
+    parser.add_argument('--output', help="مسیر فایل JSON نتایج")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.years, args.workforce, args.replications = [10], [20000], [1, 1000]
+
+    results = []
+    print(f"{'case':<90} {'min ms':>10} {'median ms':>10}")
+    for name, params, build in cases(args):
+        key = case_key(name, params)
+        if args.filter not in key:
+            continue
+
+        chart, fn = build()
+        with use_chart(chart):
+            samples, number = measure(fn, args.repeats)
+
+        results.append({
+            'key': key,
+            'name': name,
+            'params': params,
+            'min': min(samples),
+            'median': statistics.median(samples),
+            'samples': samples,
+            'number': number
+        })
+        print(f"{key:<90} {min(samples) * 1e3:>10.3f} {statistics.median(samples) * 1e3:>10.3f}", flush=True)
+
+    report = {'meta': metadata(), 'results': results}
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"نتایج در {args.output} ذخیره شد")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""کش نتایج شبیه‌سازی بر اساس پارامترها
+
+کلید هر سناریو هش SHA-256 نمایش متعارف JSON پارامترهاست. لایه حافظه با
+سیاست LRU محدود می‌شود و لایه اختیاری دیسک نتایج را پس از راه‌اندازی مجدد
+برنامه نیز نگه می‌دارد. CACHE_VERSION جزء همه کلیدهاست تا پس از تغییر موتورها
+نتایج قدیمی دیسک (نتایج، نمودارها، شبیه‌سازهای جایگزین) دیگر خوانده نشوند.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# با هر تغییری که خروجی موتورها یا ساختار اشیای کش‌شده را عوض می‌کند یکی زیاد شود
+CACHE_VERSION = 1
+
+
+def scenario_key(**params):
+    """هش متعارف پارامترهای سناریو و CACHE_VERSION (مستقل از ترتیب کلیدها)"""
+    canonical = json.dumps([CACHE_VERSION, params], sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """کش دو لایه: حافظه با حذف LRU و دیسک اختیاری"""
+
+    def __init__(self, max_entries=32, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """مقدار کش‌شده یا None"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        value = self._load(key)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """ذخیره در حافظه و در صورت فعال بودن، روی دیسک"""
+        with self.lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _store(self, key, value):
+        if not self.directory:
+            return
+        # نوشتن اتمی تا خواننده‌های همزمان فایل نیمه‌کاره نبینند
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        """شمارنده‌های برخورد و عدم برخورد"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'entries': len(self.entries),
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -0,0 +1,48 @@
+"""نگاشت تنظیمات ظرفیت به گره‌های گراف سازمانی و محاسبه درصد استفاده
+
+تنظیمات create_capacity_settings بر اساس گروه سمت و درجه است (مثلاً
+capacity['رئیس_شعبه']['درجه3'])؛ این ماژول آن‌ها را به آرایه ظرفیت گره‌ها
+تبدیل می‌کند. گره‌های بدون ظرفیت تعریف‌شده نامحدود (inf) هستند.
+"""
+import numpy as np
+
+
+def setting_for(position, capacity):
+    """تنظیم ظرفیت یک سمت: کلید دقیق یا گروهی که پیشوند نام سمت است"""
+    if position in capacity:
+        return capacity[position]
+    for key, setting in capacity.items():
+        if position.startswith(f"{key}_"):
+            return setting
+    return None
+
+
+def node_capacity(graph, capacity):
+    """ظرفیت هر گره به صورت آرایه float (inf برای نامحدود)"""
+    limits = np.full(len(graph.node_names), np.inf)
+
+    for node in range(len(graph.node_names)):
+        setting = setting_for(graph.positions[graph.node_position[node]], capacity or {})
+        grade = graph.node_grade[node]
+        if isinstance(setting, dict):
+            if grade >= 0 and graph.grades[grade] in setting:
+                limits[node] = setting[graph.grades[grade]]
+            elif grade < 0:
+                limits[node] = sum(setting.values())
+        elif setting is not None:
+            limits[node] = setting
+
+    return limits
+
+
+def position_capacity(graph, limits):
+    """ظرفیت هر سمت (مجموع گره‌ها؛ inf اگر یکی از گره‌ها نامحدود باشد)"""
+    finite = np.where(np.isinf(limits), 0, limits) @ graph.position_matrix
+    unlimited = (np.isinf(limits).astype(np.int64) @ graph.position_matrix) > 0
+    return np.where(unlimited, np.inf, finite)
+
+
+def capacity_usage(positions, position_limits):
+    """درصد واقعی استفاده از ظرفیت برای سمت‌هایی که ظرفیت محدود دارند"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return positions / position_limits * 100
@@ -0,0 +1,234 @@
+"""ساخت نمودارهای Plotly از جدول بلند نتایج
+
+این ماژول (و plotly.express) فقط وقتی وارد می‌شود که نتیجه‌ای برای رسم وجود
+داشته باشد تا شروع سرد داشبورد هزینه بارگذاری Plotly را نپردازد.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+import results_table as rt
+from orgchart import load_graph
+from profiling import NULL_PROFILER
+
+
+def add_percentile_band(fig, years, band, name, color):
+    """افزودن میانه و بازه ۵ تا ۹۵ درصد به نمودار"""
+    low, median, high = band
+    fig.add_trace(go.Scatter(x=years, y=high, line=dict(width=0, color=color), showlegend=False,
+                             legendgroup=name, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=years, y=low, line=dict(width=0, color=color), fill='tonexty', opacity=0.3,
+                             name=f'{name} (بازه ۵ تا ۹۵ درصد)', legendgroup=name))
+    fig.add_trace(go.Scatter(x=years, y=median, name=f'{name} (میانه)', legendgroup=name,
+                             line=dict(color=color, dash='dash')))
+
+
+def create_live_chart(table, band_rows=()):
+    """نمودار کل پرسنل در حین اجرا؛ band_rows صدک‌های سال‌های محاسبه‌شده مونت‌کارلو است"""
+    total_staff = rt.yearly_total(table, rt.HEADCOUNT)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=total_staff.index, y=total_staff.values, name='کل پرسنل',
+                             line=dict(color='blue', width=3)))
+    if len(band_rows):
+        band_years = list(range(1, len(band_rows) + 1))
+        add_percentile_band(fig, band_years, np.stack(band_rows, axis=1)[:, :, 0], 'کل پرسنل', 'blue')
+
+    fig.update_layout(title='پیشرفت شبیه‌سازی', xaxis_title='سال', yaxis_title='تعداد نفر')
+    return fig
+
+
+def create_visualizations(table, bands=None, profiler=None, initial=None):
+    """ایجاد تجسم‌های مختلف از جدول بلند نتایج (با bands، بازه‌های مونت‌کارلو هم رسم می‌شوند)
+
+    initial تعداد اولیه هر سمت است (پیش‌فرض: نمودار سازمانی).
+    """
+    with (profiler or NULL_PROFILER).phase('figures'):
+        return _build_figures(table, bands, initial)
+
+
+def _build_figures(table, bands, initial):
+    """ساخت پنج نمودار نتایج"""
+
+    # نمودار تغییرات کل پرسنل
+    headcount = rt.position_pivot(table, rt.HEADCOUNT)
+    years = headcount.index.tolist()
+    total_staff = headcount.sum(axis=1).tolist()
+    new_hires = rt.yearly_total(table, rt.HIRES).tolist()
+    retirements = rt.yearly_total(table, rt.RETIREMENTS).tolist()
+
+    # نمودار خطی تغییرات پرسنل
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(x=years, y=total_staff, name='کل پرسنل', line=dict(color='blue', width=3)))
+    fig1.add_trace(go.Bar(x=years, y=new_hires, name='استخدام جدید', marker_color='green'))
+    fig1.add_trace(go.Bar(x=years, y=[-x for x in retirements], name='بازنشستگی', marker_color='red'))
+
+    if bands is not None:
+        add_percentile_band(fig1, years, bands['کل_پرسنل'], 'کل پرسنل', 'blue')
+
+    fig1.update_layout(
+        title='پیش‌بینی تغییرات پرسنل بانک',
+        xaxis_title='سال',
+        yaxis_title='تعداد نفر',
+        hovermode='x unified'
+    )
+
+    # تبدیل نام‌های کلیدها به فارسی برای نمایش
+    persian_position_names = {
+        'رئیس_شعبه_درجه4': 'رئیس شعبه درجه 4',
+        'رئیس_شعبه_درجه3': 'رئیس شعبه درجه 3',
+        'رئیس_شعبه_درجه2': 'رئیس شعبه درجه 2',
+        'رئیس_شعبه_درجه1': 'رئیس شعبه درجه 1',
+        'رئیس_شعبه_ممتاز': 'رئیس شعبه ممتاز',
+        'معاون_شعبه': 'معاونین شعبه',
+        'بانکدار': 'بانکداران',
+        'معاون_مدیر_شعب': 'معاون مدیر شعب',
+        'مدیر_شعب': 'مدیر شعب',
+        'سایر': 'سایر مناصب'
+    }
+
+    # نمودار دایره‌ای توزیع مناصب در ابتدای شبیه‌سازی (نمودار سازمانی یا فهرست کارکنان)
+    initial = initial or load_graph().initial_positions()
+    fig2 = px.pie(values=list(initial.values()), names=[persian_position_names.get(k, k) for k in initial],
+                  title='توزیع فعلی مناصب (ابتدای شبیه‌سازی)')
+
+    # نمودار دایره‌ای توزیع مناصب در انتهای شبیه‌سازی
+    final_year = max(years)
+    final_positions = headcount.loc[final_year]
+
+    final_position_names = [persian_position_names.get(k, k) for k in final_positions.index]
+    final_values = final_positions.tolist()
+
+    fig3 = px.pie(values=final_values, names=final_position_names,
+                  title=f'توزیع پیش‌بینی شده مناصب (سال {final_year})')
+
+    # نمودار مقایسه‌ای تغییرات مناصب مهم
+    key_positions = ['رئیس_شعبه_درجه4', 'رئیس_شعبه_درجه3', 'رئیس_شعبه_درجه2',
+                     'رئیس_شعبه_درجه1', 'رئیس_شعبه_ممتاز', 'معاون_مدیر_شعب', 'مدیر_شعب']
+
+    fig4 = go.Figure()
+
+    palette = px.colors.qualitative.Plotly
+
+    for i, position in enumerate(key_positions):
+        position_data = headcount[position].tolist()
+        persian_name = persian_position_names.get(position, position)
+        color = palette[i % len(palette)]
+        fig4.add_trace(go.Scatter(x=years, y=position_data, name=persian_name, mode='lines+markers',
+                                  legendgroup=persian_name, line=dict(color=color)))
+        if bands is not None:
+            add_percentile_band(fig4, years, bands['مناصب'][position], persian_name, color)
+
+    fig4.update_layout(
+        title='روند تغییرات مناصب مدیریتی کلیدی',
+        xaxis_title='سال',
+        yaxis_title='تعداد نفر',
+        hovermode='x unified'
+    )
+
+    # نمودار جدید: درصد استفاده از ظرفیت
+    fig5 = go.Figure()
+
+    capacity_usage = rt.position_pivot(table, rt.CAPACITY_USAGE)
+    for position, usage in capacity_usage.items():
+        persian_name = persian_position_names.get(position, position)
+        fig5.add_trace(go.Scatter(x=usage.index, y=usage.values, name=persian_name, mode='lines+markers'))
+
+    fig5.update_layout(
+        title='درصد استفاده از ظرفیت مناصب',
+        xaxis_title='سال',
+        yaxis_title='درصد استفاده',
+        yaxis=dict(rangemode='tozero')
+    )
+    # خط ظرفیت کامل؛ مقادیر بالاتر یعنی مازاد نیرو نسبت به ظرفیت
+    fig5.add_hline(y=100, line_dash='dash', line_color='red')
+
+    return fig1, fig2, fig3, fig4, fig5
+
+
+def create_tornado_chart(rows, title, labels=None, limit=15):
+    """نمودار گردبادی: میانگین خروجی در پایین و بالای بازه هر پارامتر نسبت به مقدار پایه"""
+    rows = rows[:limit][::-1]  # بزرگ‌ترین اثر در بالای نمودار
+    names = [labels(row['parameter']) if labels else row['parameter'] for row in rows]
+    base = rows[0]['base'] if rows else 0
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=names, x=[row['low'] - base for row in rows], base=base, orientation='h',
+                         name='مقدار کم پارامتر', marker_color='indianred'))
+    fig.add_trace(go.Bar(y=names, x=[row['high'] - base for row in rows], base=base, orientation='h',
+                         name='مقدار زیاد پارامتر', marker_color='seagreen'))
+    fig.add_vline(x=base, line_dash='dash', line_color='gray')
+
+    fig.update_layout(title=title, barmode='overlay', xaxis_title='تعداد نهایی', height=150 + 30 * len(rows))
+    return fig
+
+
+def create_drilldown_chart(years, title, band, matching_band, samples):
+    """بازه همه تکرارها، بازه تکرارهای منطبق با شرط و چند مسیر نمونه از آن‌ها"""
+    fig = go.Figure()
+    add_percentile_band(fig, years, band, 'همه تکرارها', 'gray')
+    add_percentile_band(fig, years, matching_band, 'تکرارهای منطبق', 'crimson')
+    for i, trajectory in enumerate(samples):
+        fig.add_trace(go.Scatter(x=years, y=trajectory, mode='lines', line=dict(width=1, color='crimson'),
+                                 opacity=0.35, name='مسیرهای نمونه', legendgroup='samples', showlegend=i == 0))
+
+    fig.update_layout(title=title, xaxis_title='سال', yaxis_title='تعداد نفر', hovermode='x unified')
+    return fig
+
+
+def create_difference_chart(rows, title):
+    """تفاضل جفت‌شده هر معیار با بازه اطمینان؛ سبز یعنی تفاضل با دقت خواسته‌شده حل شده است"""
+    fig = go.Figure()
+    for resolved, color, name in ((True, 'seagreen', 'حل‌شده'), (False, 'darkorange', 'حل‌نشده')):
+        selected = [row for row in rows if row['resolved'] == resolved]
+        if not selected:
+            continue
+        fig.add_trace(go.Scatter(
+            x=[row['difference'] for row in selected],
+            y=[f"{row['metric'].replace('_', ' ')} ({row['scenario']})" for row in selected],
+            error_x=dict(type='data', array=[row['half_width'] for row in selected]),
+            mode='markers', marker=dict(color=color, size=10), name=name
+        ))
+    fig.add_vline(x=0, line_dash='dash', line_color='gray')
+
+    fig.update_layout(title=title, xaxis_title='تفاضل با سیاست فعلی (نفر)', height=150 + 40 * len(rows))
+    return fig
+
+
+def create_emulator_chart(positions, mean, std, simulated=None):
+    """پیش‌بینی شبیه‌ساز جایگزین برای تعداد نهایی هر سمت با بازه ±۲σ و در صورت وجود، نتیجه شبیه‌سازی کامل"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=positions, y=mean, error_y=dict(type='data', array=[2 * value for value in std]),
+                         name='پیش‌بینی (±۲σ)', marker_color='lightsteelblue'))
+    if simulated is not None:
+        fig.add_trace(go.Scatter(x=positions, y=simulated, mode='markers', name='شبیه‌سازی کامل',
+                                 marker=dict(color='crimson', size=10, symbol='diamond')))
+
+    fig.update_layout(title='پیش‌نمایش تعداد نهایی مناصب', xaxis_title='سمت', yaxis_title='تعداد نفر')
+    return fig
+
+
+def create_convergence_chart(trace):
+    """همگرایی جستجوی سیاست: بهترین مقدار هدف، میانگین نخبگان و مقدار تنظیمات فعلی در هر نسل"""
+    generations = [row['generation'] for row in trace]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=generations, y=[row['best'] * 100 for row in trace], mode='lines', name='بهترین'))
+    fig.add_trace(go.Scatter(x=generations, y=[row['elite_mean'] * 100 for row in trace], mode='lines',
+                             name='میانگین نخبگان', line=dict(dash='dot')))
+    fig.add_hline(y=trace[0]['baseline'] * 100, line_dash='dash', line_color='gray',
+                  annotation_text='تنظیمات فعلی')
+
+    fig.update_layout(title='همگرایی جستجوی سیاست', xaxis_title='نسل',
+                      yaxis_title='انحراف از ظرفیت (RMS، درصد)')
+    return fig
+
+
+def create_region_heatmap(years, regions, usage, position):
+    """درصد استفاده از ظرفیت یک سمت در هر منطقه و سال؛ ۱۰۰ یعنی پر بودن همه صندلی‌ها"""
+    fig = go.Figure(go.Heatmap(
+        x=years, y=regions, z=usage, zmid=100, colorscale='RdBu_r', colorbar=dict(title='درصد استفاده'),
+        hovertemplate='سال %{x}<br>%{y}<br>%{z:.0f}٪<extra></extra>'
+    ))
+    fig.update_layout(title=f"استفاده از ظرفیت {position.replace('_', ' ')} در مناطق",
+                      xaxis_title='سال', yaxis_title='منطقه', height=200 + 12 * len(regions))
+    return fig
@@ -0,0 +1,136 @@
+"""اجرای دسته‌ای سناریوها از خط فرمان، بدون Streamlit و Plotly
+
+هر فایل JSON یا YAML می‌تواند یک سناریو، فهرستی از سناریوها یا {"scenarios": [...]}
+باشد. کلیدهای هر سناریو: name, years, annual_hiring, probabilities,
+years_required, capacity, engine, seed, retirement_acceleration (برای engine
+"cohort")، roster (مسیر فهرست کارکنان CSV/Parquet) و as_of (تاریخ مبنای سابقه و
+سن) که همه اختیاری‌اند؛ بقیه از مقادیر پیش‌فرض. engine یکی از simulator.ENGINES
+است و نام ناشناخته خطای همان سناریو گزارش می‌شود. YAML به PyYAML و Parquet به
+pyarrow نیاز دارد (هر دو در requirements.txt).
+
+    python cli.py scenarios/ --output-dir results --format parquet --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from orgchart import read_chart
+
+SCENARIO_SUFFIXES = ('.json', '.yaml', '.yml')
+
+
+def scenario_files(paths):
+    """فایل‌های سناریو از مسیرهای داده‌شده (پوشه‌ها به ترتیب نام پیمایش می‌شوند)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(SCENARIO_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def load_scenarios(paths):
+    """همه سناریوها به صورت (نام، دیکشنری سناریو)"""
+    scenarios = []
+    for path in scenario_files(paths):
+        document = read_chart(path)
+        if isinstance(document, dict) and 'scenarios' in document:
+            document = document['scenarios']
+        items = document if isinstance(document, list) else [document]
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for i, scenario in enumerate(items):
+            default_name = stem if len(items) == 1 else f"{stem}_{i + 1}"
+            scenarios.append((str(scenario.get('name', default_name)), scenario))
+    return scenarios
+
+
+def output_path(output_dir, name, output_format):
+    """مسیر خروجی سناریو؛ نامی که از output_dir بیرون بزند (جداکننده مسیر یا '..') رد می‌شود"""
+    separators = [sep for sep in (os.sep, os.altsep) if sep]
+    if not name or name in ('.', '..') or any(sep in name for sep in separators):
+        raise ValueError(f"نام سناریو نباید جداکننده مسیر داشته باشد: {name!r}")
+    return os.path.join(output_dir, f"{name}.{output_format}")
+
+
+def run_one(name, scenario, output_dir, output_format):
+    """اجرای یک سناریو و نوشتن جدول بلند آن؛ خلاصه اجرا را برمی‌گرداند"""
+    # هسته فقط هنگام اجرا (در همین پردازه یا پردازه کارگر) وارد می‌شود
+    from simulator import SuccessionSimulator
+    import results_table as rt
+
+    path = output_path(output_dir, name, output_format)
+    start = time.perf_counter()
+    table = SuccessionSimulator().run_scenario(scenario)
+    if output_format == 'parquet':
+        with open(path, 'wb') as f:
+            f.write(rt.to_parquet_bytes(table))
+    else:
+        table.to_csv(path, index=False)
+
+    headcount = rt.yearly_total(table, rt.HEADCOUNT)
+    return {
+        'name': name,
+        'path': path,
+        'years': int(headcount.index.max()),
+        'final_headcount': int(headcount.iloc[-1]),
+        'total_retirements': int(rt.yearly_total(table, rt.RETIREMENTS).sum()),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def _attempt(call, *args):
+    """(نتیجه، خطا)؛ خطای یک سناریو (از جمله فایل roster ناموجود) بقیه دسته را متوقف نمی‌کند"""
+    try:
+        return call(*args), None
+    except (ValueError, KeyError, TypeError, ImportError, OSError) as exc:
+        return None, exc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="اجرای دسته‌ای سناریوهای شبیه‌ساز جانشین‌پروری")
+    parser.add_argument('paths', nargs='+', help="فایل‌ها یا پوشه‌های سناریو (JSON/YAML)")
+    parser.add_argument('--output-dir', default='results', help="پوشه خروجی")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet', dest='output_format')
+    parser.add_argument('--workers', type=int, default=1, help="تعداد پردازه‌های موازی")
+    parser.add_argument('--org-chart', help="مسیر نمودار سازمانی (پیش‌فرض: ORG_CHART_PATH یا org_chart.json)")
+    args = parser.parse_args(argv)
+
+    if args.org_chart:
+        # پردازه‌های کارگر متغیر محیطی را به ارث می‌برند
+        os.environ['ORG_CHART_PATH'] = os.path.abspath(args.org_chart)
+
+    scenarios = load_scenarios(args.paths)
+    names = [name for name, _ in scenarios]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        parser.error(f"نام تکراری سناریو: {', '.join(duplicates)}")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = [(name, scenario, args.output_dir, args.output_format) for name, scenario in scenarios]
+    if args.workers <= 1:
+        outcomes = [(job[0], _attempt(run_one, *job)) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [(job[0], pool.submit(run_one, *job)) for job in jobs]
+            outcomes = [(name, _attempt(future.result)) for name, future in futures]
+
+    failed = 0
+    for name, (summary, error) in outcomes:
+        if error is not None:
+            failed += 1
+            print(f"{name}: خطا - {error}", file=sys.stderr)
+            continue
+        print(f"{summary['name']}: {summary['years']} سال، پرسنل نهایی {summary['final_headcount']}، "
+              f"{summary['seconds']} ثانیه -> {summary['path']}")
+
+    print(f"{len(scenarios) - failed} از {len(scenarios)} سناریو اجرا شد")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
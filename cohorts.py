@@ -0,0 +1,187 @@
+"""موتور گروه‌های سنی: بازنشستگی بر اساس سن با جدول‌های نرخ برداری
+
+وضعیت هر سال دو نمای یک جمعیت را کنار هم دارد: ماتریس گره × سابقه موتور برداری
+(برای ارتقا و ظرفیت) و ماتریس گره × سن یک‌ساله از MIN_AGE تا MAX_AGE فهرست
+کارکنان، که در محور آخر به هم چسبیده‌اند؛ پس iter_run و iter_ensemble و نقطه
+بازیابی VectorizedEngine بی‌تغییر کار می‌کنند و جمع هر گره در دو نما برابر است.
+
+بازنشستگی سالانه (جایگزین نرخ ثابت retirement_rate) برای هر سن از جدول
+retirement_stats ساخته می‌شود: سهم تجمعی بازنشستگی تا هر افق (مثلاً '5_years')
+پس از RETIREMENT_START_AGE، با درون‌یابی خطی بین افق‌ها، ضرب در ضریب تسریع
+بازنشستگی. منتقل‌شده‌های هر یال به نسبت سن از مبدأ به مقصد می‌روند. پیر شدن یک
+جابه‌جایی ستونی آرایه سن است و کسی از MAX_AGE بالاتر نمی‌رود.
+
+تقریب: توزیع مشترک سن × سابقه نگه داشته نمی‌شود، فقط دو حاشیه آن. بازنشسته‌ها بر
+اساس سن انتخاب می‌شوند ولی از باسابقه‌ترین ستون‌های سابقه گره کم می‌شوند، انگار
+مسن‌ترها همان باسابقه‌ترها باشند. جمع هر گره در دو نما برابر می‌ماند، ولی حاشیه
+سابقه (و در نتیجه واجد شرایط بودن برای ارتقا) با گذشت سال‌ها از حاشیه سن فاصله
+می‌گیرد؛ کارکنان مسنِ کم‌سابقه باعث برداشتن سابقه از کارکنان جوان‌تر می‌شوند.
+
+این موتور با موتور برداری قابل مقایسه عددی نیست: بازنشستگی فقط از
+RETIREMENT_START_AGE به بعد رخ می‌دهد و نرخ ثابت retirement_rate روی همه کارکنان
+اعمال نمی‌شود. با تنظیمات پیش‌فرض پس از ۲۰ سال حدود ۱۶٬۵۰۰ نفر می‌مانند، در برابر
+حدود ۵٬۴۰۰ نفر در موتور برداری.
+"""
+import numpy as np
+
+from engine import VectorizedEngine, apportion, rank_groups, take_from_top
+from roster import MAX_AGE, MIN_AGE
+
+# سنی که افق‌های retirement_stats از آن شمرده می‌شوند
+RETIREMENT_START_AGE = 50
+
+# سن استخدام‌شدگان جدید (یکنواخت) و سن فرضی کارکنان اولیه بدون فهرست کارکنان:
+# مانند AgentEngine، ۲۴ + سابقه + عددی از ۰ تا ۱۹ و حداکثر ۵۹
+HIRING_AGES = (23, 30)
+INITIAL_AGE = 24
+INITIAL_AGE_SPREAD = 20
+INITIAL_MAX_AGE = 59
+
+AGES = np.arange(MIN_AGE, MAX_AGE + 1)
+
+
+def horizon_years(key):
+    """تعداد سال افق از کلید retirement_stats، مثلاً '10_years' -> 10"""
+    return int(str(key).split('_')[0])
+
+
+def spread(total, weights):
+    """تقسیم عدد صحیح total (...) به نسبت weights صحیح (..., K) با گرد کردن مجموع تجمعی
+
+    هیچ خانه‌ای بیش از وزنش نمی‌گیرد (اگر total از جمع وزن‌ها بیشتر نباشد)؛ بدون مرتب‌سازی
+    apportion و برای جابه‌جایی سن‌ها در هر سال ارزان‌تر است.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    cumulative = np.cumsum(weights, axis=-1)
+    sums = cumulative[..., -1:]
+    share = np.divide(cumulative, sums, out=np.zeros_like(cumulative), where=sums > 0)
+    bounds = np.floor(share * np.asarray(total)[..., None] + 1e-6).astype(np.int64)
+    return np.diff(bounds, axis=-1, prepend=0)
+
+
+def hazard_table(retirement_stats, acceleration=1.0, start_age=RETIREMENT_START_AGE):
+    """احتمال بازنشستگی سالانه هر سن از MIN_AGE تا MAX_AGE
+
+    سهم تجمعی بازنشستگی پیش از start_age صفر است و بین افق‌ها خطی فرض می‌شود؛
+    نرخ هر سن احتمال بازنشستگی در همان سال برای کسی است که تا آن سن مانده است.
+    """
+    horizons = sorted((horizon_years(key), share) for key, share in retirement_stats.items())
+    knots = [0] + [years for years, _ in horizons]
+    shares = [0.0] + [min(max(float(share), 0.0), 1.0) for _, share in horizons]
+
+    offset = AGES - start_age
+    survival = 1 - np.interp(offset, knots, shares)
+    next_survival = 1 - np.interp(offset + 1, knots, shares)
+    hazard = np.divide(survival - next_survival, survival, out=np.ones_like(survival), where=survival > 0)
+    hazard = np.clip(hazard * acceleration, 0.0, 1.0)
+    hazard[-1] = 1.0
+    return hazard
+
+
+class CohortEngine(VectorizedEngine):
+    """موتور برداری با آرایه گره × سن و بازنشستگی بر اساس جدول نرخ سنی"""
+
+    def __init__(self, probabilities, years_required, capacity, annual_hiring, retirement_stats,
+                 retirement_acceleration=1.0, graph=None, profiler=None):
+        super().__init__(probabilities, years_required, capacity, annual_hiring, graph=graph, profiler=profiler)
+        self.hazard = hazard_table(retirement_stats, retirement_acceleration)
+        self.first_retirement_age = int(np.flatnonzero(self.hazard)[0])
+        hiring = (AGES >= HIRING_AGES[0]) & (AGES <= HIRING_AGES[1])
+        self.hire_ages = apportion(annual_hiring, hiring)
+        # همه یال‌ها (ارتقا و خروج) در گروه‌هایی بدون مبدأ تکراری برای جابه‌جایی سن‌ها
+        self.inflow = self.graph.inflow_matrix.astype(np.float64)
+        self.edge_groups = rank_groups(np.arange(len(self.graph.edge_keys)), self.graph.edge_source)
+
+    def initial_ages(self, tenure):
+        """ماتریس گره × سن اولیه: سن واقعی فهرست کارکنان یا توزیع فرضی بر اساس سابقه"""
+        if self.graph.roster is not None:
+            return self.graph.roster.counts.sum(axis=1)
+
+        weights = np.zeros((self.tenure_buckets, len(AGES)))
+        for column in range(self.tenure_buckets):
+            ages = np.minimum(INITIAL_AGE + column + np.arange(INITIAL_AGE_SPREAD), INITIAL_MAX_AGE)
+            np.add.at(weights[column], ages - MIN_AGE, 1)
+        return apportion(tenure, weights).sum(axis=1)
+
+    def initial_state(self):
+        """ماتریس سابقه و ماتریس سن کنار هم: (گره، ستون‌های سابقه + سن‌ها)"""
+        tenure = super().initial_state()
+        return np.concatenate([tenure, self.initial_ages(tenure)], axis=-1)
+
+    def split(self, state):
+        """(ماتریس سابقه، ماتریس سن) از وضعیت"""
+        return state[..., :self.tenure_buckets], state[..., self.tenure_buckets:]
+
+    def position_counts(self, state):
+        return self.split(state)[0].sum(axis=-1) @ self.graph.position_matrix
+
+    def age_profile(self, state):
+        """تعداد هر سمت در هر سن؛ آرایه (..., سمت، سن)"""
+        return np.swapaxes(np.swapaxes(self.split(state)[1], -1, -2) @ self.graph.position_matrix, -1, -2)
+
+    def age_retirements(self, ages, rng=None):
+        """بازنشستگان هر خانه گره × سن (دوجمله‌ای یا قطعی)
+
+        در حالت قطعی تعداد هر گره جزء صحیح مجموع نرخ‌هاست و به نسبت نرخ بین سن‌ها
+        تقسیم می‌شود تا سن‌های کم‌جمعیت با گرد کردن صفر نشوند.
+        """
+        if rng is not None:
+            # فقط سن‌هایی که نرخ غیرصفر دارند نمونه‌گیری می‌شوند
+            retiring = np.zeros_like(ages)
+            at_risk = slice(self.first_retirement_age, None)
+            retiring[..., at_risk] = rng.binomial(ages[..., at_risk], self.hazard[at_risk])
+            return retiring
+        expected = ages * self.hazard
+        return apportion(np.floor(expected.sum(axis=-1) + 1e-9), expected)
+
+    def move_ages(self, ages, moved):
+        """جابه‌جایی سن منتقل‌شده‌های هر یال از مبدأ (به نسبت سن) به مقصد؛ خروج‌ها حذف می‌شوند"""
+        graph = self.graph
+        ages = ages.copy()
+        leaving = np.zeros(moved.shape + ages.shape[-1:])
+        for edges in self.edge_groups:
+            sources = graph.edge_source[edges]
+            rows = ages[..., sources, :]
+            leaving[..., edges, :] = spread(np.minimum(moved[..., edges], rows.sum(axis=-1)), rows)
+            ages[..., sources, :] = rows - leaving[..., edges, :]
+        # ضرب اعشاری (BLAS) و inflow_matrix با ردیف صفر برای یال‌های خروج
+        arrivals = np.swapaxes(leaving, -1, -2) @ self.inflow
+        return ages + np.swapaxes(arrivals, -1, -2).astype(ages.dtype)
+
+    def age_one_year(self, ages):
+        """پیر شدن یک‌ساله با جابه‌جایی ستون‌ها (ستون MAX_AGE پیش از این با نرخ ۱ خالی شده است)"""
+        aged = np.zeros_like(ages)
+        aged[..., 1:] = ages[..., :-1]
+        return aged
+
+    def step(self, year, state, rng=None):
+        """یک سال مانند VectorizedEngine.step با بازنشستگی سنی به جای نرخ ثابت سال"""
+        profiler = self.profiler
+        tenure, ages = self.split(state)
+        with profiler.phase('applicants'):
+            counts = self.applicants(tenure, rng)
+
+        with profiler.phase('retirement'):
+            retiring = self.age_retirements(ages, rng)
+            ages = ages - retiring
+            retired = take_from_top(tenure, retiring.sum(axis=-1), self.all_columns)
+            tenure = tenure - retired
+
+        with profiler.phase('promotions'):
+            moved, tenure = self.transitions(tenure, counts)
+        with profiler.phase('capacity'):
+            moved, tenure = self.adjust_for_capacity(tenure, counts, moved)
+        with profiler.phase('cohorts'):
+            ages = self.move_ages(ages, moved)
+
+        with profiler.phase('hiring'):
+            new_hires = self.annual_hiring
+            tenure[..., self.graph.hiring_node, 0] += new_hires
+            ages[..., self.graph.hiring_node, :] += self.hire_ages
+        with profiler.phase('tenure'):
+            tenure = self.update_tenure(tenure)
+            ages = self.age_one_year(ages)
+
+        total_retirements = retired.sum(axis=(-2, -1)) + moved[..., self.exit_edges].sum(axis=-1)
+        state = np.concatenate([tenure, ages], axis=-1)
+        return state, new_hires, total_retirements, moved[..., self.promotion_edges]
@@ -0,0 +1,196 @@
+"""مقایسه سناریوها با اعداد تصادفی مشترک (CRN) و توقف تطبیقی
+
+همه سناریوها در هر تکرار با یک جریان تصادفی اجرا می‌شوند: CommonRandomStream
+به جای Generator به موتور برداری داده می‌شود و هر قرعه دوجمله‌ای را با وارون تابع
+توزیع روی یک عدد یکنواخت می‌سازد. تعداد اعداد یکنواخت هر سال فقط به شکل آرایه‌ها
+بستگی دارد نه به پارامترها، پس قرعه‌های دو سناریو هم‌گام می‌مانند و نتیجه‌ها
+همبستگی مثبت دارند. واریانس تفاضل جفت‌شده Var(B - A) = Var(A) + Var(B) - 2Cov
+است و با همان دقت تکرار بسیار کمتری از اجراهای مستقل لازم دارد.
+
+تکرارها دسته به دسته اضافه می‌شوند (هر دسته یک فرزند SeedSequence) تا بازه
+اطمینان تفاضل هر معیار از max(tolerance, relative × |تفاضل|) باریک‌تر شود.
+"""
+import numpy as np
+
+from engine import VectorizedEngine
+from orgchart import load_graph
+from sweep import TARGETS, target_counts
+
+# قرعه‌های با واریانس کمتر از این مقدار دقیق وارون می‌شوند و بقیه با تقریب
+# نرمال با تصحیح چولگی (Cornish-Fisher)
+NORMAL_VARIANCE = 25.0
+
+TOTAL = 'کل_پرسنل'
+RETIREMENTS = 'بازنشستگی_تجمعی'
+
+# ضرایب وارون تابع توزیع نرمال (Acklam، خطای نسبی حدود 1e-9)
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01, 1.0)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00, 1.0)
+_TAIL = 0.02425
+
+
+def normal_quantile(u):
+    """وارون تابع توزیع نرمال استاندارد"""
+    u = np.clip(np.asarray(u, dtype=np.float64), 1e-300, 1 - 1e-16)
+    z = np.empty_like(u)
+
+    tail = np.minimum(u, 1 - u)
+    outer = tail < _TAIL
+    q = np.sqrt(-2 * np.log(tail[outer]))
+    value = np.polyval(_C, q) / np.polyval(_D, q)
+    z[outer] = np.where(u[outer] < 0.5, value, -value)
+
+    q = u[~outer] - 0.5
+    r = q * q
+    z[~outer] = np.polyval(_A, r) * q / np.polyval(_B, r)
+    return z
+
+
+def binomial_quantile(n, p, u):
+    """وارون تابع توزیع دوجمله‌ای در u (صعودی در u)
+
+    برای p > 0.5 از تقارن X = n - Bin(n, 1 - p) استفاده می‌شود؛ واریانس کم با جمع
+    تجمعی احتمال‌ها از صفر دقیق است و واریانس زیاد تقریب نرمال با تصحیح چولگی دارد.
+    """
+    n = np.asarray(n, dtype=np.int64)
+    p = np.clip(np.asarray(p, dtype=np.float64), 0, 1)
+    n, p, u = np.broadcast_arrays(n, p, np.asarray(u, dtype=np.float64))
+    flipped = p > 0.5
+    p = np.where(flipped, 1 - p, p)
+    u = np.where(flipped, 1 - u, u)
+
+    mean = n * p
+    variance = mean * (1 - p)
+    result = np.zeros(n.shape, dtype=np.int64)
+
+    normal = variance >= NORMAL_VARIANCE
+    if normal.any():
+        sd = np.sqrt(variance[normal])
+        z = normal_quantile(u[normal])
+        skewed = z + (1 - 2 * p[normal]) / sd * (z * z - 1) / 6
+        result[normal] = np.clip(np.floor(mean[normal] + sd * skewed + 0.5), 0, n[normal])
+
+    exact = np.flatnonzero(~normal & (n > 0) & (p > 0))
+    if exact.size:
+        flat_n, flat_p, flat_u = n.ravel()[exact], p.ravel()[exact], u.ravel()[exact]
+        flat_mean = mean.ravel()[exact]
+        ratio = flat_p / (1 - flat_p)
+        pmf = (1 - flat_p) ** flat_n
+        cdf = pmf.copy()
+        values = np.zeros(exact.size, dtype=np.int64)
+        active = np.flatnonzero(flat_u > cdf)
+        pmf, cdf = pmf[active], cdf[active]
+        k = 0
+        while active.size:
+            pmf = pmf * (flat_n[active] - k) / (k + 1) * ratio[active]
+            cdf = cdf + pmf
+            k += 1
+            # پایان: رسیدن به u، به n یا ته توزیع که گردکردن مانع رسیدن cdf به u است
+            done = (flat_u[active] <= cdf) | (k >= flat_n[active]) | ((pmf < 1e-300) & (k > flat_mean[active]))
+            values[active[done]] = k
+            active, pmf, cdf = active[~done], pmf[~done], cdf[~done]
+        flat = result.ravel()
+        flat[exact] = values
+        result = flat.reshape(n.shape)
+
+    return np.where(flipped, n - result, result)
+
+
+class CommonRandomStream:
+    """جایگزین Generator برای موتور برداری با یک عدد یکنواخت برای هر قرعه دوجمله‌ای"""
+
+    def __init__(self, seed=None):
+        self.generator = np.random.default_rng(seed)
+
+    def binomial(self, n, p):
+        n, p = np.broadcast_arrays(np.asarray(n, dtype=np.int64), np.asarray(p, dtype=np.float64))
+        return binomial_quantile(n, p, self.generator.random(n.shape))
+
+
+def replicate(engine, years, replications, rng, targets=TARGETS):
+    """معیارهای پایان افق هر تکرار: {معیار: آرایه (R,)}"""
+    retirements = np.zeros(replications, dtype=np.int64)
+    for _, positions, retired, _ in engine.iter_ensemble(years, replications, rng=rng):
+        retirements += retired
+
+    metrics = {TOTAL: positions.sum(axis=1)}
+    metrics.update(target_counts(positions, engine.positions, targets))
+    metrics[RETIREMENTS] = retirements
+    return metrics
+
+
+def summarize(samples, names, confidence=0.95, tolerance=5.0, relative=0.1):
+    """تفاضل جفت‌شده هر سناریو با سناریوی اول، بازه اطمینان و ضریب کاهش واریانس"""
+    z = float(normal_quantile(0.5 + confidence / 2))
+    baseline = samples[0]
+    rows = []
+    for name, scenario in zip(names[1:], samples[1:]):
+        for metric, values in scenario.items():
+            base = baseline[metric].astype(np.float64)
+            difference = values - base
+            n = len(difference)
+            half_width = z * difference.std(ddof=1) / np.sqrt(n)
+            mean = float(difference.mean())
+            paired = difference.var(ddof=1)
+            # واریانس تفاضل اگر دو سناریو مستقل اجرا می‌شدند
+            independent = base.var(ddof=1) + values.var(ddof=1)
+            rows.append({
+                'scenario': name,
+                'metric': metric,
+                'baseline_mean': float(base.mean()),
+                'mean': float(values.mean()),
+                'difference': mean,
+                'low': mean - half_width,
+                'high': mean + half_width,
+                'half_width': float(half_width),
+                'resolved': bool(half_width <= max(tolerance, relative * abs(mean))),
+                'variance_reduction': float(independent / paired) if paired > 0 else float('inf')
+            })
+    return rows
+
+
+def iter_comparison(scenarios, years, seed=None, batch=100, min_replications=200, max_replications=20000,
+                    confidence=0.95, tolerance=5.0, relative=0.1, graph=None, common=True, targets=TARGETS):
+    """اجرای دسته به دسته سناریوها تا حل شدن همه تفاضل‌ها؛ پس از هر دسته خلاصه را می‌دهد
+
+    هر سناریو dict با کلیدهای name، probabilities، years_required، capacity و
+    annual_hiring است و سناریوی اول مبنای مقایسه است. common=False هر سناریو را با
+    جریان مستقل اجرا می‌کند (برای سنجش اثر CRN).
+    """
+    graph = graph or load_graph()
+    names = [scenario['name'] for scenario in scenarios]
+    engines = [
+        VectorizedEngine(scenario['probabilities'], scenario['years_required'], scenario['capacity'],
+                         scenario['annual_hiring'], graph=graph)
+        for scenario in scenarios
+    ]
+    root = np.random.SeedSequence(seed)
+    samples = [{} for _ in scenarios]
+    replications = 0
+
+    while replications < max_replications:
+        size = min(batch, max_replications - replications)
+        child = root.spawn(1)[0]
+        seeds = [child] * len(engines) if common else child.spawn(len(engines))
+        for engine, stream_seed, collected in zip(engines, seeds, samples):
+            for metric, values in replicate(engine, years, size, CommonRandomStream(stream_seed), targets).items():
+                collected[metric] = np.concatenate([collected.get(metric, values[:0]), values])
+        replications += size
+
+        rows = summarize(samples, names, confidence, tolerance, relative)
+        resolved = replications >= min_replications and all(row['resolved'] for row in rows)
+        yield {'replications': replications, 'resolved': resolved, 'rows': rows}
+        if resolved:
+            return
+
+
+def compare_scenarios(scenarios, years, **options):
+    """خلاصه نهایی iter_comparison"""
+    for summary in iter_comparison(scenarios, years, **options):
+        pass
+    return summary
@@ -0,0 +1,238 @@
+"""شبیه‌ساز جایگزین (emulator) برای بازخورد فوری اسلایدرها
+
+یک جاروب دسته‌ای SweepEngine (نمونه ابرمکعب لاتین در جعبه‌ای اطراف تنظیمات
+مبنا) خروجی‌های کلیدی را می‌دهد: تعداد نهایی هر سمت، نرخ ارتقا (ارتقا در هر سال
+به ازای صد نفر) و درصد استفاده از ظرفیت سمت‌های محدود. روی آن یک رگرسیون
+چندجمله‌ای درجه دو (ridge) برازش می‌شود که پیش‌بینی‌اش فقط یک ضرب ماتریسی است.
+
+عدم قطعیت از رگرسیون خطی بیزی است: sigma × sqrt(1 + φᵀ(ΦᵀΦ + λI)⁻¹φ) که sigma
+خطای داده‌های اعتبارسنجی است؛ بیرون از جعبه آموزش این مقدار بزرگ می‌شود. این
+بازه تقریبی است و پوشش آن را باید حدود ۹۵٪ دانست، نه بیشتر: بسته به خروجی و نقاط
+آزمون پوشش ±2σ بین حدود ۹۵٪ و ۹۹٪ اندازه‌گیری شده و خطای یک سمت تا حدود ۱۹۰ نفر
+رسیده است.
+
+مبنای جعبه آموزش به شبکه ANCHOR_STEPS گرد می‌شود و کلید کش فقط زمینه (اثر انگشت
+نمودار سازمانی، ظرفیت و افق) و همین جعبه است؛ پس تنظیمات نزدیک به هم شبیه‌ساز
+آموزش‌دیده را دوباره به کار می‌برند و تنظیمات فعلی همیشه درون جعبه می‌ماند.
+"""
+import numpy as np
+
+from cache import scenario_key
+from orgchart import load_graph
+from sweep import ANNUAL_HIRING, YEARS_PREFIX, SweepEngine, latin_hypercube, parameter_names
+
+TOTAL = 'کل_پرسنل'
+PROMOTION_RATE = 'نرخ_ارتقا'
+CAPACITY_PREFIX = 'ظرفیت:'
+
+# جعبه آموزش اطراف مبنا: ± احتمال مطلق، ± سال و ± سهم استخدام سالانه
+PROBABILITY_SPREAD = 0.15
+YEARS_SPREAD = 2
+HIRING_SPREAD = 0.3
+
+# گام شبکه مبنای جعبه آموزش: احتمال و استخدام سالانه (سال‌های لازم صحیح‌اند)
+ANCHOR_STEPS = {'probability': 0.05, 'hiring': 50}
+
+# مرزهای اسلایدرهای داشبورد
+YEARS_RANGE = (1, 10)
+HIRING_RANGE = (100, 1000)
+
+SAMPLES = 3000
+VALIDATION_SHARE = 0.2
+RIDGE_GRID = (1e-3, 1e-2, 1e-1, 1.0, 10.0, 100.0, 1000.0)
+
+
+def training_box(names, anchor):
+    """بازه آموزش هر پارامتر اطراف مقدار مبنا، بریده به مرز اسلایدرها"""
+    ranges = {}
+    for name, value in zip(names, anchor):
+        if name == ANNUAL_HIRING:
+            low, high = value * (1 - HIRING_SPREAD), value * (1 + HIRING_SPREAD)
+            ranges[name] = (max(HIRING_RANGE[0], low), min(HIRING_RANGE[1], high))
+        elif name.startswith(YEARS_PREFIX):
+            ranges[name] = (max(YEARS_RANGE[0], value - YEARS_SPREAD), min(YEARS_RANGE[1], value + YEARS_SPREAD))
+        else:
+            ranges[name] = (max(0.0, value - PROBABILITY_SPREAD), min(1.0, value + PROBABILITY_SPREAD))
+    return ranges
+
+
+def snap_anchor(names, anchor):
+    """گرد کردن مبنا به شبکه ANCHOR_STEPS تا تنظیمات نزدیک به یک جعبه آموزش برسند"""
+    snapped = []
+    for name, value in zip(names, anchor):
+        if name == ANNUAL_HIRING:
+            step = ANCHOR_STEPS['hiring']
+            snapped.append(min(max(round(value / step) * step, HIRING_RANGE[0]), HIRING_RANGE[1]))
+        elif name.startswith(YEARS_PREFIX):
+            snapped.append(round(value))
+        else:
+            step = ANCHOR_STEPS['probability']
+            snapped.append(min(max(round(value / step) * step, 0.0), 1.0))
+    return np.array(snapped, dtype=np.float64)
+
+
+def parameter_vector(names, probabilities, years_required, annual_hiring):
+    """مقادیر پارامترها به ترتیب names"""
+    values = []
+    for name in names:
+        if name == ANNUAL_HIRING:
+            values.append(annual_hiring)
+        elif name.startswith(YEARS_PREFIX):
+            values.append(years_required[name[len(YEARS_PREFIX):]])
+        else:
+            values.append(probabilities[name])
+    return np.array(values, dtype=np.float64)
+
+
+def quadratic_features(z):
+    """[1، z، حاصل‌ضرب‌های دوتایی z_i z_j با i <= j] برای هر ردیف"""
+    z = np.atleast_2d(z)
+    rows, columns = np.triu_indices(z.shape[1])
+    return np.hstack([np.ones((len(z), 1)), z, z[:, rows] * z[:, columns]])
+
+
+def sweep_outputs(engine, years):
+    """خروجی‌های کلیدی همه نقاط یک SweepEngine؛ (نام خروجی‌ها، آرایه (B, O))"""
+    tenure = np.tile(engine.initial_state(), (engine.points, 1, 1))
+    promotions = np.zeros(engine.points)
+    person_years = np.zeros(engine.points)
+    for year in range(1, years + 1):
+        tenure, _, _, promoted = engine.step(year, tenure)
+        promotions += promoted.sum(axis=-1)
+        person_years += tenure.sum(axis=(-2, -1))
+
+    positions = engine.position_counts(tenure)
+    capped = np.flatnonzero(np.isfinite(engine.position_limits))
+    names = list(engine.positions) + [TOTAL, PROMOTION_RATE] + [CAPACITY_PREFIX + engine.positions[i] for i in capped]
+    outputs = np.column_stack([
+        positions,
+        positions.sum(axis=1),
+        promotions / np.maximum(person_years, 1) * 100,
+        positions[:, capped] / engine.position_limits[capped] * 100
+    ])
+    return names, outputs
+
+
+def simulate_outputs(probabilities, years_required, capacity, annual_hiring, years, graph=None):
+    """خروجی‌های کلیدی یک اجرای کامل قطعی با همان تعریف‌ها (برای تأیید پیش‌بینی)"""
+    engine = SweepEngine([ANNUAL_HIRING], [[annual_hiring]], probabilities, years_required, capacity, annual_hiring,
+                         graph=graph)
+    names, outputs = sweep_outputs(engine, years)
+    return dict(zip(names, outputs[0].tolist()))
+
+
+class Emulator:
+    """رگرسیون درجه دو روی پارامترهای نرمال‌شده به بازه [-1, 1] جعبه آموزش"""
+
+    def __init__(self, names, center, half_width, outputs, weights, output_mean, output_scale, covariance,
+                 sigma, validation, context):
+        self.names = names
+        self.center = center
+        self.half_width = half_width
+        self.outputs = outputs
+        self.weights = weights
+        self.output_mean = output_mean
+        self.output_scale = output_scale
+        self.covariance = covariance  # (ΦᵀΦ + λI)⁻¹ برای واریانس پیش‌بینی
+        self.sigma = sigma
+        self.validation = validation
+        self.context = context
+
+    def normalize(self, values):
+        return (np.asarray(values, dtype=np.float64) - self.center) / self.half_width
+
+    def predict_vector(self, values):
+        """(میانگین، انحراف معیار، بیشترین فاصله نرمال‌شده از مرکز) برای یک یا چند نقطه"""
+        z = np.atleast_2d(self.normalize(values))
+        features = quadratic_features(z)
+        mean = features @ self.weights * self.output_scale + self.output_mean
+        leverage = np.einsum('ij,jk,ik->i', features, self.covariance, features)
+        std = self.sigma * np.sqrt(1 + leverage)[:, None]
+        return mean, std, np.abs(z).max(axis=1)
+
+    def predict(self, probabilities, years_required, annual_hiring):
+        """پیش‌بینی یک تنظیم؛ {'mean': dict، 'std': dict، 'extrapolation': bool}"""
+        mean, std, reach = self.predict_vector(
+            parameter_vector(self.names, probabilities, years_required, annual_hiring)
+        )
+        return {
+            'mean': dict(zip(self.outputs, mean[0].tolist())),
+            'std': dict(zip(self.outputs, std[0].tolist())),
+            'extrapolation': bool(reach[0] > 1 + 1e-9)
+        }
+
+
+def emulator_context(graph, capacity, years):
+    """شرایطی که شبیه‌ساز فقط برای آن‌ها معتبر است"""
+    return scenario_key(org_chart=graph.fingerprint(), capacity=capacity, years=years)
+
+
+def emulator_box(probabilities, years_required, annual_hiring, graph):
+    """(نام پارامترها، جعبه آموزش) اطراف مبنای گردشده تنظیمات داده‌شده"""
+    names = parameter_names(probabilities, years_required, None, graph)
+    anchor = snap_anchor(names, parameter_vector(names, probabilities, years_required, annual_hiring))
+    return names, training_box(names, anchor)
+
+
+def train_emulator(probabilities, years_required, capacity, annual_hiring, years, graph=None,
+                   samples=SAMPLES, seed=0, profiler=None):
+    """جاروب ابرمکعب لاتین اطراف تنظیمات داده‌شده و برازش رگرسیون
+
+    سهم VALIDATION_SHARE نقاط برای انتخاب λ و برآورد sigma کنار گذاشته و سپس
+    مدل روی همه نقاط دوباره برازش می‌شود.
+    """
+    graph = graph or load_graph()
+    names, ranges = emulator_box(probabilities, years_required, annual_hiring, graph)
+    names, values = latin_hypercube(ranges, samples, seed)
+
+    engine = SweepEngine(names, values, probabilities, years_required, capacity, annual_hiring,
+                         graph=graph, profiler=profiler)
+    outputs, targets = sweep_outputs(engine, years)
+
+    low, high = np.array(list(ranges.values())).T
+    center, half_width = (low + high) / 2, np.maximum((high - low) / 2, 1e-9)
+    features = quadratic_features((values - center) / half_width)
+    output_mean = targets.mean(axis=0)
+    output_scale = np.where(targets.std(axis=0) > 0, targets.std(axis=0), 1.0)
+    scaled = (targets - output_mean) / output_scale
+
+    # انتخاب λ روی داده اعتبارسنجی با یک تجزیه ویژه
+    split = int(samples * (1 - VALIDATION_SHARE))
+    train, check = slice(0, split), slice(split, None)
+    eigenvalues, vectors = np.linalg.eigh(features[train].T @ features[train])
+    projected = vectors.T @ (features[train].T @ scaled[train])
+    errors = []
+    for ridge in RIDGE_GRID:
+        weights = vectors @ (projected / (eigenvalues + ridge)[:, None])
+        errors.append(np.mean((features[check] @ weights - scaled[check]) ** 2))
+    ridge = RIDGE_GRID[int(np.argmin(errors))]
+    weights = vectors @ (projected / (eigenvalues + ridge)[:, None])
+    residual = (features[check] @ weights - scaled[check]) * output_scale
+    sigma = np.sqrt(np.mean(residual ** 2, axis=0))
+    spread = targets[check].std(axis=0)
+    r2 = np.where(spread > 0, 1 - sigma ** 2 / np.maximum(spread, 1e-12) ** 2, 1.0)
+    validation = {'ridge': ridge, 'rmse': dict(zip(outputs, sigma.tolist())), 'r2': dict(zip(outputs, r2.tolist()))}
+
+    # مدل نهایی روی همه نقاط
+    gram = features.T @ features + ridge * np.eye(features.shape[1])
+    covariance = np.linalg.inv(gram)
+    weights = covariance @ (features.T @ scaled)
+    # float32 برای واریانس کافی است و حجم کش را نصف می‌کند
+    covariance = covariance.astype(np.float32)
+    return Emulator(names, center, half_width, outputs, weights, output_mean, output_scale, covariance,
+                    sigma, validation, emulator_context(graph, capacity, years))
+
+
+def cached_emulator(cache, probabilities, years_required, capacity, annual_hiring, years, graph=None,
+                    samples=SAMPLES, seed=0):
+    """شبیه‌ساز از کش (حافظه یا دیسک) یا آموزش و ذخیره آن؛ کلید فقط زمینه و جعبه آموزش است"""
+    graph = graph or load_graph()
+    names, ranges = emulator_box(probabilities, years_required, annual_hiring, graph)
+    key = scenario_key(emulator=emulator_context(graph, capacity, years), box=[[name, *ranges[name]] for name in names],
+                       samples=samples, seed=seed)
+    emulator = cache.get(key)
+    if emulator is None:
+        emulator = train_emulator(probabilities, years_required, capacity, annual_hiring, years, graph,
+                                  samples, seed)
+        cache.put(key, emulator)
+    return emulator
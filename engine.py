@@ -0,0 +1,306 @@
+"""موتور برداری شبیه‌سازی جانشین‌پروری
+
+وضعیت نیروی انسانی یک ماتریس «گره × سابقه» در NumPy است که گره‌ها و یال‌های
+آن از گراف کامپایل‌شده سازمانی (orgchart.OrgGraph) می‌آیند. استخدام،
+بازنشستگی و همه انتقال‌ها در هر سال با عملیات ماتریسی دسته‌ای اعمال می‌شوند
+و افراد منتقل‌شده با سابقه صفر وارد گره مقصد می‌شوند.
+"""
+import copy
+
+import numpy as np
+
+from capacity import node_capacity, position_capacity, capacity_usage
+from orgchart import load_graph
+from profiling import NULL_PROFILER
+
+# ستون‌های سابقه: 0 تا 9 سال و ستون آخر برای 10 سال و بیشتر
+TENURE_BUCKETS = 11
+
+# ضریب تعدیل تعداد ارتقا
+PROMOTION_SCALE = 0.1
+
+# بازنشستگی تدریجی: هر سال 3 درصد بیشتر تا سقف 12 درصد
+RETIREMENT_RATE_STEP = 0.03
+RETIREMENT_RATE_CAP = 0.12
+
+
+def retirement_rate(year):
+    """نرخ بازنشستگی سال year"""
+    return min(year * RETIREMENT_RATE_STEP, RETIREMENT_RATE_CAP)
+
+
+def take_from_top(rows, amount, min_column):
+    """برداشتن amount نفر از ستون‌های سابقه >= min_column، از باسابقه‌ترین شروع"""
+    columns = np.arange(rows.shape[-1])
+    available = np.where(columns >= min_column[..., None], rows, 0)
+    # مجموع ستون‌های سمت راست هر ستون (باسابقه‌تر)
+    above = np.cumsum(available[..., ::-1], axis=-1)[..., ::-1] - available
+    return np.clip(amount[..., None] - above, 0, available)
+
+
+def apportion(total, weights):
+    """تقسیم عدد صحیح total (...) به نسبت weights (..., K) با روش بزرگ‌ترین باقیمانده"""
+    weights = np.asarray(weights, dtype=np.float64)
+    total = np.asarray(total, dtype=np.int64)
+    sums = weights.sum(axis=-1, keepdims=True)
+    quota = total[..., None] * np.divide(weights, sums, out=np.zeros_like(weights), where=sums > 0)
+    base = np.floor(quota).astype(np.int64)
+    remainder = total - base.sum(axis=-1)
+    order = np.argsort(base - quota, axis=-1, kind='stable')
+    rank = np.argsort(order, axis=-1, kind='stable')
+    return base + (rank < remainder[..., None])
+
+
+def rank_groups(edges, sources):
+    """گروه‌بندی یال‌ها طوری که در هر گروه مبدأ تکراری نباشد"""
+    groups, seen = [], {}
+    for edge, source in zip(edges, sources):
+        rank = seen.get(source, 0)
+        seen[source] = rank + 1
+        if rank == len(groups):
+            groups.append([])
+        groups[rank].append(edge)
+    return [np.array(group, dtype=np.int64) for group in groups]
+
+
+class VectorizedEngine:
+    """موتور آرایه‌ای: وضعیت هر سال یک ماتریس گره × سابقه است"""
+
+    def __init__(self, probabilities, years_required, capacity, annual_hiring,
+                 graph=None, tenure_buckets=TENURE_BUCKETS, enforce_capacity=True, profiler=None):
+        self.graph = (graph or load_graph()).with_parameters(probabilities, years_required)
+        self.profiler = profiler or NULL_PROFILER
+        self.positions = self.graph.positions
+        self.tenure_buckets = tenure_buckets
+        self.annual_hiring = annual_hiring
+
+        graph = self.graph
+        self.transition_keys = [key for key, is_exit in zip(graph.edge_keys, graph.edge_is_exit) if not is_exit]
+        self.promotion_edges = np.flatnonzero(~graph.edge_is_exit)
+        self.exit_edges = np.flatnonzero(graph.edge_is_exit)
+        self.edge_rate = graph.edge_prob * PROMOTION_SCALE
+        self.edge_column = np.minimum(graph.edge_min_years, tenure_buckets - 1)
+        self.all_columns = np.zeros(len(graph.node_names), dtype=np.int64)
+
+        # ظرفیت گره‌ها؛ ورود به گره‌های محدود فقط از طریق تخصیص صندلی خالی است
+        self.node_limits = node_capacity(graph, capacity)
+        self.position_limits = position_capacity(graph, self.node_limits)
+        capped = np.isfinite(self.node_limits) if enforce_capacity else np.zeros(len(graph.node_names), bool)
+        free = graph.edge_is_exit | ~capped[np.maximum(graph.edge_target, 0)]
+
+        # یال‌های آزاد در گروه‌هایی بدون مبدأ تکراری با هم پردازش می‌شوند
+        free_edges = np.flatnonzero(free)
+        self.rank_groups = rank_groups(free_edges, graph.edge_source[free_edges])
+
+        # برنامه زنجیره صندلی خالی: گره‌های محدود از ارشدترین و یال‌های ورودی هر کدام
+        self.capacity_plan = [
+            (target, np.flatnonzero(~free & (graph.edge_target == target)), int(self.node_limits[target]))
+            for target in graph.seniority_order() if capped[target]
+        ]
+
+    def initial_state(self):
+        """ماتریس سابقه اولیه: سابقه واقعی فهرست کارکنان یا توزیع یکنواخت بین ستون‌ها"""
+        if self.graph.roster is not None:
+            return self.graph.roster.tenure_matrix(self.tenure_buckets)
+
+        initial = self.graph.node_initial
+        tenure = np.repeat(initial[:, None] // self.tenure_buckets, self.tenure_buckets, axis=1)
+        remainder = initial % self.tenure_buckets
+        tenure += np.arange(self.tenure_buckets) < remainder[:, None]
+        return tenure
+
+    def position_counts(self, tenure):
+        """تعداد افراد هر سمت از روی ماتریس سابقه"""
+        return tenure.sum(axis=-1) @ self.graph.position_matrix
+
+    def applicants(self, tenure, rng=None):
+        """متقاضیان هر یال از واجدین شرایط ابتدای سال (قطعی یا دوجمله‌ای)"""
+        suffix = np.cumsum(tenure[..., ::-1], axis=-1)[..., ::-1]
+        eligible = suffix[..., self.graph.edge_source, self.edge_column]
+
+        if rng is not None:
+            return rng.binomial(eligible, self.edge_rate)
+        return (eligible * self.edge_rate).astype(np.int64)
+
+    def transitions(self, tenure, counts):
+        """اعمال انتقال‌های بدون محدودیت ظرفیت؛ تعداد منتقل‌شده هر یال و ماتریس جدید
+
+        افراد از باسابقه‌ترین ستون‌های گره مبدأ برداشته می‌شوند.
+        """
+        graph = self.graph
+        tenure = tenure.copy()
+        moved = np.zeros_like(counts)
+        for edges in self.rank_groups:
+            sources = graph.edge_source[edges]
+            rows = tenure[..., sources, :]
+            taken = take_from_top(rows, counts[..., edges], self.edge_column[..., edges])
+            tenure[..., sources, :] = rows - taken
+            moved[..., edges] = taken.sum(axis=-1)
+
+        # ورود به گره مقصد با سابقه صفر
+        tenure[..., 0] += moved @ graph.inflow_matrix
+        return moved, tenure
+
+    def adjust_for_capacity(self, tenure, counts, moved):
+        """تخصیص زنجیره‌ای صندلی‌های خالی از بالا به پایین
+
+        برای هر گره محدود (از ارشدترین)، صندلی‌های خالی از بین متقاضیان همه
+        یال‌های ورودی به ترتیب سابقه پر می‌شوند؛ جای خالی ایجادشده در مبدأ
+        در همان سال برای گره‌های پایین‌تر قابل تخصیص است.
+        """
+        graph = self.graph
+        for target, edges, limit in self.capacity_plan:
+            open_seats = np.maximum(0, limit - tenure[..., target, :].sum(axis=-1))
+            if len(edges) == 0:
+                continue
+
+            sources = graph.edge_source[edges]
+            pool = take_from_top(tenure[..., sources, :], counts[..., edges], self.edge_column[..., edges])
+
+            # رتبه‌بندی سراسری: ستون‌های سابقه از بالا، و در هر ستون به ترتیب یال‌ها
+            ordered = np.swapaxes(pool[..., ::-1], -1, -2)
+            flat = ordered.reshape(ordered.shape[:-2] + (-1,))
+            before = np.cumsum(flat, axis=-1) - flat
+            taken = np.clip(open_seats[..., None] - before, 0, flat).reshape(ordered.shape)
+            taken = np.swapaxes(taken, -1, -2)[..., ::-1]
+
+            for i, source in enumerate(sources):
+                tenure[..., source, :] -= taken[..., i, :]
+            tenure[..., target, 0] += taken.sum(axis=(-2, -1))
+            moved[..., edges] = taken.sum(axis=-1)
+
+        return moved, tenure
+
+    def retirements(self, year, tenure, rng=None):
+        """بازنشستگی تدریجی؛ تعداد بازنشسته در هر خانه گره × سابقه
+
+        تعداد هر گره (قطعی یا دوجمله‌ای) از باسابقه‌ترین افراد برداشته می‌شود.
+        """
+        rate = retirement_rate(year)
+        node_totals = tenure.sum(axis=-1)
+
+        if rng is not None:
+            # هر نفر مستقل از بقیه با نرخ سال بازنشسته می‌شود
+            retiring = rng.binomial(node_totals, rate)
+        else:
+            retiring = (node_totals * rate).astype(np.int64)
+
+        return take_from_top(tenure, retiring, self.all_columns)
+
+    def update_tenure(self, tenure):
+        """افزایش یک‌ساله سابقه؛ ستون آخر انباشته می‌شود"""
+        new_tenure = np.zeros_like(tenure)
+        new_tenure[..., 1:] = tenure[..., :-1]
+        new_tenure[..., -1] += tenure[..., -1]
+        return new_tenure
+
+    def capacity_usage(self, positions):
+        """درصد استفاده از ظرفیت سمت‌های دارای ظرفیت محدود"""
+        usage = capacity_usage(positions, self.position_limits)
+        return {position: value for position, value, limit
+                in zip(self.positions, usage.tolist(), self.position_limits) if np.isfinite(limit)}
+
+    def step(self, year, tenure, rng=None):
+        """یک سال شبیه‌سازی؛ وضعیت جدید و رویدادهای سال را برمی‌گرداند
+
+        با rng، همه آرایه‌ها یک محور اول اضافه برای تکرارهای مونت‌کارلو دارند.
+        """
+        profiler = self.profiler
+        with profiler.phase('applicants'):
+            counts = self.applicants(tenure, rng)
+
+        with profiler.phase('retirement'):
+            retired = self.retirements(year, tenure, rng)
+            tenure = tenure - retired
+
+        with profiler.phase('promotions'):
+            moved, tenure = self.transitions(tenure, counts)
+        with profiler.phase('capacity'):
+            moved, tenure = self.adjust_for_capacity(tenure, counts, moved)
+
+        with profiler.phase('hiring'):
+            new_hires = self.annual_hiring
+            tenure[..., self.graph.hiring_node, 0] += new_hires
+        with profiler.phase('tenure'):
+            tenure = self.update_tenure(tenure)
+
+        total_retirements = retired.sum(axis=(-2, -1)) + moved[..., self.exit_edges].sum(axis=-1)
+        return tenure, new_hires, total_retirements, moved[..., self.promotion_edges]
+
+    def iter_run(self, years, start=None, checkpoint=None):
+        """اجرای سال به سال؛ هر سال بلافاصله پس از محاسبه (سال، نتایج سال) را می‌دهد
+
+        start نقطه بازیابی یک اجرای قبلی است و اجرا از سال بعد از آن ادامه می‌یابد؛
+        دیکشنری checkpoint پس از هر سال با وضعیت همان سال به‌روز می‌شود.
+        """
+        first, tenure = (start['year'], start['state']) if start else (0, self.initial_state())
+
+        for year in range(first + 1, years + 1):
+            tenure, new_hires, retirements, promotions = self.step(year, tenure)
+            if checkpoint is not None:
+                checkpoint.update(year=year, state=tenure, rng=None)
+            positions = self.position_counts(tenure)
+            yield year, {
+                'استخدام_جدید': new_hires,
+                'بازنشستگی': int(retirements),
+                'ارتقاءها': dict(zip(self.transition_keys, promotions.tolist())),
+                'وضعیت_مناصب': dict(zip(self.positions, positions.tolist())),
+                'ظرفیت_استفاده': self.capacity_usage(positions)
+            }
+
+    def run(self, years):
+        """اجرای کامل و تبدیل خروجی به قالب دیکشنری simulate_career_progression"""
+        return dict(self.iter_run(years))
+
+    def iter_ensemble(self, years, replications, seed=None, start=None, checkpoint=None, rng=None):
+        """اجرای سال به سال تکرارها؛ فقط آرایه‌های همان سال نگه داشته می‌شوند
+
+        هر سال (سال، تعداد سمت‌ها (R, P)، بازنشستگی (R,)، ارتقاها (R, E)) را می‌دهد.
+        start و checkpoint مانند iter_run هستند و وضعیت مولد تصادفی را هم دارند.
+        rng هر شیء با متد binomial است (پیش‌فرض default_rng(seed))؛ مثلاً
+        comparison.CommonRandomStream برای اعداد تصادفی مشترک بین سناریوها.
+        """
+        if start:
+            first, tenure, rng = start['year'], start['state'], copy.deepcopy(start['rng'])
+        else:
+            first, tenure = 0, np.tile(self.initial_state(), (replications, 1, 1))
+            rng = rng if rng is not None else np.random.default_rng(seed)
+
+        for year in range(first + 1, years + 1):
+            tenure, _, retired, promoted = self.step(year, tenure, rng)
+            if checkpoint is not None:
+                checkpoint.update(year=year, state=tenure, rng=rng)
+            yield year, self.position_counts(tenure), retired, promoted
+
+    def run_ensemble(self, years, replications, seed=None):
+        """اجرای همزمان چند تکرار تصادفی در امتداد محور اول آرایه‌ها"""
+        trajectory = np.empty((replications, years, len(self.positions)), dtype=np.int64)
+        retirements = np.empty((replications, years), dtype=np.int64)
+        promotions = np.empty((replications, years, len(self.transition_keys)), dtype=np.int64)
+
+        for year, positions, retired, promoted in self.iter_ensemble(years, replications, seed):
+            trajectory[:, year - 1] = positions
+            retirements[:, year - 1] = retired
+            promotions[:, year - 1] = promoted
+
+        return {
+            'years': np.arange(1, years + 1),
+            'positions': self.positions,
+            'transitions': self.transition_keys,
+            'وضعیت_مناصب': trajectory,
+            'بازنشستگی': retirements,
+            'ارتقاءها': promotions
+        }
+
+
+def ensemble_bands(ensemble, percentiles=(5, 50, 95)):
+    """صدک‌های کل پرسنل و هر سمت در هر سال"""
+    trajectory = ensemble['وضعیت_مناصب']
+    total = np.percentile(trajectory.sum(axis=-1), percentiles, axis=0)
+    by_position = np.percentile(trajectory, percentiles, axis=0)
+
+    return {
+        'percentiles': percentiles,
+        'کل_پرسنل': total,
+        'مناصب': {position: by_position[:, :, i] for i, position in enumerate(ensemble['positions'])}
+    }
@@ -0,0 +1,167 @@
+"""اجرای پس‌زمینه شبیه‌سازی‌ها با صف مشترک، گزارش پیشرفت و لغو
+
+همه نشست‌ها یک JobQueue با تعداد محدود رشته کارگر دارند؛ اجرای سنگین دیگر در
+رشته اسکریپت Streamlit انجام نمی‌شود و با هجوم همزمان کاربران فقط همان تعداد
+کارگر مشغول می‌شوند و بقیه کارها در صف می‌مانند. کار با کلید سناریو ثبت می‌شود و
+ارسال دوباره همان کلید تا وقتی کار در صف یا در حال اجراست همان کار را برمی‌گرداند.
+
+تابع کار اولین آرگومانش Job است: با job.report پیشرفت و نتیجه جزئی را گزارش
+می‌دهد و همان‌جا در صورت لغو، JobCancelled بالا می‌رود. هر نشست با cancel فقط
+اشتراک خودش را برمی‌دارد؛ کار وقتی واقعاً لغو می‌شود که مشترک دیگری نداشته باشد.
+
+کارها می‌توانند پردازه‌های موازی بسازند (مونت‌کارلوی چندپردازه‌ای، شبیه‌سازی مناطق).
+fork از درون این رشته‌ها در پردازه چندرشته‌ای سرور ممکن است به بن‌بست برسد؛ به همین
+دلیل همه استخرها با parallel.process_pool و روش forkserver/spawn ساخته می‌شوند، نه fork.
+مونت‌کارلو با یک پردازه همچنان درون همین رشته کارگر اجرا می‌شود.
+"""
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# تعداد کارهای پایان‌یافته که برای نمایش وضعیت نگه داشته می‌شوند
+MAX_FINISHED = 32
+
+
+class JobCancelled(Exception):
+    """کار لغو شده است (از job.report در رشته کارگر بالا می‌رود)"""
+
+
+class Job:
+    """یک اجرای پس‌زمینه و وضعیت قابل خواندن آن از هر رشته"""
+
+    def __init__(self, key, label=''):
+        self.key = key
+        self.label = label
+        self.state = QUEUED
+        self.progress = 0.0
+        self.text = ''
+        self.partial = None  # نتیجه‌های جزئی گزارش‌شده تا کنون (dict)
+        self.result = None
+        self.error = None
+        self.subscribers = 1
+        self.submitted = time.time()
+        self.started = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.state in FINISHED
+
+    def report(self, fraction, text='', **partial):
+        """ثبت پیشرفت (۰ تا ۱) و در صورت وجود، نتیجه جزئی؛ نقطه لغو کار هم هست"""
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        self.text = text
+        if partial:
+            # جایگزینی کامل dict تا خواننده‌های رشته‌های دیگر هیچ‌وقت نیمه‌به‌روز آن را نبینند
+            self.partial = {**(self.partial or {}), **partial}
+
+    def wait(self, timeout=None):
+        """انتظار تا پایان کار؛ True اگر کار تمام شده باشد"""
+        return self._done.wait(timeout)
+
+
+class JobQueue:
+    """صف کارها با استخر مشترک و محدود رشته‌های کارگر و حذف کارهای تکراری"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 1) - 1))
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='simulation-job')
+        self.jobs = {}
+        self.deduplicated = 0
+        self.lock = threading.Lock()
+        self._unique = itertools.count()
+
+    def submit(self, key, function, *args, label='', **kwargs):
+        """ثبت کار function(job, *args, **kwargs)؛ key=None یعنی کار اختصاصی بدون اشتراک"""
+        with self.lock:
+            job = self.jobs.get(key) if key is not None else None
+            if job is not None and not job.finished:
+                job.subscribers += 1
+                self.deduplicated += 1
+                return job
+
+            key = key if key is not None else f"private-{next(self._unique)}"
+            job = Job(key, label)
+            self.jobs[key] = job
+            self._prune()
+        self.pool.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def cancel(self, job):
+        """برداشتن اشتراک یک نشست؛ کار بی‌مشترک (در صف یا در حال اجرا) لغو می‌شود"""
+        with self.lock:
+            if job.finished:
+                return
+            job.subscribers -= 1
+            if job.subscribers <= 0:
+                job._cancel.set()
+
+    def position(self, job):
+        """تعداد کارهای در صف که پیش از job ثبت شده‌اند"""
+        with self.lock:
+            return sum(1 for other in self.jobs.values()
+                       if other.state == QUEUED and other.submitted < job.submitted)
+
+    def stats(self):
+        """تعداد کارهای هر وضعیت، تعداد کارگرها و ارسال‌های تکراری ادغام‌شده"""
+        with self.lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED}
+            for job in self.jobs.values():
+                counts[job.state] += 1
+            return {'workers': self.workers, 'deduplicated': self.deduplicated, **counts}
+
+    def shutdown(self):
+        """لغو همه کارهای ناتمام و توقف کارگرها"""
+        with self.lock:
+            for job in self.jobs.values():
+                job._cancel.set()
+        self.pool.shutdown(wait=True)
+
+    def _run(self, job, function, args, kwargs):
+        if job.cancelled:
+            self._finish(job, CANCELLED)
+            return
+
+        job.state = RUNNING
+        job.started = time.time()
+        try:
+            job.result = function(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as exc:  # خطا به نشست‌های مشترک نمایش داده می‌شود
+            job.error = exc
+            self._finish(job, FAILED)
+        else:
+            job.progress = 1.0
+            self._finish(job, DONE)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished_at = time.time()
+        job._done.set()
+
+    def _prune(self):
+        finished = [key for key, job in self.jobs.items() if job.finished]
+        for key in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self.jobs[key]
@@ -0,0 +1,137 @@
+"""حل تحلیلی زنجیره مارکوف جابه‌جایی نیروی انسانی
+
+وقتی احتمالات ثابت‌اند، هر گره نمودار سازمانی یک وضعیت زنجیره است: ماتریس
+یک‌ساله P از یال‌های اسلایدرها (با همان ضریب PROMOTION_SCALE موتور)، خروج با
+یال‌های بازنشستگی و نرخ بلندمدت بازنشستگی، و ورود ثابت استخدام سالانه به گره
+استخدام ساخته می‌شود. توزیع پایا از x = xP + h و زمان‌ها و دفعات مورد انتظار
+از ماتریس بنیادی N = (I - Q)^-1 زنجیره جذب‌کننده با یک حل خطی به دست می‌آیند.
+
+محدودیت ظرفیت (غیرخطی) در مدل نیست و شرط حداقل سابقه با سهم پایای واجدین
+شرایط (احتمال ماندن به توان سال‌های لازم) تقریب زده می‌شود؛ cross_check
+فاصله تا میانگین مونت‌کارلوی موتور تکراری را نشان می‌دهد.
+"""
+import numpy as np
+
+from engine import PROMOTION_SCALE, RETIREMENT_RATE_CAP, VectorizedEngine
+from orgchart import load_graph
+
+# تکرار نقطه ثابت سهم واجدین شرایط
+ELIGIBILITY_ITERATIONS = 100
+ELIGIBILITY_TOLERANCE = 1e-12
+
+
+class MarkovChain:
+    """زنجیره یک‌ساله گره‌ها با ورود استخدام و خروج بازنشستگی"""
+
+    def __init__(self, probabilities, years_required, annual_hiring, graph=None,
+                 retirement_rate=RETIREMENT_RATE_CAP, tenure_aware=True):
+        self.graph = (graph or load_graph()).with_parameters(probabilities, years_required)
+        self.probabilities = probabilities
+        self.years_required = years_required
+        self.annual_hiring = annual_hiring
+        self.retirement_rate = retirement_rate
+
+        graph = self.graph
+        self.size = len(graph.node_names)
+        self.edge_rate = graph.edge_prob * PROMOTION_SCALE
+        self.entering = np.flatnonzero(~graph.edge_is_exit)
+
+        # سهم واجدین شرایط هر یال: در حالت پایا سابقه هر گره هندسی با احتمال ماندن است
+        self.eligibility = np.ones(len(self.edge_rate))
+        self.matrix = self._build()
+        if tenure_aware:
+            for _ in range(ELIGIBILITY_ITERATIONS):
+                stay = np.diag(self.matrix)[graph.edge_source]
+                eligibility = np.clip(stay, 0, 1) ** graph.edge_min_years
+                converged = np.max(np.abs(eligibility - self.eligibility)) < ELIGIBILITY_TOLERANCE
+                self.eligibility = eligibility
+                self.matrix = self._build()
+                if converged:
+                    break
+
+        self.exit_rate = 1 - self.matrix.sum(axis=1)
+        self.inflow = np.zeros(self.size)
+        self.inflow[graph.hiring_node] = annual_hiring
+
+    def _build(self):
+        """ماتریس یک‌ساله P؛ مجموع هر ردیف یک منهای احتمال خروج از سازمان است"""
+        graph = self.graph
+        rate = self.edge_rate * self.eligibility
+        leaving = np.bincount(graph.edge_source, weights=rate, minlength=self.size)
+
+        matrix = np.zeros((self.size, self.size))
+        np.add.at(matrix, (graph.edge_source[self.entering], graph.edge_target[self.entering]),
+                  rate[self.entering])
+        matrix[np.arange(self.size), np.arange(self.size)] += np.maximum(0, 1 - self.retirement_rate - leaving)
+        return matrix
+
+    def steady_state(self):
+        """تعداد پایای هر گره: جواب x(I - P) = h"""
+        return np.linalg.solve((np.eye(self.size) - self.matrix).T, self.inflow)
+
+    def steady_state_positions(self):
+        """تعداد پایای هر سمت"""
+        return dict(zip(self.graph.positions, (self.steady_state() @ self.graph.position_matrix).tolist()))
+
+    def fundamental(self):
+        """ماتریس بنیادی N = (I - P)^-1؛ N[i, j] سال‌های مورد انتظار در j با شروع از i"""
+        return np.linalg.inv(np.eye(self.size) - self.matrix)
+
+    def expected_visits(self, start=None):
+        """سال‌های مورد انتظار حضور در هر گره برای یک نفر که در start شروع می‌کند"""
+        start = self.graph.hiring_node if start is None else self.graph.node_index[start]
+        basis = np.zeros(self.size)
+        basis[start] = 1
+        return np.linalg.solve((np.eye(self.size) - self.matrix).T, basis)
+
+    def visits_by_grade(self, start=None):
+        """سال‌های مورد انتظار در هر درجه (گره‌های بدون درجه شمرده نمی‌شوند)"""
+        visits = self.expected_visits(start)
+        graded = self.graph.node_grade >= 0
+        totals = np.bincount(self.graph.node_grade[graded], weights=visits[graded],
+                             minlength=len(self.graph.grades))
+        return dict(zip(self.graph.grades, totals.tolist()))
+
+    def visits_by_position(self, start=None):
+        """سال‌های مورد انتظار در هر سمت"""
+        visits = self.expected_visits(start) @ self.graph.position_matrix
+        return dict(zip(self.graph.positions, visits.tolist()))
+
+    def time_to_reach(self, target, start=None):
+        """(احتمال رسیدن، سال‌های مورد انتظار به شرط رسیدن) از start به گره target
+
+        target جذب‌کننده می‌شود: b = N'r احتمال جذب در target و N'b / b زمان شرطی است.
+        """
+        graph = self.graph
+        target = graph.node_index[target]
+        start = graph.hiring_node if start is None else graph.node_index[start]
+        if start == target:
+            return 1.0, 0.0
+
+        transient = np.flatnonzero(np.arange(self.size) != target)
+        inner = np.eye(len(transient)) - self.matrix[np.ix_(transient, transient)]
+        absorbed = np.linalg.solve(inner, self.matrix[transient, target])
+        # گره‌هایی که هرگز به target نمی‌رسند در زمان شرطی سهمی ندارند
+        weighted = np.linalg.solve(inner, absorbed)
+        row = int(np.searchsorted(transient, start))
+        probability = float(absorbed[row])
+        if probability <= 0:
+            return 0.0, float('inf')
+        return probability, float(weighted[row] / probability)
+
+    def cross_check(self, years=60, replications=200, seed=0, capacity=None):
+        """مقایسه توزیع پایا با میانگین سال آخر مونت‌کارلوی موتور تکراری (بدون ظرفیت)"""
+        engine = VectorizedEngine(self.probabilities, self.years_required, capacity or {}, self.annual_hiring,
+                                  graph=self.graph, enforce_capacity=False)
+        for _, positions, _, _ in engine.iter_ensemble(years, replications, seed):
+            pass
+
+        simulated = positions.mean(axis=0)
+        analytical = self.steady_state() @ self.graph.position_matrix
+        return {
+            'positions': self.graph.positions,
+            'analytical': analytical,
+            'simulated': simulated,
+            'total_error': float(abs(analytical.sum() - simulated.sum()) / max(simulated.sum(), 1)),
+            'max_abs_error': float(np.max(np.abs(analytical - simulated)))
+        }
@@ -0,0 +1,176 @@
+"""بهینه‌سازی سیاست استخدام و ارتقا با روش آنتروپی متقاطع (cross-entropy)
+
+هدف: تعداد هر سمت دارای ظرفیت در سال‌های افق نزدیک ظرفیتش بماند؛ تابع هدف
+ریشه میانگین مربع انحراف نسبی (تعداد / ظرفیت - 1) روی سال‌ها و سمت‌های محدود است.
+BURN_IN سال اول امتیاز ندارند: تعداد اولیه نمودار از ظرفیت برخی سمت‌ها بسیار بیشتر
+است (تا حدود ۵۳۵٪ در سال‌های اول) و هیچ سیاستی این مازاد را زودتر از بازنشستگی و
+ارتقا خالی نمی‌کند، پس با وزن برابر همه سال‌ها این خطای ثابت بر جستجو غالب می‌شد.
+
+در هر نسل جمعیتی از سیاست‌ها از یک توزیع نرمال مستقل (در فضای نرمال‌شده [0, 1]
+هر پارامتر) نمونه‌گیری و همه با یک SweepEngine در یک فراخوانی دسته‌ای ارزیابی
+می‌شوند؛ میانگین و انحراف معیار توزیع با نخبگان همان نسل (به‌صورت هموار) به‌روز
+می‌شود تا بودجه زمانی تمام شود یا توزیع جمع شود.
+"""
+import time
+
+import numpy as np
+
+from emulator import HIRING_RANGE
+from orgchart import load_graph
+from sweep import ANNUAL_HIRING, SweepEngine, policy_names
+
+POPULATION = 200
+ELITE_SHARE = 0.1
+SMOOTHING = 0.7
+INITIAL_STD = 0.25
+# سال‌های آغازین بدون امتیاز (مازاد اولیه نمودار در آن‌ها اصلاح‌پذیر نیست)
+BURN_IN = 5
+# توقف وقتی انحراف معیار همه پارامترها (در فضای نرمال‌شده) از این کمتر شود
+MIN_STD = 1e-3
+MAX_GENERATIONS = 500
+
+
+def policy_ranges(names, hiring_range=HIRING_RANGE):
+    """بازه جستجوی هر پارامتر؛ استخدام پیش‌فرض در مرزهای اسلایدر داشبورد"""
+    return {name: hiring_range if name == ANNUAL_HIRING else (0.0, 1.0) for name in names}
+
+
+def capacity_gaps(engine, years, burn_in=0):
+    """انحراف نسبی تعداد هر سمت محدود از ظرفیت در سال‌های امتیازدار؛ آرایه (B, سال، سمت محدود)
+
+    burn_in سال اول کنار گذاشته می‌شود ولی سال آخر افق همیشه می‌ماند.
+    """
+    capped = np.flatnonzero(np.isfinite(engine.position_limits))
+    if len(capped) == 0:
+        raise ValueError("هیچ سمتی ظرفیت محدود ندارد؛ هدف بهینه‌سازی تعریف نشده است")
+    limits = np.maximum(engine.position_limits[capped], 1)
+
+    tenure = np.tile(engine.initial_state(), (engine.points, 1, 1))
+    gaps = np.empty((engine.points, years, len(capped)))
+    for year in range(1, years + 1):
+        tenure, _, _, _ = engine.step(year, tenure)
+        gaps[:, year - 1] = engine.position_counts(tenure)[:, capped] / limits - 1
+    return gaps[:, min(burn_in, years - 1):]
+
+
+def capacity_objective(names, values, years, probabilities, years_required, capacity, annual_hiring, graph=None,
+                       burn_in=BURN_IN):
+    """ریشه میانگین مربع انحراف نسبی از ظرفیت پس از burn_in سال برای همه نقاط در یک اجرای دسته‌ای"""
+    engine = SweepEngine(names, values, probabilities, years_required, capacity, annual_hiring, graph=graph)
+    return np.sqrt(np.mean(capacity_gaps(engine, years, burn_in) ** 2, axis=(1, 2)))
+
+
+def capacity_table(names, values, years, probabilities, years_required, capacity, annual_hiring, graph=None,
+                   burn_in=BURN_IN):
+    """میانگین و بیشترین انحراف نسبی (درصد) هر سمت محدود پس از burn_in سال؛ {سمت: [(میانگین، بیشترین)...]}"""
+    engine = SweepEngine(names, values, probabilities, years_required, capacity, annual_hiring, graph=graph)
+    gaps = capacity_gaps(engine, years, burn_in) * 100
+    capped = np.flatnonzero(np.isfinite(engine.position_limits))
+    return {
+        engine.positions[index]: list(zip(gaps[:, :, column].mean(axis=1).tolist(),
+                                          np.abs(gaps[:, :, column]).max(axis=1).tolist()))
+        for column, index in enumerate(capped)
+    }
+
+
+def iter_cross_entropy(evaluate, low, high, initial=None, population=POPULATION, elite_share=ELITE_SHARE,
+                       time_budget=10.0, max_generations=MAX_GENERATIONS, smoothing=SMOOTHING, seed=None):
+    """کمینه‌سازی evaluate (آرایه (B, K) -> (B,)) در جعبه [low, high]؛ پس از هر نسل سطر ردگیری را می‌دهد
+
+    initial (در صورت وجود) مرکز توزیع اولیه است و در نسل اول ارزیابی می‌شود.
+    بودجه زمانی پس از هر نسل بررسی می‌شود، پس نسل اول همیشه کامل است.
+    """
+    rng = np.random.default_rng(seed)
+    low, high = np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64)
+    span = np.where(high > low, high - low, 1.0)
+    mean = np.full(len(low), 0.5) if initial is None else np.clip((np.asarray(initial) - low) / span, 0, 1)
+    std = np.full(len(low), INITIAL_STD)
+    elite = max(2, int(round(population * elite_share)))
+    best, best_value = None, np.inf
+    start = time.perf_counter()
+
+    for generation in range(1, max_generations + 1):
+        candidates = np.clip(mean + std * rng.standard_normal((population, len(low))), 0, 1)
+        if generation == 1 and initial is not None:
+            candidates[0] = mean
+        scores = evaluate(low + candidates * span)
+
+        order = np.argsort(scores)
+        chosen = candidates[order[:elite]]
+        mean = smoothing * chosen.mean(axis=0) + (1 - smoothing) * mean
+        std = smoothing * chosen.std(axis=0) + (1 - smoothing) * std
+        if scores[order[0]] < best_value:
+            best, best_value = candidates[order[0]].copy(), float(scores[order[0]])
+
+        elapsed = time.perf_counter() - start
+        yield {
+            'generation': generation,
+            'best': best_value,
+            'elite_mean': float(scores[order[:elite]].mean()),
+            'population_mean': float(scores.mean()),
+            'spread': float(std.mean()),
+            'seconds': elapsed,
+            'best_values': low + best * span
+        }
+        if elapsed >= time_budget or std.max() < MIN_STD:
+            return
+
+
+def iter_optimize(probabilities, years_required, capacity, annual_hiring, years=20, names=None,
+                  population=POPULATION, elite_share=ELITE_SHARE, time_budget=10.0, hiring_range=HIRING_RANGE,
+                  seed=0, graph=None, burn_in=BURN_IN):
+    """جستجوی سیاست نزدیک به ظرفیت؛ سطرهای ردگیری نسل‌ها با مقدار هدف تنظیمات فعلی ('baseline')"""
+    graph = graph or load_graph()
+    names = names or policy_names(probabilities)
+    low, high = np.array(list(policy_ranges(names, hiring_range).values()), dtype=np.float64).T
+    current = np.array(policy_values(names, probabilities, annual_hiring), dtype=np.float64)
+
+    def evaluate(values):
+        return capacity_objective(names, values, years, probabilities, years_required, capacity, annual_hiring,
+                                  graph, burn_in)
+
+    baseline = float(evaluate(current[None])[0])
+    for row in iter_cross_entropy(evaluate, low, high, current, population, elite_share, time_budget, seed=seed):
+        yield {**row, 'baseline': baseline}
+
+
+def recommended_policy(names, values, probabilities, annual_hiring):
+    """(احتمالات، استخدام سالانه) سیاست پیشنهادی با جایگزینی پارامترهای بهینه‌شده"""
+    probabilities = dict(probabilities)
+    for name, value in zip(names, values):
+        if name == ANNUAL_HIRING:
+            annual_hiring = int(round(value))
+        else:
+            probabilities[name] = round(float(value), 2)
+    return probabilities, annual_hiring
+
+
+def policy_values(names, probabilities, annual_hiring):
+    """مقادیر یک سیاست به ترتیب names (برای ارزیابی با SweepEngine)"""
+    return [annual_hiring if name == ANNUAL_HIRING else probabilities[name] for name in names]
+
+
+def optimize_policy(probabilities, years_required, capacity, annual_hiring, years=20, names=None, graph=None,
+                    burn_in=BURN_IN, **options):
+    """اجرای کامل iter_optimize؛ سیاست پیشنهادی، مقدار هدف و ردگیری همگرایی
+
+    'objective' مقدار هدف همان سیاست گردشده پیشنهادی است (نه بهترین نقطه گردنشده جستجو
+    که در 'search_objective' می‌ماند).
+    """
+    graph = graph or load_graph()
+    names = names or policy_names(probabilities)
+    trace = list(iter_optimize(probabilities, years_required, capacity, annual_hiring, years, names, graph=graph,
+                               burn_in=burn_in, **options))
+    best = trace[-1]
+    recommended, hiring = recommended_policy(names, best['best_values'], probabilities, annual_hiring)
+    objective = capacity_objective(names, [policy_values(names, recommended, hiring)], years, probabilities,
+                                   years_required, capacity, annual_hiring, graph, burn_in)
+    return {
+        'names': names,
+        'probabilities': recommended,
+        'annual_hiring': hiring,
+        'objective': float(objective[0]),
+        'search_objective': best['best'],
+        'baseline': best['baseline'],
+        'trace': trace
+    }
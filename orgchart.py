@@ -0,0 +1,225 @@
+"""گراف کامپایل‌شده ساختار سازمانی
+
+نمودار سازمانی (JSON یا YAML) یک‌بار به آرایه‌های عددی تبدیل می‌شود: هر گره
+زوج (سمت، درجه) با شناسه صحیح است و هر یال آرایه‌های مبدأ، مقصد، احتمال و
+حداقل سال‌های لازم را دارد. همه موتورها از همین گراف استفاده می‌کنند و در
+حلقه سالانه هیچ کار رشته‌ای انجام نمی‌شود.
+"""
+import copy
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# مقصد یال‌های خروج از سازمان (بازنشستگی)
+EXIT = -1
+NO_GRADE = -1
+
+DEFAULT_CHART_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'org_chart.json')
+
+
+def read_chart(path):
+    """خواندن نمودار سازمانی از فایل JSON یا YAML"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise ImportError("برای خواندن فایل YAML بسته pyyaml لازم است") from exc
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class OrgGraph:
+    """گراف گره‌ها و یال‌های انتقال به صورت آرایه‌های NumPy"""
+
+    def __init__(self, chart):
+        self.chart = chart
+        self.name = chart.get('name', '')
+        self.positions = list(chart['positions'])
+        self.grades = list(chart.get('grades', []))
+        position_index = {position: i for i, position in enumerate(self.positions)}
+        grade_index = {grade: i for i, grade in enumerate(self.grades)}
+
+        problems = []
+        self.node_names = [node['name'] for node in chart['nodes']]
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        if len(self.node_index) != len(self.node_names):
+            problems.append("نام تکراری در گره‌ها")
+
+        node_position, node_grade = [], []
+        for node in chart['nodes']:
+            if node['position'] not in position_index:
+                problems.append(f"سمت ناشناخته برای گره {node['name']}: {node['position']}")
+            if node.get('grade') is not None and node['grade'] not in grade_index:
+                problems.append(f"درجه ناشناخته برای گره {node['name']}: {node['grade']}")
+            node_position.append(position_index.get(node['position'], 0))
+            node_grade.append(grade_index.get(node.get('grade'), NO_GRADE))
+
+        self.node_position = np.array(node_position, dtype=np.int64)
+        self.node_grade = np.array(node_grade, dtype=np.int64)
+        self.node_initial = np.array([node.get('initial', 0) for node in chart['nodes']], dtype=np.int64)
+        # فهرست واقعی کارکنان (roster.RosterSnapshot)؛ None یعنی تعداد اولیه نمودار
+        self.roster = None
+
+        # جدول جستجوی گره از (سمت، درجه)؛ ستون اول برای «بدون درجه» است
+        self.node_lookup = np.full((len(self.positions), len(self.grades) + 1), -1, dtype=np.int64)
+        self.node_lookup[self.node_position, self.node_grade + 1] = np.arange(len(self.node_names))
+
+        # ماتریس تجمیع گره‌ها به سمت‌ها
+        self.position_matrix = np.zeros((len(self.node_names), len(self.positions)), dtype=np.int64)
+        self.position_matrix[np.arange(len(self.node_names)), self.node_position] = 1
+
+        hiring_node = chart.get('hiring_node')
+        if hiring_node not in self.node_index:
+            problems.append(f"گره استخدام ناشناخته: {hiring_node}")
+        self.hiring_node = self.node_index.get(hiring_node, 0)
+
+        transitions = chart['transitions']
+        self.edge_keys = [edge['key'] for edge in transitions]
+        self.edge_index = {key: i for i, key in enumerate(self.edge_keys)}
+        if len(self.edge_index) != len(self.edge_keys):
+            problems.append("کلید تکراری در انتقال‌ها")
+
+        sources, targets = [], []
+        for edge in transitions:
+            for end in ('source', 'target'):
+                if edge[end] is not None and edge[end] not in self.node_index:
+                    problems.append(f"گره ناشناخته در انتقال {edge['key']}: {edge[end]}")
+            sources.append(self.node_index.get(edge['source'], 0))
+            targets.append(EXIT if edge['target'] is None else self.node_index.get(edge['target'], 0))
+
+        self.edge_source = np.array(sources, dtype=np.int64)
+        self.edge_target = np.array(targets, dtype=np.int64)
+        self.edge_prob = np.array([edge['probability'] for edge in transitions], dtype=np.float64)
+        self.edge_min_years = np.array([edge.get('min_years', 0) for edge in transitions], dtype=np.int64)
+        self.edge_is_exit = self.edge_target == EXIT
+
+        # رتبه هر یال بین یال‌های هم‌مبدأ (برای پردازش برداری بدون برخورد اندیس)
+        self.edge_rank = np.zeros(len(transitions), dtype=np.int64)
+        seen = {}
+        for i, source in enumerate(sources):
+            self.edge_rank[i] = seen.get(source, 0)
+            seen[source] = self.edge_rank[i] + 1
+
+        # ماتریس ورود: هر ردیف یک واحد انتقال را به گره مقصد اضافه می‌کند
+        self.inflow_matrix = np.zeros((len(transitions), len(self.node_names)), dtype=np.int64)
+        entering = ~self.edge_is_exit
+        self.inflow_matrix[np.flatnonzero(entering), self.edge_target[entering]] = 1
+
+        cycle = self.cycle_nodes()
+        if cycle:
+            problems.append(f"دور در انتقال‌ها: {', '.join(cycle)}")
+
+        if problems:
+            raise ValueError("نمودار سازمانی نامعتبر است:\n" + "\n".join(problems))
+        self.validate()
+
+    def cycle_nodes(self):
+        """نام گره‌هایی که روی دور یا پس از دوری در یال‌های ارتقا هستند (حذف برگ‌ها به روش Kahn)"""
+        entering = ~self.edge_is_exit
+        sources, targets = self.edge_source[entering], self.edge_target[entering]
+        indegree = np.bincount(targets, minlength=len(self.node_names))
+        remaining = np.ones(len(self.node_names), dtype=bool)
+        ready = list(np.flatnonzero(indegree == 0))
+        while ready:
+            node = ready.pop()
+            remaining[node] = False
+            for target in targets[sources == node]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+        return [self.node_names[node] for node in np.flatnonzero(remaining)]
+
+    def validate(self):
+        """بررسی مقادیر گراف؛ در صورت وجود مشکل ValueError"""
+        problems = []
+
+        if np.any((self.edge_prob < 0) | (self.edge_prob > 1)):
+            problems.append("احتمال انتقال باید بین 0 و 1 باشد")
+        if np.any(self.edge_min_years < 0):
+            problems.append("سال‌های لازم نمی‌تواند منفی باشد")
+        if np.any(self.edge_source == self.edge_target):
+            problems.append("انتقال از یک گره به خودش مجاز نیست")
+        if np.any(self.node_initial < 0):
+            problems.append("تعداد اولیه گره نمی‌تواند منفی باشد")
+
+        if problems:
+            raise ValueError("نمودار سازمانی نامعتبر است:\n" + "\n".join(problems))
+
+    def warnings(self):
+        """هشدارهای غیرساختاری، مثل مجموع احتمال خروجی بیش از 1"""
+        totals = np.bincount(self.edge_source, weights=self.edge_prob, minlength=len(self.node_names))
+        return [
+            f"مجموع احتمالات خروجی {self.node_names[node]} برابر {totals[node]:.2f} و بیشتر از 1 است"
+            for node in np.flatnonzero(totals > 1 + 1e-9)
+        ]
+
+    def with_parameters(self, probabilities=None, years_required=None):
+        """نسخه جدید با احتمالات و سال‌های لازم اسلایدرها (کلیدهای ناشناخته نادیده گرفته می‌شوند)"""
+        graph = copy.copy(self)
+        graph.edge_prob = self.edge_prob.copy()
+        graph.edge_min_years = self.edge_min_years.copy()
+
+        for key, prob in (probabilities or {}).items():
+            if key in self.edge_index:
+                graph.edge_prob[self.edge_index[key]] = prob
+        for key, years in (years_required or {}).items():
+            if key in self.edge_index and not self.edge_is_exit[self.edge_index[key]]:
+                graph.edge_min_years[self.edge_index[key]] = years
+
+        graph.validate()
+        return graph
+
+    def with_roster(self, snapshot):
+        """نسخه جدید که وضعیت اولیه (تعداد، سابقه و سن) را از فهرست کارکنان می‌گیرد"""
+        if snapshot.counts.shape[0] != len(self.node_names):
+            raise ValueError("فهرست کارکنان با گره‌های نمودار سازمانی سازگار نیست")
+        graph = copy.copy(self)
+        graph.roster = snapshot
+        graph.node_initial = snapshot.node_totals()
+        return graph
+
+    def seniority_order(self):
+        """گره‌ها از ارشدترین به پایین (بلندترین مسیر از گره استخدام)"""
+        depth = np.zeros(len(self.node_names), dtype=np.int64)
+        entering = ~self.edge_is_exit
+        sources, targets = self.edge_source[entering], self.edge_target[entering]
+        # در گراف بدون دور حداکثر به تعداد گره‌ها تکرار لازم است
+        for _ in range(len(self.node_names)):
+            updated = depth.copy()
+            np.maximum.at(updated, targets, depth[sources] + 1)
+            if np.array_equal(updated, depth):
+                break
+            depth = updated
+        return np.argsort(-depth, kind='stable')
+
+    def initial_positions(self):
+        """تعداد اولیه هر سمت"""
+        return dict(zip(self.positions, (self.node_initial @ self.position_matrix).tolist()))
+
+    def fingerprint(self):
+        """هش ساختار گراف و فهرست کارکنان (بدون احتمالات و سال‌ها) برای بی‌اعتبارسازی کش‌ها"""
+        structure = {
+            'positions': self.positions,
+            'grades': self.grades,
+            'nodes': self.chart['nodes'],
+            'edges': [[key, self.chart['transitions'][i]['source'], self.chart['transitions'][i]['target']]
+                      for i, key in enumerate(self.edge_keys)],
+            'hiring_node': self.chart.get('hiring_node'),
+            'roster': None if self.roster is None else [self.roster.source_key, self.roster.as_of.isoformat()]
+        }
+        canonical = json.dumps(structure, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(read_chart(path))
+
+
+@functools.lru_cache(maxsize=8)
+def load_graph(path=None):
+    """گراف کامپایل‌شده (پیش‌فرض: ORG_CHART_PATH یا org_chart.json کنار برنامه)"""
+    return OrgGraph.from_file(path or os.environ.get('ORG_CHART_PATH') or DEFAULT_CHART_PATH)
@@ -0,0 +1,154 @@
+"""اجرای موازی مجموعه‌های بزرگ مونت‌کارلو روی چند پردازه
+
+تکرارها به بخش‌های (shard) با اندازه ثابت تقسیم می‌شوند و هر بخش جریان تصادفی
+مستقل خودش را از SeedSequence.spawn می‌گیرد؛ بنابراین نتیجه به تعداد پردازه‌ها
+بستگی ندارد. هر پردازه فقط هیستوگرام مقادیر صحیح را برمی‌گرداند، نه مسیرهای کامل.
+
+استخرهای پردازه از رشته‌های کارگر JobQueue و رشته اسکریپت Streamlit ساخته می‌شوند.
+fork در پردازه چندرشته‌ای قفل‌هایی را که رشته‌های دیگر گرفته‌اند قفل‌شده در فرزند کپی
+می‌کند و ممکن است به بن‌بست برسد، پس process_pool فرزندها را با START_METHOD می‌سازد.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# تعداد تکرار در هر بخش (مستقل از تعداد پردازه‌ها)
+SHARD_SIZE = 2500
+
+# روش ساخت پردازه‌های کارگر: فرزندها از یک سرور تک‌رشته‌ای fork می‌شوند (یا spawn روی
+# سیستم‌های بدون forkserver)؛ هزینه آن وارد کردن دوباره ماژول‌ها در هر استخر است
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class IntegerHistogram:
+    """هیستوگرام قابل ادغام مقادیر صحیح برای هر (سال، سری)"""
+
+    def __init__(self, offset, counts):
+        self.offset = offset  # کمترین مقدار هر (سال، سری)
+        self.counts = counts  # تعداد رخداد هر مقدار از offset به بعد
+
+    @classmethod
+    def from_samples(cls, samples):
+        """ساخت از نمونه‌های (تکرار، سال، سری)"""
+        offset = samples.min(axis=0)
+        shifted = samples - offset
+        width = int(shifted.max()) + 1
+        years, series = offset.shape
+
+        # شمارش همه (سال، سری)ها با یک bincount روی اندیس تخت‌شده
+        cell = np.arange(years * series).reshape(years, series) * width
+        flat = (shifted + cell).ravel()
+        counts = np.bincount(flat, minlength=years * series * width)
+        return cls(offset, counts.reshape(years, series, width))
+
+    def merge(self, other):
+        """ادغام دو هیستوگرام با هم‌ترازی offsetها"""
+        offset = np.minimum(self.offset, other.offset)
+        end = np.maximum(self.offset + self.counts.shape[-1], other.offset + other.counts.shape[-1])
+        width = int((end - offset).max())
+        counts = np.zeros(offset.shape + (width,), dtype=np.int64)
+
+        for hist in (self, other):
+            shift = hist.offset - offset
+            columns = shift[..., None] + np.arange(hist.counts.shape[-1])
+            np.put_along_axis(
+                counts, columns,
+                np.take_along_axis(counts, columns, axis=-1) + hist.counts,
+                axis=-1
+            )
+
+        return IntegerHistogram(offset, counts)
+
+    def percentile(self, q):
+        """صدک با درون‌یابی خطی، معادل np.percentile روی نمونه‌های اصلی"""
+        cumulative = np.cumsum(self.counts, axis=-1)
+        n = cumulative[..., -1]
+        position = (n - 1) * (q / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+
+        # k-امین آماره ترتیبی = اولین مقداری که تعداد تجمعی‌اش از k بیشتر است
+        value_lower = (cumulative > lower[..., None]).argmax(axis=-1) + self.offset
+        value_upper = (cumulative > upper[..., None]).argmax(axis=-1) + self.offset
+        return value_lower + (value_upper - value_lower) * (position - lower)
+
+
+def _shard_series(ensemble):
+    """کل پرسنل و تعداد هر سمت به صورت آرایه (تکرار، سال، سری)"""
+    trajectory = ensemble['وضعیت_مناصب']
+    total = trajectory.sum(axis=-1, keepdims=True)
+    return np.concatenate([total, trajectory], axis=-1)
+
+
+def run_shard(engine, years, replications, seed_sequence):
+    """اجرای یک بخش در پردازه کارگر و بازگرداندن هیستوگرام آن"""
+    ensemble = engine.run_ensemble(years, replications, seed_sequence)
+    return IntegerHistogram.from_samples(_shard_series(ensemble))
+
+
+def shard_sizes(replications, shard_size=SHARD_SIZE):
+    """تقسیم تکرارها به بخش‌های ثابت"""
+    full, rest = divmod(replications, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+
+def process_pool(workers):
+    """ProcessPoolExecutor با START_METHOD که ساختنش از هر رشته‌ای امن است"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+
+def run_parallel_ensemble(engine, years, replications, seed=None, workers=None,
+                          percentiles=(5, 50, 95), shard_size=SHARD_SIZE):
+    """اجرای موازی مجموعه و ادغام صدک‌ها در قالب ensemble_bands"""
+    sizes = shard_sizes(replications, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+
+    if workers <= 1:
+        histograms = [run_shard(engine, years, size, child) for size, child in zip(sizes, seeds)]
+    else:
+        with process_pool(workers) as pool:
+            histograms = list(pool.map(run_shard, [engine] * len(sizes), [years] * len(sizes), sizes, seeds))
+
+    merged = histograms[0]
+    for hist in histograms[1:]:
+        merged = merged.merge(hist)
+
+    bands = np.stack([merged.percentile(q) for q in percentiles])
+    return stack_bands(engine.positions, percentiles, bands)
+
+
+def stack_bands(positions, percentiles, bands):
+    """تبدیل آرایه صدک‌ها (صدک، سال، سری) به قالب ensemble_bands"""
+    return {
+        'percentiles': percentiles,
+        'کل_پرسنل': bands[:, :, 0],
+        'مناصب': {position: bands[:, :, i + 1] for i, position in enumerate(positions)}
+    }
+
+
+def iter_ensemble_bands(engine, years, replications, seed=None, percentiles=(5, 50, 95),
+                        shard_size=SHARD_SIZE, start=None, checkpoint=None):
+    """صدک‌های هر سال به محض محاسبه، با همان بخش‌بندی و بذرهای run_parallel_ensemble
+
+    بخش‌ها هم‌گام جلو می‌روند و فقط نمونه‌های سال جاری در حافظه می‌ماند؛ هر سال
+    (سال، آرایه صدک‌ها (صدک، سری)) داده می‌شود که سری اول کل پرسنل است.
+    checkpoint (و start برای ادامه) نقاط بازیابی همه بخش‌ها را در کلید 'shards' دارد.
+    """
+    sizes = shard_sizes(replications, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    starts = start['shards'] if start else [None] * len(sizes)
+    states = [{} for _ in sizes]
+    if checkpoint is not None:
+        checkpoint['shards'] = states
+    shards = [engine.iter_ensemble(years, size, child, shard_start, state)
+              for size, child, shard_start, state in zip(sizes, seeds, starts, states)]
+
+    for steps in zip(*shards):
+        positions = np.concatenate([positions for _, positions, _, _ in steps])
+        series = np.concatenate([positions.sum(axis=-1, keepdims=True), positions], axis=-1)
+        if checkpoint is not None:
+            checkpoint['year'] = steps[0][0]
+        yield steps[0][0], np.percentile(series, percentiles, axis=0)
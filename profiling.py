@@ -0,0 +1,100 @@
+"""زمان‌سنجی و ردیابی حافظه مراحل شبیه‌سازی
+
+موتورها هر مرحله سال (استخدام، بازنشستگی، ارتقا، تنظیم ظرفیت، افزایش سابقه) را
+در profiler.phase(name) می‌پیچند. در حالت خاموش phase یک context از پیش ساخته‌شده و
+بی‌اثر برمی‌گرداند، پس هزینه تقریباً صفر است. رویدادها قابل خلاصه‌سازی و خروجی به
+قالب Chrome trace (chrome://tracing یا Perfetto) هستند.
+
+tracemalloc فقط یک اوج سراسری دارد؛ هر مرحله هنگام ورود آن را بازنشانی می‌کند و اوج تا آن
+لحظه را در پشته مراحل باز (برای هر رشته) به مرحله بیرونی می‌سپارد، و هنگام خروج اوج
+خودش را به مرحله بیرونی اضافه می‌کند. پس اوج مرحله بیرونی (مثلاً render) هرگز از اوج
+مرحله‌های درونی‌اش (figures) کمتر نیست.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class PhaseProfiler:
+    """ثبت مدت و تخصیص حافظه هر مرحله"""
+
+    def __init__(self, enabled=True, track_memory=False):
+        self.enabled = enabled
+        self.track_memory = track_memory and enabled
+        self.events = []  # (نام، شروع ns، مدت ns، تخصیص خالص، اوج، شناسه رشته)
+        self.origin = time.perf_counter_ns()
+        self._open = {}  # شناسه رشته -> پشته اوج مطلق مراحل باز آن رشته
+
+    def phase(self, name):
+        """context زمان‌سنجی یک مرحله (در حالت خاموش بدون هزینه)"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._record(name)
+
+    @contextlib.contextmanager
+    def _record(self, name):
+        started_tracing = False
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            before, peak_so_far = tracemalloc.get_traced_memory()
+            peaks = self._peaks()
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak_so_far)
+            tracemalloc.reset_peak()
+            peaks.append(before)
+
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            allocated = peak = None
+            if self.track_memory:
+                current, peak_memory = tracemalloc.get_traced_memory()
+                peaks = self._peaks()
+                peak_memory = max(peaks.pop(), peak_memory)
+                if peaks:
+                    peaks[-1] = max(peaks[-1], peak_memory)
+                allocated, peak = current - before, max(0, peak_memory - before)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.events.append((name, start - self.origin, duration, allocated, peak, threading.get_ident()))
+
+    def _peaks(self):
+        return self._open.setdefault(threading.get_ident(), [])
+
+    def summary(self):
+        """جمع مدت، تعداد و اوج حافظه هر مرحله به ترتیب اولین رخداد"""
+        phases = {}
+        for name, _, duration, allocated, peak, _ in self.events:
+            entry = phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'allocated': 0, 'peak': 0})
+            entry['calls'] += 1
+            entry['seconds'] += duration / 1e9
+            entry['allocated'] += allocated or 0
+            entry['peak'] = max(entry['peak'], peak or 0)
+        return phases
+
+    def chrome_trace(self):
+        """رویدادها در قالب Chrome trace (واحد زمان میکروثانیه)"""
+        pid = os.getpid()
+        events = []
+        for name, start, duration, allocated, peak, thread in self.events:
+            event = {'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': thread}
+            if allocated is not None:
+                event['args'] = {'allocated_bytes': allocated, 'peak_bytes': peak}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def chrome_trace_json(self):
+        return json.dumps(self.chrome_trace())
+
+
+# profiler پیش‌فرض موتورها: همیشه خاموش
+NULL_PROFILER = PhaseProfiler(enabled=False)
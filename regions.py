@@ -0,0 +1,306 @@
+"""شبیه‌سازی سلسله‌مراتبی شعبه و منطقه با بخش‌های (shard) مستقل و انتقال بین مناطق
+
+ظرفیت‌های create_capacity_settings تعداد شعب هر درجه (capacity['رئیس_شعبه']) و
+تعداد مناطق (capacity['مدیر_شعب']) را دارند. شعب به نوبت بین مناطق پخش می‌شوند
+و وضعیت همه آرایه (منطقه، ردیف، گره، سابقه) است: هر ردیف یک شعبه است و ردیف آخر
+هر منطقه دفتر منطقه (سمت‌هایی با ظرفیت عددی مثل مدیر شعب). صندلی‌های هر گره بین
+ردیف‌ها تقسیم می‌شوند و همان VectorizedEngine با محورهای اضافه گام برمی‌دارد؛
+فقط تخصیص صندلی خالی در سطح منطقه است: متقاضیان همه شعب منطقه به ترتیب سابقه
+صندلی‌های خالی شعب همان منطقه را پر می‌کنند.
+
+مناطق در بخش‌های با اندازه ثابت (SHARD_REGIONS) و هر بخش با جریان تصادفی خودش از
+SeedSequence.spawn اجرا می‌شود، پس نتیجه به تعداد پردازه‌ها بستگی ندارد. پس از هر
+سال گام کاهش (reduction) تعداد هر منطقه را جمع می‌کند و سهم transfer_share از
+مازاد مناطق پرتر از ظرفیت را به کسری مناطق دیگر منتقل می‌کند؛ انتقال‌ها در ابتدای
+سال بعد در خود بخش‌ها اعمال می‌شوند.
+
+در هر ردیف فقط چند نفر هستند و گرد کردن قطعی به پایین همه ارتقاها و بازنشستگی‌ها را
+صفر می‌کند، پس این حالت همیشه تصادفی (دوجمله‌ای) است.
+"""
+import copy
+
+import numpy as np
+
+from capacity import setting_for
+from engine import VectorizedEngine, apportion, take_from_top
+from orgchart import load_graph
+from parallel import process_pool
+
+# تنظیم ظرفیتی که تعداد شعب هر درجه است و تنظیمی که تعداد مناطق است
+BRANCH_POSITION = 'رئیس_شعبه'
+REGION_POSITION = 'مدیر_شعب'
+
+# سهم مازاد کل مناطق که هر سال به مناطق دارای کسری منتقل می‌شود
+TRANSFER_SHARE = 0.1
+
+# تعداد مناطق هر بخش (مستقل از تعداد پردازه‌ها)
+SHARD_REGIONS = 8
+
+
+class BranchLayout:
+    """جای شعب و دفاتر منطقه در آرایه (منطقه، ردیف) و صندلی‌های هر گره در هر ردیف"""
+
+    def __init__(self, graph, capacity, node_limits):
+        branches = capacity.get(BRANCH_POSITION)
+        regions = capacity.get(REGION_POSITION)
+        if not isinstance(branches, dict) or not isinstance(regions, (int, float)) or regions < 1:
+            raise ValueError(f"ظرفیت '{BRANCH_POSITION}' باید تعداد شعب هر درجه و "
+                             f"'{REGION_POSITION}' تعداد مناطق باشد")
+
+        self.regions = int(regions)
+        grades = np.arange(len(graph.grades))
+        counts = np.array([int(branches.get(grade, 0)) for grade in graph.grades], dtype=np.int64)
+        # شعب به نوبت بین مناطق پخش می‌شوند تا ترکیب درجه‌ها در همه مناطق مشابه باشد
+        self.branch_grade = np.repeat(grades, counts)
+        self.branch_region = np.arange(len(self.branch_grade)) % self.regions
+        self.branch_slot = np.arange(len(self.branch_grade)) // self.regions
+        self.slots = -(-len(self.branch_grade) // self.regions) + 1
+        self.office_slot = self.slots - 1
+
+        self.row_grade = np.full((self.regions, self.slots), -1, dtype=np.int64)
+        self.row_grade[self.branch_region, self.branch_slot] = self.branch_grade
+        self.branch_rows = self.row_grade >= 0
+        self.office_rows = np.zeros_like(self.branch_rows)
+        self.office_rows[:, self.office_slot] = True
+
+        # گره‌های نامحدود در هر شعبه بی‌سقف‌اند و در دفتر و ردیف‌های خالی جایی ندارند
+        nodes = len(graph.node_names)
+        self.seats = np.zeros((self.regions, self.slots, nodes))
+        for node in range(nodes):
+            if not np.isfinite(node_limits[node]):
+                self.seats[self.branch_rows, node] = np.inf
+                continue
+            setting = setting_for(graph.positions[graph.node_position[node]], capacity)
+            if isinstance(setting, dict):
+                for grade, name in enumerate(graph.grades):
+                    if name in setting and graph.node_grade[node] in (grade, -1):
+                        self.seats[..., node] += self._spread(setting[name], self.row_grade == grade)
+            else:
+                self.seats[..., node] = self._spread(setting, self.office_rows)
+
+    def _spread(self, total, rows):
+        """تقسیم total صندلی بین ردیف‌های rows (اگر ردیفی نباشد، بین دفاتر مناطق)"""
+        rows = rows if rows.any() else self.office_rows
+        return apportion(int(total), rows.ravel()).reshape(rows.shape)
+
+    def weights(self, node):
+        """سهم هر ردیف از افراد گره: صندلی‌های محدود یا به تساوی بین شعب"""
+        seats = self.seats[..., node]
+        if np.isfinite(seats).all() and seats.sum() > 0:
+            return seats
+        return self.branch_rows.astype(np.float64)
+
+    def distribute(self, tenure):
+        """پخش ماتریس سابقه کل (گره، سابقه) بین ردیف‌ها؛ آرایه (منطقه، ردیف، گره، سابقه)"""
+        state = np.zeros((self.regions, self.slots) + tenure.shape, dtype=np.int64)
+        for node in range(tenure.shape[0]):
+            split = apportion(tenure[node], self.weights(node).ravel())
+            state[..., node, :] = split.T.reshape(self.regions, self.slots, -1)
+        return state
+
+
+class BranchEngine(VectorizedEngine):
+    """موتور برداری روی محورهای (منطقه، ردیف) با صندلی‌های هر ردیف و استخدام هر ردیف"""
+
+    def __init__(self, probabilities, years_required, capacity, seats, hires, graph=None, profiler=None):
+        super().__init__(probabilities, years_required, capacity, hires, graph=graph, profiler=profiler)
+        self.seats = seats
+
+    def adjust_for_capacity(self, tenure, counts, moved):
+        """تخصیص زنجیره‌ای صندلی‌های خالی؛ رقابت متقاضیان همه شعب هر منطقه به ترتیب سابقه
+
+        افراد از شعبه مبدأ برداشته و به ترتیب ردیف در صندلی‌های خالی شعب منطقه نشانده می‌شوند.
+        """
+        graph = self.graph
+        regions = tenure.shape[0]
+        for target, edges, _ in self.capacity_plan:
+            if len(edges) == 0:
+                continue
+            open_seats = np.maximum(0, self.seats[..., target] - tenure[..., target, :].sum(axis=-1))
+            open_seats = open_seats.astype(np.int64)
+
+            sources = graph.edge_source[edges]
+            pool = take_from_top(tenure[..., sources, :], counts[..., edges], self.edge_column[edges])
+
+            # رتبه‌بندی در منطقه: ستون‌های سابقه از بالا، سپس یال‌ها و سپس ردیف‌ها
+            ordered = pool[..., ::-1].transpose(0, 3, 2, 1)
+            flat = ordered.reshape(regions, -1)
+            before = np.cumsum(flat, axis=-1) - flat
+            taken = np.clip(open_seats.sum(axis=-1)[:, None] - before, 0, flat)
+            taken = taken.reshape(ordered.shape).transpose(0, 3, 2, 1)[..., ::-1]
+
+            for i, source in enumerate(sources):
+                tenure[..., source, :] -= taken[..., i, :]
+            filled = taken.sum(axis=(1, 2, 3))
+            seated = np.cumsum(open_seats, axis=-1) - open_seats
+            tenure[..., target, 0] += np.clip(filled[:, None] - seated, 0, open_seats)
+            moved[..., edges] = taken.sum(axis=-1)
+
+        return moved, tenure
+
+
+class RegionShard:
+    """گروه ثابتی از مناطق با وضعیت (منطقه، ردیف، گره، سابقه) و جریان تصادفی خودش"""
+
+    def __init__(self, engine, regions, tenure, seed_sequence):
+        self.engine = engine
+        self.regions = regions  # اندیس سراسری مناطق این بخش
+        self.tenure = tenure
+        self.limits = np.where(np.isfinite(engine.seats), engine.seats, 0).astype(np.int64)
+        self.rng = np.random.default_rng(seed_sequence)
+
+    def apply_transfers(self, outflow, inflow):
+        """خروج باسابقه‌ترین‌ها از ردیف‌های پرتر از ظرفیت و ورود با سابقه صفر به صندلی‌های خالی"""
+        if not outflow.any() and not inflow.any():
+            return
+        counts = self.tenure.sum(axis=-1)
+        surplus = np.maximum(0, counts - self.limits)
+        leaving = np.clip(outflow[:, None, :] - (np.cumsum(surplus, axis=1) - surplus), 0, surplus)
+        self.tenure = self.tenure - take_from_top(self.tenure, leaving, self.engine.all_columns)
+
+        deficit = np.maximum(0, self.limits - (counts - leaving))
+        self.tenure[..., 0] += np.clip(inflow[:, None, :] - (np.cumsum(deficit, axis=1) - deficit), 0, deficit)
+
+    def step(self, year):
+        """یک سال همه مناطق بخش؛ جمع‌های هر منطقه"""
+        self.tenure, hires, retired, promoted = self.engine.step(year, self.tenure, self.rng)
+        return {
+            'counts': self.tenure.sum(axis=(1, 3)),
+            'hires': hires.sum(axis=1),
+            'retirements': retired.sum(axis=1),
+            'promotions': promoted.sum(axis=1)
+        }
+
+
+def advance_shard(shard, year, outflow, inflow):
+    """اعمال انتقال‌های سال قبل و گام سال year (در پردازه کارگر)؛ (بخش، جمع‌های منطقه‌ها)"""
+    shard.apply_transfers(outflow, inflow)
+    return shard, shard.step(year)
+
+
+def transfer_flows(counts, limits, capped, share=TRANSFER_SHARE):
+    """گام کاهش: (خروج، ورود) هر (منطقه، گره) از مازاد مناطق به کسری مناطق دیگر
+
+    تعداد منتقل‌شده هر گره سهم share از مازاد کل است و از کسری کل بیشتر نمی‌شود.
+    """
+    surplus = np.maximum(0, counts - limits) * capped
+    deficit = np.maximum(0, limits - counts) * capped
+    movers = np.minimum((surplus.sum(axis=0) * share).astype(np.int64), deficit.sum(axis=0))
+    return apportion(movers, surplus.T).T, apportion(movers, deficit.T).T
+
+
+class RegionalSimulation:
+    """شبیه‌سازی شعبه به شعبه؛ مناطق در بخش‌های مستقل و جمع‌بندی سالانه در سطح کشور"""
+
+    def __init__(self, probabilities, years_required, capacity, annual_hiring, graph=None, seed=None,
+                 transfer_share=TRANSFER_SHARE, shard_regions=SHARD_REGIONS, profiler=None):
+        graph = graph or load_graph()
+        base = VectorizedEngine(probabilities, years_required, capacity, annual_hiring, graph=graph)
+        self.graph = base.graph
+        self.positions = base.positions
+        self.transition_keys = base.transition_keys
+        self.position_limits = base.position_limits
+        self.layout = layout = BranchLayout(base.graph, capacity, base.node_limits)
+        self.transfer_share = transfer_share
+
+        self.capped = np.isfinite(base.node_limits)
+        self.limits = np.where(np.isfinite(layout.seats), layout.seats, 0).sum(axis=1).astype(np.int64)
+        hiring_weights = layout.weights(base.graph.hiring_node)
+        hires = apportion(annual_hiring, hiring_weights.ravel()).reshape(hiring_weights.shape)
+        tenure = layout.distribute(base.initial_state())
+
+        groups = [np.arange(start, min(start + shard_regions, layout.regions))
+                  for start in range(0, layout.regions, shard_regions)]
+        seeds = np.random.SeedSequence(seed).spawn(len(groups))
+        self.shards = [
+            RegionShard(BranchEngine(probabilities, years_required, capacity, layout.seats[group], hires[group],
+                                     graph=graph, profiler=profiler), group, tenure[group], child)
+            for group, child in zip(groups, seeds)
+        ]
+        # انتقال‌های محاسبه‌شده در آخرین گام کاهش که هنوز در بخش‌ها اعمال نشده‌اند
+        self.pending = (np.zeros_like(self.limits), np.zeros_like(self.limits))
+
+    def iter_years(self, years, workers=1, start=None, checkpoint=None):
+        """اجرای سال به سال؛ هر سال (سال، جمع‌های منطقه‌ها) پس از انتقال‌ها
+
+        جمع‌ها: 'counts' (منطقه، گره)، 'hires' و 'retirements' و 'transfers' (منطقه) و
+        'promotions' (منطقه، یال ارتقا). با workers > 1 بخش‌ها در پردازه‌های جدا اجرا
+        می‌شوند. start و checkpoint مانند VectorizedEngine.iter_run هستند.
+        """
+        if start:
+            first, (self.shards, self.pending) = start['year'], copy.deepcopy(start['state'])
+        else:
+            first = 0
+        workers = min(workers or 1, len(self.shards))
+        pool = process_pool(workers) if workers > 1 else None
+
+        try:
+            for year in range(first + 1, years + 1):
+                outflow, inflow = self.pending
+                arguments = (self.shards, [year] * len(self.shards),
+                             [outflow[shard.regions] for shard in self.shards],
+                             [inflow[shard.regions] for shard in self.shards])
+                stepped = list(pool.map(advance_shard, *arguments) if pool else map(advance_shard, *arguments))
+                self.shards = [shard for shard, _ in stepped]
+                totals = {key: np.concatenate([summary[key] for _, summary in stepped]) for key in stepped[0][1]}
+
+                outflow, inflow = transfer_flows(totals['counts'], self.limits, self.capped, self.transfer_share)
+                self.pending = (outflow, inflow)
+                totals['counts'] = totals['counts'] - outflow + inflow
+                totals['transfers'] = inflow.sum(axis=1)
+                if checkpoint is not None:
+                    # بخش‌ها در همین پردازه در جا به‌روز می‌شوند، پس نقطه بازیابی کپی است
+                    checkpoint.update(year=year, state=copy.deepcopy((self.shards, self.pending)), rng=None)
+                yield year, totals
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def iter_run(self, years, start=None, checkpoint=None, workers=1):
+        """جمع‌بندی کشوری هر سال در قالب دیکشنری simulate_career_progression"""
+        for year, totals in self.iter_years(years, workers, start, checkpoint):
+            positions = self.region_positions(totals['counts']).sum(axis=0)
+            yield year, {
+                'استخدام_جدید': int(totals['hires'].sum()),
+                'بازنشستگی': int(totals['retirements'].sum()),
+                'ارتقاءها': dict(zip(self.transition_keys, totals['promotions'].sum(axis=0).tolist())),
+                'وضعیت_مناصب': dict(zip(self.positions, positions.tolist())),
+                'ظرفیت_استفاده': self.shards[0].engine.capacity_usage(positions)
+            }
+
+    def region_positions(self, counts):
+        """تعداد هر سمت در هر منطقه از تعداد گره‌ها (منطقه، گره)"""
+        return counts @ self.graph.position_matrix
+
+    def branch_positions(self):
+        """تعداد هر سمت در هر شعبه (شعبه، سمت) و در دفتر هر منطقه (منطقه، سمت) با انتقال‌های معوق"""
+        outflow, inflow = self.pending
+        rows = []
+        for shard in self.shards:
+            shard = copy.deepcopy(shard)
+            shard.apply_transfers(outflow[shard.regions], inflow[shard.regions])
+            rows.append(shard.tenure.sum(axis=-1))
+        positions = np.concatenate(rows) @ self.graph.position_matrix
+        layout = self.layout
+        return positions[layout.branch_region, layout.branch_slot], positions[:, layout.office_slot]
+
+
+def run_regions(probabilities, years_required, capacity, annual_hiring, years, seed=None, workers=1,
+                transfer_share=TRANSFER_SHARE, graph=None):
+    """اجرای کامل منطقه‌ای؛ آرایه‌های سال به سال هر منطقه و وضعیت نهایی هر شعبه"""
+    simulation = RegionalSimulation(probabilities, years_required, capacity, annual_hiring, graph=graph,
+                                    seed=seed, transfer_share=transfer_share)
+    yearly = [totals for _, totals in simulation.iter_years(years, workers)]
+    branches, offices = simulation.branch_positions()
+    return {
+        'years': np.arange(1, years + 1),
+        'positions': simulation.positions,
+        'region_positions': np.stack([simulation.region_positions(totals['counts']) for totals in yearly]),
+        'retirements': np.stack([totals['retirements'] for totals in yearly]),
+        'transfers': np.stack([totals['transfers'] for totals in yearly]),
+        'region_limits': simulation.region_positions(simulation.limits),
+        'branch_positions': branches,
+        'office_positions': offices,
+        'branch_region': simulation.layout.branch_region,
+        'branch_grade': simulation.layout.branch_grade
+    }
@@ -0,0 +1,165 @@
+"""جدول ستونی بلند نتایج شبیه‌سازی
+
+همه خروجی‌ها (تعداد مناصب، استخدام، بازنشستگی، ارتقاها و درصد استفاده از ظرفیت)
+در یک DataFrame با ستون‌های (year, replication, position, grade, transition,
+metric, value) ذخیره می‌شوند. ستون‌های متنی Categorical هستند، پس خلاصه‌ها و
+نمودارها با groupby برداری ساخته می‌شوند و جدول مستقیماً به Parquet می‌رود.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+# معیارها؛ همان کلیدهای دیکشنری نتایج سالانه
+HEADCOUNT = 'وضعیت_مناصب'
+HIRES = 'استخدام_جدید'
+RETIREMENTS = 'بازنشستگی'
+PROMOTIONS = 'ارتقاءها'
+CAPACITY_USAGE = 'ظرفیت_استفاده'
+METRICS = [HEADCOUNT, HIRES, RETIREMENTS, PROMOTIONS, CAPACITY_USAGE]
+
+COLUMNS = ['year', 'replication', 'position', 'grade', 'transition', 'metric', 'value']
+
+
+def position_grades(graph):
+    """اندیس درجه هر سمت اگر سمت دقیقاً یک گره داشته باشد، وگرنه -1"""
+    grades = np.full(len(graph.positions), -1, dtype=np.int64)
+    single = graph.position_matrix.sum(axis=0)[graph.node_position] == 1
+    grades[graph.node_position[single]] = graph.node_grade[single]
+    return grades
+
+
+def _block(metric, values, years, position=None, transition=None):
+    """ستون‌های یک معیار از آرایه (تکرار، سال، سری)؛ position یا transition کد سری‌هاست"""
+    replications, year_count, series = values.shape
+    size = values.size
+    missing = np.full(size, -1, dtype=np.int64)
+    return {
+        'year': np.tile(np.repeat(years, series), replications),
+        'replication': np.repeat(np.arange(replications), year_count * series),
+        'position': missing if position is None else np.tile(position, replications * year_count),
+        'transition': missing if transition is None else np.tile(transition, replications * year_count),
+        'metric': np.full(size, METRICS.index(metric), dtype=np.int64),
+        'value': values.ravel().astype(np.float64)
+    }
+
+
+def _assemble(blocks, graph, positions, transitions):
+    """الحاق بلوک‌ها و ساخت ستون‌های Categorical (سطرهای بدون مقدار حذف می‌شوند)"""
+    columns = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+    keep = ~np.isnan(columns['value'])
+    columns = {name: values[keep] for name, values in columns.items()}
+
+    # درجه فقط برای سمت‌های گراف قابل تعیین است
+    grade_of = np.append(position_grades(graph), -1)
+    graph_position = np.array([graph.positions.index(p) if p in graph.positions else -1 for p in positions]
+                              + [-1], dtype=np.int64)
+    grade = grade_of[graph_position[columns['position']]]
+
+    return pd.DataFrame({
+        'year': columns['year'].astype(np.int16),
+        'replication': columns['replication'].astype(np.int32),
+        'position': pd.Categorical.from_codes(columns['position'], categories=positions),
+        'grade': pd.Categorical.from_codes(grade, categories=graph.grades),
+        'transition': pd.Categorical.from_codes(columns['transition'], categories=transitions),
+        'metric': pd.Categorical.from_codes(columns['metric'], categories=METRICS),
+        'value': columns['value']
+    }, columns=COLUMNS)
+
+
+def from_results(results, graph, replication=0):
+    """تبدیل دیکشنری نتایج سال به سال (simulate_career_progression) به جدول بلند"""
+    years = np.array(list(results.keys()), dtype=np.int64)
+    first = results[years[0]] if len(years) else {}
+    positions = list(first.get(HEADCOUNT, graph.initial_positions()))
+    transitions = list(first.get(PROMOTIONS, {}))
+
+    headcount = np.array([[data[HEADCOUNT].get(p, 0) for p in positions] for data in results.values()],
+                         dtype=np.float64).reshape(1, len(years), len(positions))
+    usage = np.array([[data.get(CAPACITY_USAGE, {}).get(p, np.nan) for p in positions]
+                      for data in results.values()], dtype=np.float64).reshape(1, len(years), len(positions))
+    promotions = np.array([[data[PROMOTIONS].get(t, 0) for t in transitions] for data in results.values()],
+                          dtype=np.float64).reshape(1, len(years), len(transitions))
+    hires = np.array([data[HIRES] for data in results.values()], dtype=np.float64).reshape(1, -1, 1)
+    retirements = np.array([data[RETIREMENTS] for data in results.values()], dtype=np.float64).reshape(1, -1, 1)
+
+    position_codes = np.arange(len(positions))
+    table = _assemble([
+        _block(HEADCOUNT, headcount, years, position=position_codes),
+        _block(HIRES, hires, years),
+        _block(RETIREMENTS, retirements, years),
+        _block(PROMOTIONS, promotions, years, transition=np.arange(len(transitions))),
+        _block(CAPACITY_USAGE, usage, years, position=position_codes)
+    ], graph, positions, transitions)
+    table['replication'] = np.full(len(table), replication, dtype=np.int32)
+    return table
+
+
+def from_ensemble(ensemble, graph, annual_hiring=None):
+    """جدول بلند همه تکرارهای run_ensemble بدون حلقه پایتونی روی تکرارها"""
+    trajectory = ensemble[HEADCOUNT]
+    replications, year_count, _ = trajectory.shape
+    years = ensemble['years']
+    positions = list(ensemble['positions'])
+    transitions = list(ensemble['transitions'])
+
+    blocks = [
+        _block(HEADCOUNT, trajectory, years, position=np.arange(len(positions))),
+        _block(RETIREMENTS, ensemble[RETIREMENTS][..., None], years),
+        _block(PROMOTIONS, ensemble[PROMOTIONS], years, transition=np.arange(len(transitions)))
+    ]
+    if annual_hiring is not None:
+        blocks.append(_block(HIRES, np.full((replications, year_count, 1), annual_hiring), years))
+    return _assemble(blocks, graph, positions, transitions)
+
+
+def metric_rows(table, metric):
+    """سطرهای یک معیار"""
+    return table[table['metric'] == metric]
+
+
+def yearly_total(table, metric):
+    """مجموع معیار در هر سال (میانگین بین تکرارها)"""
+    rows = metric_rows(table, metric)
+    per_replication = rows.groupby(['replication', 'year'], observed=True)['value'].sum()
+    return per_replication.groupby(level='year').mean()
+
+
+def position_pivot(table, metric):
+    """ماتریس سال × سمت یک معیار (میانگین بین تکرارها)"""
+    rows = metric_rows(table, metric)
+    return rows.pivot_table(index='year', columns='position', values='value', aggfunc='mean', observed=True)
+
+
+def summary_frame(table):
+    """جدول خلاصه سال به سال (برای نمایش نهایی و به‌روزرسانی در حین اجرا)"""
+    headcount = position_pivot(table, HEADCOUNT)
+    columns = {
+        'رئیس_شعبه_درجه4': 'رئیس شعبه درجه 4',
+        'رئیس_شعبه_درجه3': 'رئیس شعبه درجه 3',
+        'رئیس_شعبه_درجه2': 'رئیس شعبه درجه 2',
+        'رئیس_شعبه_درجه1': 'رئیس شعبه درجه 1',
+        'رئیس_شعبه_ممتاز': 'رئیس شعبه ممتاز',
+        'معاون_مدیر_شعب': 'معاون مدیر شعب',
+        'مدیر_شعب': 'مدیر شعب'
+    }
+
+    summary = pd.DataFrame({
+        'سال': headcount.index,
+        'استخدام جدید': yearly_total(table, HIRES).values,
+        'بازنشستگی': yearly_total(table, RETIREMENTS).values,
+        'کل پرسنل': headcount.sum(axis=1).values
+    })
+    for position, label in columns.items():
+        summary[label] = headcount[position].values
+    return summary.astype('int64')
+
+
+def to_parquet_bytes(table):
+    """خروجی Parquet جدول (نیازمند pyarrow یا fastparquet)"""
+    buffer = io.BytesIO()
+    try:
+        table.to_parquet(buffer, index=False)
+    except ImportError as exc:
+        raise ImportError("برای خروجی Parquet بسته pyarrow لازم است") from exc
+    return buffer.getvalue()
@@ -0,0 +1,168 @@
+"""بارگذاری فهرست واقعی کارکنان برای وضعیت اولیه شبیه‌سازی
+
+فایل CSV یا Parquet (ستون‌های position، grade اختیاری، hire_date و birth_date به قالب YYYY-MM-DD)
+تکه به تکه خوانده می‌شود و هر تکه مستقیماً در آرایه شمارش گره × سابقه × سن
+جمع می‌شود؛ بنابراین فایل خام هیچ‌وقت به طور کامل در حافظه نیست. سمت و درجه
+به صورت categorical خوانده و با یک جدول کوچک به شناسه گره تبدیل می‌شوند.
+نتیجه (RosterSnapshot) کوچک است و با cached_roster در ResultCache ذخیره می‌شود.
+"""
+import datetime
+import hashlib
+import os
+
+import numpy as np
+
+from cache import scenario_key
+from orgchart import NO_GRADE, load_graph
+
+POSITION = 'position'
+GRADE = 'grade'
+HIRE_DATE = 'hire_date'
+BIRTH_DATE = 'birth_date'
+# قالب تاریخ‌های متنی (ISO)؛ ستون‌های تاریخ Parquet بدون تبدیل متنی خوانده می‌شوند
+DATE_FORMAT = '%Y-%m-%d'
+
+# ستون آخر سابقه برای MAX_TENURE سال و بیشتر؛ سن‌ها به بازه MIN_AGE تا MAX_AGE بریده می‌شوند
+MAX_TENURE = 40
+MIN_AGE = 18
+MAX_AGE = 70
+
+CHUNK_ROWS = 50000
+DAYS_PER_YEAR = 365.2425
+
+
+class RosterSnapshot:
+    """شمارش کارکنان هر گره بر حسب سال سابقه و سن در تاریخ as_of"""
+
+    def __init__(self, counts, as_of, rows, skipped, source_key):
+        self.counts = counts  # (گره، سابقه 0..MAX_TENURE، سن MIN_AGE..MAX_AGE)
+        self.as_of = as_of
+        self.rows = rows
+        self.skipped = skipped
+        self.source_key = source_key
+
+    def node_totals(self):
+        return self.counts.sum(axis=(1, 2))
+
+    def tenure_matrix(self, buckets):
+        """ماتریس گره × سابقه با buckets ستون؛ ستون آخر باقی سابقه‌ها را انباشته می‌کند"""
+        tenure = self.counts.sum(axis=2)
+        matrix = tenure[:, :buckets].copy()
+        matrix[:, -1] += tenure[:, buckets:].sum(axis=1)
+        return matrix
+
+    def cells(self):
+        """(گره، سابقه، سن، تعداد) خانه‌های غیرصفر برای ساخت جمعیت عامل‌ها"""
+        flat = np.flatnonzero(self.counts)
+        node, tenure, age = np.unravel_index(flat, self.counts.shape)
+        return node, tenure, age + MIN_AGE, self.counts.ravel()[flat]
+
+
+def _is_parquet(source):
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    return str(name).endswith(('.parquet', '.pq'))
+
+
+def iter_chunks(source, chunk_rows=CHUNK_ROWS):
+    """تکه‌های DataFrame فایل با سمت و درجه categorical (فقط ستون‌های لازم)"""
+    import pandas as pd
+
+    if _is_parquet(source):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("برای خواندن فهرست Parquet بسته pyarrow لازم است") from exc
+        parquet = pq.ParquetFile(source, read_dictionary=[POSITION, GRADE])
+        columns = [column for column in (POSITION, GRADE, HIRE_DATE, BIRTH_DATE)
+                   if column in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(
+        source, chunksize=chunk_rows,
+        usecols=lambda column: column in (POSITION, GRADE, HIRE_DATE, BIRTH_DATE),
+        dtype={POSITION: 'category', GRADE: 'category'}
+    )
+
+
+def _codes(column, index):
+    """شناسه هر ردیف از روی دسته‌های categorical؛ -1 برای مقدار ناشناخته یا خالی"""
+    column = column.astype('category')
+    lookup = np.array([index.get(str(value), -1) for value in column.cat.categories] + [-1], dtype=np.int64)
+    return lookup[column.cat.codes.to_numpy()]
+
+
+def _years_before(dates, as_of):
+    """سال‌های کامل از dates تا as_of (NaN برای تاریخ نامعتبر یا غیر DATE_FORMAT)"""
+    import pandas as pd
+
+    parsed = pd.to_datetime(dates, format=DATE_FORMAT, errors='coerce')
+    days = (pd.Timestamp(as_of) - parsed).dt.days.to_numpy(dtype=np.float64)
+    return np.floor(days / DAYS_PER_YEAR)
+
+
+def load_roster(source, graph=None, as_of=None, chunk_rows=CHUNK_ROWS):
+    """خواندن تکه‌ای فهرست و ساخت RosterSnapshot؛ ردیف‌های نامعتبر شمرده و کنار گذاشته می‌شوند"""
+    graph = graph or load_graph()
+    as_of = as_of or datetime.date.today()
+    position_index = {position: i for i, position in enumerate(graph.positions)}
+    grade_index = {grade: i for i, grade in enumerate(graph.grades)}
+    ages = MAX_AGE - MIN_AGE + 1
+    shape = (len(graph.node_names), MAX_TENURE + 1, ages)
+    counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+    rows = skipped = 0
+    source_key = source_fingerprint(source)
+
+    for chunk in iter_chunks(source, chunk_rows):
+        missing = {POSITION, HIRE_DATE, BIRTH_DATE} - set(chunk.columns)
+        if missing:
+            raise ValueError(f"ستون‌های لازم در فهرست کارکنان نیست: {', '.join(sorted(missing))}")
+
+        position = _codes(chunk[POSITION], position_index)
+        grade = _codes(chunk[GRADE], grade_index) if GRADE in chunk.columns else np.full(len(chunk), NO_GRADE)
+        # گره (سمت، درجه)؛ برای سمت‌های بدون درجه ستون اول جدول جستجو
+        lookup = graph.node_lookup[np.maximum(position, 0)]
+        node = lookup[np.arange(len(lookup)), grade + 1]
+        node = np.where(node >= 0, node, lookup[:, 0])
+        node = np.where(position >= 0, node, -1)
+        tenure = _years_before(chunk[HIRE_DATE], as_of)
+        age = _years_before(chunk[BIRTH_DATE], as_of)
+
+        valid = (node >= 0) & (tenure >= 0) & np.isfinite(age)
+        tenure = np.minimum(tenure[valid], MAX_TENURE).astype(np.int64)
+        age = np.clip(age[valid], MIN_AGE, MAX_AGE).astype(np.int64) - MIN_AGE
+        flat = (node[valid] * (MAX_TENURE + 1) + tenure) * ages + age
+        counts += np.bincount(flat, minlength=len(counts))
+
+        rows += len(chunk)
+        skipped += int((~valid).sum())
+
+    return RosterSnapshot(counts.reshape(shape), as_of, rows, skipped, source_key)
+
+
+def source_fingerprint(source):
+    """شناسه محتوای فایل: مسیر، اندازه و زمان تغییر برای فایل روی دیسک و هش محتوا برای فایل باز"""
+    if isinstance(source, str):
+        stat = os.stat(source)
+        return scenario_key(path=os.path.abspath(source), size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    digest = hashlib.sha256()
+    position = source.tell()
+    for block in iter(lambda: source.read(1 << 20), b''):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def cached_roster(source, cache, graph=None, as_of=None):
+    """RosterSnapshot از کش (حافظه یا دیسک) یا در صورت نبود، با خواندن فایل"""
+    graph = graph or load_graph()
+    as_of = as_of or datetime.date.today()
+    key = scenario_key(roster=source_fingerprint(source), org_chart=graph.fingerprint(), as_of=as_of.isoformat(),
+                       max_tenure=MAX_TENURE, ages=[MIN_AGE, MAX_AGE])
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = load_roster(source, graph, as_of)
+        cache.put(key, snapshot)
+    return snapshot
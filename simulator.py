@@ -0,0 +1,393 @@
+"""هسته شبیه‌سازی بدون وابستگی به Streamlit یا Plotly
+
+SuccessionSimulator پارامترهای پیش‌فرض و همه محاسبات شبیه‌سازی را دارد و از
+داشبورد (app.py)، خط فرمان (cli.py) یا هر اسکریپت دیگری قابل استفاده است.
+موتورهای جایگزین، فهرست کارکنان و جدول نتایج (pandas) فقط هنگام استفاده وارد
+می‌شوند تا شروع داشبورد سبک بماند.
+"""
+import copy
+import datetime
+
+import numpy as np
+
+from engine import VectorizedEngine, retirement_rate
+from orgchart import load_graph
+from profiling import NULL_PROFILER
+from capacity import node_capacity, position_capacity
+
+# نام موتورهای iter_career_progression
+ENGINES = ('vectorized', 'regional', 'cohort', 'agent', 'legacy')
+
+
+class SuccessionSimulator:
+    """پارامترهای پیش‌فرض و موتورهای شبیه‌سازی (بدون رابط کاربری)"""
+
+    def __init__(self):
+        # ظرفیت‌های پیش‌فرض مختلف شعب
+        self.default_capacity = {
+            'رئیس_شعبه': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 180},
+            'معاون_شعبه': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 360},
+            'رئیس_صندوق': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 180},
+            'رئیس_اعتبارات': {'درجه4': 240, 'درجه3': 720, 'درجه2': 230, 'درجه1': 100, 'ممتاز': 80},
+            'بانکدار': {'درجه4': 960, 'درجه3': 2880, 'درجه2': 1380, 'درجه1': 600, 'ممتاز': 1800},
+            'معاون_مدیر_شعب': 105,
+            'مدیر_شعب': 35
+        }
+
+        # احتمالات انتقال پیش‌فرض
+        self.default_probabilities = {
+            'بانکدار_to_رئیس_دایره4': 0.6,
+            'رئیس_دایره4_to_رئیس_دایره_ممتاز': 0.7,
+            'رئیس_دایره4_to_معاون_شعبه4': 0.3,
+            'معاون_شعبه4_to_رئیس_شعبه4': 0.5,
+            'معاون_شعبه4_to_رئیس_شعبه3': 0.2,
+            'معاون_شعبه4_to_معاون_شعبه3': 0.3,
+            'رئیس_شعبه4_to_رئیس_شعبه3': 0.5,
+            'رئیس_شعبه4_to_رئیس_شعبه2': 0.2,
+            'رئیس_شعبه4_to_معاون_شعبه2': 0.3,
+            'رئیس_شعبه3_to_رئیس_شعبه2': 0.4,
+            'رئیس_شعبه3_to_رئیس_شعبه1': 0.1,
+            'رئیس_شعبه3_to_معاون_شعبه1': 0.1,
+            'رئیس_شعبه3_retire': 0.4,
+            'رئیس_شعبه2_to_رئیس_شعبه1': 0.4,
+            'رئیس_شعبه2_to_رئیس_شعبه_ممتاز': 0.1,
+            'رئیس_شعبه2_to_معاون_شعبه_ممتاز': 0.1,
+            'رئیس_شعبه2_retire': 0.4,
+            'رئیس_شعبه1_to_رئیس_شعبه_ممتاز': 0.5,
+            'رئیس_شعبه1_to_معاون_مدیر': 0.1,
+            'رئیس_شعبه1_to_مدیر_شعب': 0.1,
+            'رئیس_شعبه1_retire': 0.3,
+            'رئیس_شعبه_ممتاز_to_معاون_مدیر': 0.2,
+            'رئیس_شعبه_ممتاز_to_مدیر_شعب': 0.1,
+            'رئیس_شعبه_ممتاز_retire': 0.4,
+            'معاون_مدیر_to_مدیر_شعب': 0.3,
+            'معاون_مدیر_retire': 0.7
+        }
+
+        # سال‌های پیش‌فرض مورد نیاز برای انتقال
+        self.default_years_required = {
+            'بانکدار_to_رئیس_دایره4': 3,
+            'رئیس_دایره4_to_رئیس_دایره_ممتاز': 2,
+            'رئیس_دایره4_to_معاون_شعبه4': 2,
+            'معاون_شعبه4_to_رئیس_شعبه4': 3,
+            'معاون_شعبه4_to_رئیس_شعبه3': 4,
+            'معاون_شعبه4_to_معاون_شعبه3': 2,
+            'رئیس_شعبه4_to_رئیس_شعبه3': 3,
+            'رئیس_شعبه4_to_رئیس_شعبه2': 5,
+            'رئیس_شعبه4_to_معاون_شعبه2': 4,
+            'رئیس_شعبه3_to_رئیس_شعبه2': 3,
+            'رئیس_شعبه3_to_رئیس_شعبه1': 5,
+            'رئیس_شعبه3_to_معاون_شعبه1': 4,
+            'رئیس_شعبه2_to_رئیس_شعبه1': 3,
+            'رئیس_شعبه2_to_رئیس_شعبه_ممتاز': 4,
+            'رئیس_شعبه2_to_معاون_شعبه_ممتاز': 3,
+            'رئیس_شعبه1_to_رئیس_شعبه_ممتاز': 4,
+            'رئیس_شعبه1_to_معاون_مدیر': 5,
+            'رئیس_شعبه1_to_مدیر_شعب': 7,
+            'رئیس_شعبه_ممتاز_to_معاون_مدیر': 4,
+            'رئیس_شعبه_ممتاز_to_مدیر_شعب': 6,
+            'معاون_مدیر_to_مدیر_شعب': 3
+        }
+
+        # آمار بازنشستگی
+        self.retirement_stats = {
+            '5_years': 0.5,
+            '10_years': 0.8,
+            '15_years': 1.0
+        }
+
+    def simulate_career_progression(self, years, probabilities, years_required, capacity, annual_hiring,
+                                    engine='vectorized', seed=None, profiler=None, graph=None,
+                                    retirement_acceleration=1.0):
+        """شبیه‌سازی پیشرفت شغلی با در نظر گیری سال‌های مورد نیاز"""
+        return dict(self.iter_career_progression(
+            years, probabilities, years_required, capacity, annual_hiring, engine, seed, profiler, graph=graph,
+            retirement_acceleration=retirement_acceleration
+        ))
+
+    def iter_career_progression(self, years, probabilities, years_required, capacity, annual_hiring,
+                                engine='vectorized', seed=None, profiler=None, start=None, checkpoint=None,
+                                graph=None, retirement_acceleration=1.0):
+        """نسخه جریانی simulate_career_progression: (سال، نتایج سال) به محض محاسبه
+
+        با profiler (profiling.PhaseProfiler) مدت هر مرحله سال ثبت می‌شود. با start
+        (نقطه بازیابی اجرای قبلی با همین پارامترها) فقط سال‌های بعد از آن محاسبه
+        می‌شوند و دیکشنری checkpoint پس از هر سال به‌روز می‌شود. graph (پیش‌فرض
+        load_graph) می‌تواند وضعیت اولیه فهرست کارکنان را داشته باشد. engine='regional'
+        شبیه‌سازی شعبه به شعبه (regions.py) و جمع کشوری آن است و همیشه تصادفی است.
+        engine='cohort' بازنشستگی را با جدول سنی retirement_stats و ضریب
+        retirement_acceleration حساب می‌کند (cohorts.py) و engine='legacy' مسیر
+        دیکشنری قدیمی است؛ هر نام دیگر ValueError می‌دهد.
+        """
+        if engine == 'vectorized':
+            yield from VectorizedEngine(probabilities, years_required, capacity, annual_hiring, graph=graph,
+                                        profiler=profiler).iter_run(years, start, checkpoint)
+            return
+        if engine == 'regional':
+            from regions import RegionalSimulation
+
+            yield from RegionalSimulation(probabilities, years_required, capacity, annual_hiring, graph=graph,
+                                          seed=seed, profiler=profiler).iter_run(years, start, checkpoint)
+            return
+        if engine == 'cohort':
+            from cohorts import CohortEngine
+
+            yield from CohortEngine(probabilities, years_required, capacity, annual_hiring, self.retirement_stats,
+                                    retirement_acceleration, graph=graph,
+                                    profiler=profiler).iter_run(years, start, checkpoint)
+            return
+        if engine == 'agent':
+            from agents import AgentEngine
+
+            yield from AgentEngine(probabilities, years_required, capacity, annual_hiring, graph=graph, seed=seed,
+                                   profiler=profiler).iter_run(years, start, checkpoint)
+            return
+        if engine != 'legacy':
+            raise ValueError(f"موتور ناشناخته: {engine!r} (یکی از {', '.join(ENGINES)})")
+
+        profiler = profiler or NULL_PROFILER
+
+        if start:
+            first, (current_positions, position_tenure) = start['year'], copy.deepcopy(start['state'])
+        else:
+            first = 0
+
+            # وضعیت اولیه مناصب (فرضی بر اساس ظرفیت‌ها)
+            current_positions = (graph or load_graph()).initial_positions()
+
+            # ردیابی سابقه کاری (چه مدت در هر سمت بوده‌اند)
+            position_tenure = {position: {} for position in current_positions.keys()}
+
+        # محاسبه تغییرات در طول سال‌های مختلف
+        for year in range(first + 1, years + 1):
+            # شبیه‌سازی استخدام جدید
+            new_hires = annual_hiring
+
+            # شبیه‌سازی بازنشستگی
+            with profiler.phase('retirement'):
+                total_retirements = int(sum(current_positions.values()) * retirement_rate(year))
+
+            # شبیه‌سازی ارتقاء با در نظر گیری سال‌های مورد نیاز
+            with profiler.phase('promotions'):
+                promotions = self.calculate_promotions_with_tenure(
+                    probabilities, years_required, current_positions, position_tenure
+                )
+
+            # به‌روزرسانی سابقه کاری
+            with profiler.phase('tenure'):
+                position_tenure = self.update_tenure(position_tenure, current_positions)
+
+            # به‌روزرسانی تعداد افراد در هر سمت (استخدام، بازنشستگی و ارتقا)
+            with profiler.phase('hiring'):
+                current_positions = self.update_positions(
+                    current_positions, promotions, new_hires, total_retirements
+                )
+
+            # بررسی ظرفیت‌ها و تنظیم
+            with profiler.phase('capacity'):
+                current_positions = self.adjust_for_capacity(current_positions, capacity)
+
+            if checkpoint is not None:
+                checkpoint.update(year=year, state=copy.deepcopy((current_positions, position_tenure)), rng=None)
+
+            yield year, {
+                'استخدام_جدید': new_hires,
+                'بازنشستگی': total_retirements,
+                'ارتقاءها': promotions,
+                'وضعیت_مناصب': current_positions.copy(),
+                'ظرفیت_استفاده': self.calculate_capacity_usage(current_positions, capacity)
+            }
+
+    def simulate_ensemble(self, years, probabilities, years_required, capacity, annual_hiring,
+                          replications, seed=None, workers=1, profiler=None, graph=None):
+        """اجرای مونت‌کارلو (در صورت نیاز موازی) و محاسبه میانه و بازه‌های صدکی
+
+        مراحل پردازه‌های کارگر ثبت نمی‌شوند؛ فقط اجرای تک‌پردازه‌ای پروفایل می‌شود.
+        """
+        from parallel import run_parallel_ensemble
+
+        engine = VectorizedEngine(probabilities, years_required, capacity, annual_hiring, graph=graph,
+                                  profiler=profiler if workers <= 1 else None)
+        return run_parallel_ensemble(engine, years, replications, seed, workers)
+
+    def update_tenure(self, position_tenure, current_positions):
+        """به‌روزرسانی سابقه کاری"""
+        new_tenure = {}
+
+        for position in current_positions.keys():
+            new_tenure[position] = {}
+            # هر سال یک سال به سابقه همه اضافه می‌شود
+            for tenure_years in range(1, 11):  # حداکثر 10 سال ردیابی
+                if tenure_years == 1:
+                    # جدید وارد شده‌ها
+                    new_tenure[position][tenure_years] = current_positions[position] // 10
+                else:
+                    # سابقه‌داران
+                    prev_count = position_tenure.get(position, {}).get(tenure_years - 1, 0)
+                    new_tenure[position][tenure_years] = prev_count
+
+        return new_tenure
+
+    def calculate_promotions_with_tenure(self, probabilities, years_required, current_positions, position_tenure):
+        """محاسبه تعداد ارتقاءهای مختلف با در نظر گیری سال‌های مورد نیاز"""
+        promotions = {}
+
+        # محاسبه ارتقاءها بر اساس تعداد فعلی، احتمالات و سابقه
+        for transition, prob in probabilities.items():
+            if 'retire' not in transition:
+                required_years = years_required.get(transition, 3)
+
+                # پیدا کردن کسانی که واجد شرایط سابقه کاری هستند
+                source_position = transition.split('_to_')[0].replace('بانکدار', 'بانکدار')
+
+                if source_position in current_positions:
+                    # کسانی که سابقه کافی دارند
+                    eligible_count = 0
+                    for tenure_years, count in position_tenure.get(source_position, {}).items():
+                        if tenure_years >= required_years:
+                            eligible_count += count
+
+                    # اگر اطلاعات دقیق سابقه نداشته باشیم، فرض کنیم نیمی واجد شرایط هستند
+                    if eligible_count == 0:
+                        eligible_count = current_positions[source_position] // 2
+
+                    # محاسبه تعداد ارتقا
+                    promotion_count = int(eligible_count * prob * 0.1)  # ضریب تعدیل
+                    promotions[transition] = promotion_count
+
+        return promotions
+
+    def adjust_for_capacity(self, current_positions, capacity):
+        """تنظیم تعداد کارکنان بر اساس ظرفیت‌ها"""
+        adjusted_positions = current_positions.copy()
+
+        # تنظیم بر اساس ظرفیت‌های تعریف شده
+        # (این قسمت می‌تواند پیچیده‌تر شود بسته به نیاز)
+
+        return adjusted_positions
+
+    def calculate_capacity_usage(self, current_positions, capacity):
+        """محاسبه درصد استفاده از ظرفیت"""
+        graph = load_graph()
+        limits = position_capacity(graph, node_capacity(graph, capacity))
+
+        # درصد واقعی (بدون سقف) فقط برای سمت‌های دارای ظرفیت محدود
+        return {position: current_positions[position] / limit * 100
+                for position, limit in zip(graph.positions, limits)
+                if np.isfinite(limit) and position in current_positions}
+
+    def calculate_promotions(self, probabilities, current_positions):
+        """محاسبه تعداد ارتقاءهای مختلف (متد اصلی)"""
+        promotions = {}
+
+        # محاسبه ارتقاءها بر اساس تعداد فعلی و احتمالات
+        promotions['بانکدار_به_رئیس_دایره'] = int(
+            current_positions['بانکدار'] * 0.1 * probabilities.get('بانکدار_to_رئیس_دایره4', 0.6)
+        )
+
+        promotions['رئیس_دایره_به_معاون'] = int(
+            200 * probabilities.get('رئیس_دایره4_to_معاون_شعبه4', 0.3)
+        )
+
+        promotions['معاون_شعبه4_به_رئیس_شعبه4'] = int(
+            current_positions['معاون_شعبه'] * 0.2 * probabilities.get('معاون_شعبه4_to_رئیس_شعبه4', 0.5)
+        )
+
+        promotions['رئیس_شعبه4_به_رئیس_شعبه3'] = int(
+            current_positions['رئیس_شعبه_درجه4'] * 0.33 * probabilities.get('رئیس_شعبه4_to_رئیس_شعبه3', 0.5)
+        )
+
+        promotions['رئیس_شعبه3_به_رئیس_شعبه2'] = int(
+            current_positions['رئیس_شعبه_درجه3'] * 0.33 * probabilities.get('رئیس_شعبه3_to_رئیس_شعبه2', 0.4)
+        )
+
+        promotions['رئیس_شعبه2_به_رئیس_شعبه1'] = int(
+            current_positions['رئیس_شعبه_درجه2'] * 0.33 * probabilities.get('رئیس_شعبه2_to_رئیس_شعبه1', 0.4)
+        )
+
+        promotions['رئیس_شعبه1_به_رئیس_شعبه_ممتاز'] = int(
+            current_positions['رئیس_شعبه_درجه1'] * 0.33 * probabilities.get('رئیس_شعبه1_to_رئیس_شعبه_ممتاز', 0.5)
+        )
+
+        promotions['رئیس_شعبه_ممتاز_به_معاون_مدیر'] = int(
+            current_positions['رئیس_شعبه_ممتاز'] * 0.33 * probabilities.get('رئیس_شعبه_ممتاز_to_معاون_مدیر', 0.2)
+        )
+
+        promotions['معاون_مدیر_به_مدیر'] = int(
+            current_positions['معاون_مدیر_شعب'] * 0.33 * probabilities.get('معاون_مدیر_to_مدیر_شعب', 0.3)
+        )
+
+        return promotions
+
+    def update_positions(self, current_positions, promotions, new_hires, retirements):
+        """به‌روزرسانی تعداد افراد در هر سمت"""
+        new_positions = current_positions.copy()
+
+        # اضافه کردن افراد جدید (عمدتاً بانکدار)
+        new_positions['بانکدار'] += new_hires
+
+        # کم کردن بازنشسته‌ها (تناسبی از همه سمت‌ها)
+        total_current = sum(current_positions.values())
+        for position in new_positions:
+            retirement_from_position = int(retirements * (current_positions[position] / total_current))
+            new_positions[position] = max(0, new_positions[position] - retirement_from_position)
+
+        # اعمال ارتقاءها
+        # کم کردن از سمت‌های پایین‌تر
+        new_positions['بانکدار'] -= promotions.get('بانکدار_به_رئیس_دایره', 0)
+        new_positions['معاون_شعبه'] -= promotions.get('معاون_شعبه4_به_رئیس_شعبه4', 0)
+        new_positions['رئیس_شعبه_درجه4'] -= promotions.get('رئیس_شعبه4_به_رئیس_شعبه3', 0)
+        new_positions['رئیس_شعبه_درجه3'] -= promotions.get('رئیس_شعبه3_به_رئیس_شعبه2', 0)
+        new_positions['رئیس_شعبه_درجه2'] -= promotions.get('رئیس_شعبه2_به_رئیس_شعبه1', 0)
+        new_positions['رئیس_شعبه_درجه1'] -= promotions.get('رئیس_شعبه1_به_رئیس_شعبه_ممتاز', 0)
+        new_positions['رئیس_شعبه_ممتاز'] -= promotions.get('رئیس_شعبه_ممتاز_به_معاون_مدیر', 0)
+        new_positions['معاون_مدیر_شعب'] -= promotions.get('معاون_مدیر_به_مدیر', 0)
+
+        # اضافه کردن به سمت‌های بالاتر
+        new_positions['معاون_شعبه'] += promotions.get('رئیس_دایره_به_معاون', 0)
+        new_positions['رئیس_شعبه_درجه4'] += promotions.get('معاون_شعبه4_به_رئیس_شعبه4', 0)
+        new_positions['رئیس_شعبه_درجه3'] += promotions.get('رئیس_شعبه4_به_رئیس_شعبه3', 0)
+        new_positions['رئیس_شعبه_درجه2'] += promotions.get('رئیس_شعبه3_به_رئیس_شعبه2', 0)
+        new_positions['رئیس_شعبه_درجه1'] += promotions.get('رئیس_شعبه2_به_رئیس_شعبه1', 0)
+        new_positions['رئیس_شعبه_ممتاز'] += promotions.get('رئیس_شعبه1_به_رئیس_شعبه_ممتاز', 0)
+        new_positions['معاون_مدیر_شعب'] += promotions.get('رئیس_شعبه_ممتاز_به_معاون_مدیر', 0)
+        new_positions['مدیر_شعب'] += promotions.get('معاون_مدیر_به_مدیر', 0)
+
+        # اطمینان از مثبت بودن تمام مقادیر
+        for position in new_positions:
+            new_positions[position] = max(0, new_positions[position])
+
+        return new_positions
+
+    def scenario_parameters(self, scenario):
+        """ادغام یک سناریو با مقادیر پیش‌فرض؛ کلیدهای احتمال و سال جداگانه جایگزین می‌شوند"""
+        return {
+            'years': int(scenario.get('years', 10)),
+            'probabilities': {**self.default_probabilities, **scenario.get('probabilities', {})},
+            'years_required': {**self.default_years_required, **scenario.get('years_required', {})},
+            'capacity': {**self.default_capacity, **scenario.get('capacity', {})},
+            'annual_hiring': int(scenario.get('annual_hiring', 500)),
+            'engine': scenario.get('engine', 'vectorized'),
+            'retirement_acceleration': float(scenario.get('retirement_acceleration', 1.0)),
+            'seed': scenario.get('seed'),
+            'roster': scenario.get('roster'),
+            'as_of': scenario.get('as_of')
+        }
+
+    def run_scenario(self, scenario):
+        """اجرای یک سناریو و بازگرداندن جدول بلند نتایج"""
+        import results_table as rt
+        from roster import load_roster
+
+        params = self.scenario_parameters(scenario)
+        graph = load_graph()
+        if params['roster']:
+            as_of = datetime.date.fromisoformat(str(params['as_of'])) if params['as_of'] else None
+            graph = graph.with_roster(load_roster(params['roster'], graph, as_of))
+
+        results = self.simulate_career_progression(
+            params['years'], params['probabilities'], params['years_required'], params['capacity'],
+            params['annual_hiring'], engine=params['engine'], seed=params['seed'], graph=graph,
+            retirement_acceleration=params['retirement_acceleration']
+        )
+        return rt.from_results(results, graph)
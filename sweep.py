@@ -0,0 +1,235 @@
+"""جاروب دسته‌ای پارامترها و تحلیل حساسیت (نمودار گردبادی)
+
+هر نقطه پارامتر یک ردیف از محور دسته موتور برداری است: نرخ یال‌ها، سال‌های
+لازم، استخدام سالانه و ظرفیت گره‌ها به جای عدد ثابت آرایه‌ای با یک مقدار برای
+هر نقطه‌اند، پس هزاران نقطه با همان عملیات ماتریسی یک اجرای قطعی حساب می‌شوند.
+
+نام پارامترها:
+    کلید یال (مثل 'بانکدار_to_رئیس_دایره4')  احتمال انتقال
+    'years:' + کلید یال                      سال‌های لازم
+    'annual_hiring'                           استخدام سالانه
+    'capacity:' + گروه سمت [+ ':' + درجه]     ظرفیت (مثل 'capacity:رئیس_شعبه:درجه3')
+
+ظرفیت گروه‌هایی که به هیچ گره‌ای از گراف نمی‌رسند (مثل رئیس_صندوق در نمودار پیش‌فرض)
+جاروب‌پذیر نیست؛ parameter_names آن‌ها را کنار می‌گذارد و relative_ranges رد می‌کند.
+"""
+import copy
+import itertools
+
+import numpy as np
+
+from capacity import node_capacity
+from engine import PROMOTION_SCALE, VectorizedEngine
+from orgchart import load_graph
+
+ANNUAL_HIRING = 'annual_hiring'
+YEARS_PREFIX = 'years:'
+CAPACITY_PREFIX = 'capacity:'
+
+# خروجی‌های پیش‌فرض تحلیل حساسیت: گروه سمت‌ها بر اساس پیشوند نام
+TARGETS = ('مدیر_شعب', 'رئیس_شعبه')
+
+
+def base_value(name, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """مقدار فعلی یک پارامتر جاروب"""
+    graph = (graph or load_graph()).with_parameters(probabilities, years_required)
+    if name == ANNUAL_HIRING:
+        return annual_hiring
+    if name.startswith(YEARS_PREFIX):
+        return int(graph.edge_min_years[_edge(graph, name[len(YEARS_PREFIX):], years=True)])
+    if name.startswith(CAPACITY_PREFIX):
+        group, _, grade = name[len(CAPACITY_PREFIX):].partition(':')
+        setting = (capacity or {}).get(group)
+        if grade:
+            if not isinstance(setting, dict) or grade not in setting:
+                raise ValueError(f"ظرفیت ناشناخته: {name}")
+            return setting[grade]
+        if setting is None or isinstance(setting, dict):
+            raise ValueError(f"ظرفیت ناشناخته: {name}")
+        return setting
+    return float(graph.edge_prob[_edge(graph, name)])
+
+
+def _edge(graph, key, years=False):
+    if key not in graph.edge_index:
+        raise ValueError(f"پارامتر ناشناخته: {key}")
+    edge = graph.edge_index[key]
+    if years and graph.edge_is_exit[edge]:
+        raise ValueError(f"یال بازنشستگی سال لازم ندارد: {key}")
+    return edge
+
+
+def capacity_nodes(name, capacity, graph=None):
+    """گره‌هایی که سقف آن‌ها با پارامتر ظرفیت name تغییر می‌کند (آرایه اندیس‌ها)"""
+    graph = graph or load_graph()
+    base = node_capacity(graph, capacity)
+    moved = node_capacity(graph, _with_capacity(capacity, [name], [base_value(name, {}, {}, capacity, 0, graph) + 1]))
+    return np.flatnonzero(base != moved)
+
+
+def parameter_label(name):
+    """برچسب فارسی پارامتر برای نمودار"""
+    if name == ANNUAL_HIRING:
+        return "استخدام سالانه"
+    if name.startswith(YEARS_PREFIX):
+        return f"سال لازم {name[len(YEARS_PREFIX):]}"
+    if name.startswith(CAPACITY_PREFIX):
+        return f"ظرفیت {name[len(CAPACITY_PREFIX):].replace(':', ' ')}"
+    return f"احتمال {name}"
+
+
+def parameter_names(probabilities, years_required, capacity, graph=None):
+    """همه پارامترهای قابل جاروب برای تنظیمات فعلی که به یالی یا گره‌ای از گراف می‌رسند"""
+    graph = graph or load_graph()
+    names = [key for key in probabilities if key in graph.edge_index]
+    names += [YEARS_PREFIX + key for key in years_required
+              if key in graph.edge_index and not graph.edge_is_exit[graph.edge_index[key]]]
+    names.append(ANNUAL_HIRING)
+    for group, setting in (capacity or {}).items():
+        if isinstance(setting, dict):
+            grouped = [f"{CAPACITY_PREFIX}{group}:{grade}" for grade in setting]
+        else:
+            grouped = [CAPACITY_PREFIX + group]
+        names += [name for name in grouped if len(capacity_nodes(name, capacity, graph))]
+    return names
+
+
+def policy_names(probabilities):
+    """پارامترهای سیاست بهینه‌ساز: استخدام سالانه و احتمال یال‌های ارتقا (بدون بازنشستگی)"""
+    return [ANNUAL_HIRING] + [key for key in probabilities if 'retire' not in key]
+
+
+def relative_ranges(names, spread, probabilities, years_required, capacity, annual_hiring, graph=None):
+    """بازه ±spread (نسبی) حول مقدار فعلی هر پارامتر؛ پارامتر بی‌اثر در گراف ValueError است"""
+    graph = graph or load_graph()
+    ranges = {}
+    for name in names:
+        value = base_value(name, probabilities, years_required, capacity, annual_hiring, graph)
+        if name.startswith(CAPACITY_PREFIX) and not len(capacity_nodes(name, capacity, graph)):
+            raise ValueError(f"ظرفیت بدون گره در گراف: {name}")
+        ranges[name] = (value * (1 - spread), value * (1 + spread))
+    return ranges
+
+
+def grid_points(ranges, levels=3):
+    """همه ترکیب‌های levels مقدار هم‌فاصله در بازه هر پارامتر؛ (نام‌ها، آرایه (B, K))"""
+    names = list(ranges)
+    axes = [np.linspace(low, high, levels) for low, high in ranges.values()]
+    return names, np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, len(names))
+
+
+def latin_hypercube(ranges, samples, seed=None):
+    """نمونه ابرمکعب لاتین: هر بازه به samples قسمت و از هر قسمت دقیقاً یک نقطه"""
+    rng = np.random.default_rng(seed)
+    names = list(ranges)
+    low, high = np.array(list(ranges.values()), dtype=np.float64).reshape(-1, 2).T
+    strata = (rng.permuted(np.tile(np.arange(samples), (len(names), 1)), axis=1).T
+              + rng.random((samples, len(names)))) / samples
+    return names, low + strata * (high - low)
+
+
+class SweepEngine(VectorizedEngine):
+    """موتور قطعی که محور دسته آن نقاط پارامتر است"""
+
+    def __init__(self, names, values, probabilities, years_required, capacity, annual_hiring,
+                 graph=None, enforce_capacity=True, profiler=None):
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(names))
+        points = len(values)
+
+        # ظرفیت‌ها: گره‌های محدود برای همه نقاط یکسان‌اند، فقط مقدار سقف فرق می‌کند
+        capacity_columns = [i for i, name in enumerate(names) if name.startswith(CAPACITY_PREFIX)]
+        point_capacities = [capacity] if not capacity_columns else [
+            _with_capacity(capacity, [names[i] for i in capacity_columns], row[capacity_columns])
+            for row in values
+        ]
+        super().__init__(probabilities, years_required, point_capacities[0], annual_hiring, graph=graph,
+                         enforce_capacity=enforce_capacity, profiler=profiler)
+        graph = self.graph
+
+        edge_prob = np.tile(graph.edge_prob, (points, 1))
+        edge_min_years = np.tile(graph.edge_min_years, (points, 1))
+        hiring = np.full(points, annual_hiring, dtype=np.int64)
+        for i, name in enumerate(names):
+            column = values[:, i]
+            if name == ANNUAL_HIRING:
+                hiring = np.maximum(0, np.rint(column)).astype(np.int64)
+            elif name.startswith(YEARS_PREFIX):
+                edge = _edge(graph, name[len(YEARS_PREFIX):], years=True)
+                edge_min_years[:, edge] = np.maximum(0, np.rint(column))
+            elif not name.startswith(CAPACITY_PREFIX):
+                edge_prob[:, _edge(graph, name)] = np.clip(column, 0, 1)
+
+        self.points = points
+        self.annual_hiring = hiring
+        self.edge_rate = edge_prob * PROMOTION_SCALE
+        self.edge_column = np.minimum(edge_min_years, self.tenure_buckets - 1)
+
+        limits = np.array([node_capacity(graph, setting) for setting in point_capacities])
+        limits = np.broadcast_to(limits, (points, len(graph.node_names)))
+        self.capacity_plan = [
+            (target, edges, np.rint(limits[:, target]).astype(np.int64))
+            for target, edges, _ in self.capacity_plan
+        ]
+
+    def applicants(self, tenure, rng=None):
+        """متقاضیان هر یال با سال‌های لازم جداگانه برای هر نقطه (فقط قطعی)"""
+        suffix = np.cumsum(tenure[..., ::-1], axis=-1)[..., ::-1]
+        rows = suffix[:, self.graph.edge_source, :]
+        eligible = np.take_along_axis(rows, self.edge_column[..., None], axis=-1)[..., 0]
+        return (eligible * self.edge_rate).astype(np.int64)
+
+    def final_positions(self, years):
+        """تعداد هر سمت در پایان years سال برای همه نقاط؛ آرایه (B, P)"""
+        tenure = np.tile(self.initial_state(), (self.points, 1, 1))
+        for year in range(1, years + 1):
+            tenure, _, _, _ = self.step(year, tenure)
+        return self.position_counts(tenure)
+
+
+def _with_capacity(capacity, names, values):
+    """کپی تنظیمات ظرفیت با مقادیر یک نقطه"""
+    capacity = copy.deepcopy(capacity or {})
+    for name, value in zip(names, values):
+        group, _, grade = name[len(CAPACITY_PREFIX):].partition(':')
+        if grade:
+            capacity.setdefault(group, {})[grade] = max(0, round(float(value)))
+        else:
+            capacity[group] = max(0, round(float(value)))
+    return capacity
+
+
+def target_counts(positions, position_names, targets=TARGETS):
+    """تعداد هر گروه هدف (مجموع سمت‌هایی که با نام گروه شروع می‌شوند)"""
+    return {
+        target: positions[:, [i for i, name in enumerate(position_names) if name.startswith(target)]].sum(axis=1)
+        for target in targets
+    }
+
+
+def run_sweep(names, values, years, probabilities, years_required, capacity, annual_hiring,
+              targets=TARGETS, profiler=None, graph=None):
+    """خروجی‌های هدف برای همه نقاط و برای تنظیمات فعلی؛ (خروجی‌ها، پایه)"""
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(names))
+    current = [base_value(name, probabilities, years_required, capacity, annual_hiring, graph) for name in names]
+    engine = SweepEngine(names, np.vstack([values, current]), probabilities, years_required, capacity,
+                         annual_hiring, graph=graph, profiler=profiler)
+    counts = target_counts(engine.final_positions(years), engine.positions, targets)
+    return ({target: count[:-1] for target, count in counts.items()},
+            {target: int(count[-1]) for target, count in counts.items()})
+
+
+def tornado(names, values, outputs, base):
+    """اثر هر پارامتر: میانگین خروجی در ربع پایین و بالای بازه آن، مرتب بر اساس دامنه اثر
+
+    در جاروب شبکه‌ای با سه سطح همان میانگین خروجی در سطح کمینه و بیشینه است.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(names))
+    outputs = np.asarray(outputs, dtype=np.float64)
+    rows = []
+    for i, name in enumerate(names):
+        column = values[:, i]
+        low_cut, high_cut = np.quantile(column, (0.25, 0.75))
+        low = float(outputs[column <= low_cut].mean())
+        high = float(outputs[column >= high_cut].mean())
+        rows.append({'parameter': name, 'low': low, 'high': high, 'swing': abs(high - low), 'base': base})
+    return sorted(rows, key=lambda row: -row['swing'])
@@ -0,0 +1,21 @@
+"""تنظیمات مشترک آزمون‌ها؛ اجرا از ریشه مخزن با python -m pytest -q"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from simulator import SuccessionSimulator  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def simulator():
+    return SuccessionSimulator()
+
+
+@pytest.fixture(scope='session')
+def defaults(simulator):
+    """(احتمالات، سال‌های لازم، ظرفیت، استخدام سالانه) پیش‌فرض داشبورد"""
+    return (simulator.default_probabilities, simulator.default_years_required, simulator.default_capacity, 500)
@@ -0,0 +1,42 @@
+"""آزمون‌های موتور عامل‌محور (agents.py)"""
+import numpy as np
+
+from agents import AgentEngine, AgentPopulation
+
+
+def test_population_grows_and_compacts():
+    population = AgentPopulation(capacity=2)
+    population.append(3, 1, 2, np.array([0, 1, 2]), 30)
+    population.append(2, 4, 0, 5, np.array([40, 41]))
+    assert population.size == 5 and len(population.position) >= 5
+
+    population.compact(np.array([True, False, True, False, True]))
+    assert population.view('tenure').tolist() == [0, 2, 5]
+    assert population.view('position').tolist() == [1, 1, 4]
+    assert population.view('age').tolist() == [30, 30, 41]
+
+
+def test_same_seed_same_run(defaults):
+    first = AgentEngine(*defaults, seed=5).run(5)
+    again = AgentEngine(*defaults, seed=5).run(5)
+    other = AgentEngine(*defaults, seed=6).run(5)
+    assert first == again
+    assert first != other
+
+
+def test_headcount_balance(defaults):
+    engine = AgentEngine(*defaults, seed=0)
+    total = int(engine.graph.node_initial.sum())
+    for year, data in engine.iter_run(10):
+        total += data['استخدام_جدید'] - data['بازنشستگی']
+        assert sum(data['وضعیت_مناصب'].values()) == total
+        assert engine.population.view('tenure').min() >= 1
+
+
+def test_promotions_respect_years_required(defaults):
+    """سابقه اولیه کمتر از ۱۰ سال است، پس با سال لازم ۱۰ در سال اول ارتقایی نیست"""
+    probabilities, years_required, capacity, hiring = defaults
+    years_required = {key: 10 for key in years_required}
+    first_year = AgentEngine(probabilities, years_required, capacity, hiring, seed=0).run(1)[1]
+    assert not any(first_year['ارتقاءها'].values())
+    assert any(AgentEngine(*defaults, seed=0).run(1)[1]['ارتقاءها'].values())
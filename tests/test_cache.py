@@ -0,0 +1,27 @@
+"""آزمون‌های کش نتایج (cache.py)"""
+import cache
+from cache import ResultCache, scenario_key
+
+
+def test_key_ignores_argument_order():
+    assert scenario_key(a=1, b={'x': 1, 'y': 2}) == scenario_key(b={'y': 2, 'x': 1}, a=1)
+    assert scenario_key(a=1) != scenario_key(a=2)
+
+
+def test_key_includes_cache_version(monkeypatch):
+    """نتایج دیسک نسخه قبلی با کلید نسخه جدید خوانده نمی‌شوند"""
+    before = scenario_key(years=10)
+    monkeypatch.setattr(cache, 'CACHE_VERSION', cache.CACHE_VERSION + 1)
+    assert scenario_key(years=10) != before
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    first = ResultCache(max_entries=1, directory=str(tmp_path))
+    first.put('a', {'value': 1})
+    first.put('b', {'value': 2})
+    assert 'a' not in first.entries
+
+    restarted = ResultCache(directory=str(tmp_path))
+    assert restarted.get('a') == {'value': 1}
+    assert restarted.stats()['disk_hits'] == 1
+    assert restarted.get('missing') is None
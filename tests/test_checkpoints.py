@@ -0,0 +1,60 @@
+"""آزمون‌های ادامه افق از نقطه بازیابی: ادامه دادن همان اجرای کامل است"""
+import numpy as np
+import pytest
+
+from engine import VectorizedEngine
+from parallel import iter_ensemble_bands
+from simulator import ENGINES
+
+
+def resumed(run, years, cut):
+    """نتایج سال‌های ۱ تا cut با یک نقطه بازیابی و سپس ادامه تا years از همان نقطه"""
+    checkpoint = {}
+    head = list(run(cut, None, checkpoint))
+    assert checkpoint['year'] == cut
+    return head + list(run(years, checkpoint, None))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_resume_matches_full_run(simulator, defaults, engine):
+    """هر موتور (و بخش‌های تصادفی آن) از نقطه بازیابی دقیقاً همان سال‌های اجرای کامل را می‌دهد"""
+    def run(years, start, checkpoint):
+        return simulator.iter_career_progression(years, *defaults, engine=engine, seed=7, start=start,
+                                                 checkpoint=checkpoint)
+
+    assert resumed(run, 8, 3) == list(run(8, None, None))
+
+
+def test_resume_ensemble_matches_full_run(defaults):
+    engine = VectorizedEngine(*defaults)
+
+    def run(years, start, checkpoint):
+        return ((year, positions.copy(), retired.copy(), promoted.copy())
+                for year, positions, retired, promoted in engine.iter_ensemble(years, 50, 11, start, checkpoint))
+
+    for (year, *arrays), (full_year, *full_arrays) in zip(resumed(run, 6, 2), run(6, None, None)):
+        assert year == full_year
+        assert all((array == full).all() for array, full in zip(arrays, full_arrays))
+
+
+def test_resume_bands_match_full_run(defaults):
+    """صدک‌های بخش‌بندی‌شده با نقطه بازیابی همه بخش‌ها ادامه می‌یابند"""
+    engine = VectorizedEngine(*defaults)
+
+    def run(years, start, checkpoint):
+        return iter_ensemble_bands(engine, years, 120, seed=5, shard_size=50, start=start, checkpoint=checkpoint)
+
+    full = list(run(6, None, None))
+    continued = resumed(run, 6, 4)
+    assert [year for year, _ in continued] == [year for year, _ in full]
+    assert all(np.array_equal(bands, expected) for (_, bands), (_, expected) in zip(continued, full))
+
+
+def test_resume_does_not_change_checkpoint(defaults):
+    """نقطه بازیابی کش‌شده را می‌توان چند بار ادامه داد"""
+    engine = VectorizedEngine(*defaults)
+    checkpoint = {}
+    list(engine.iter_ensemble(3, 20, 1, checkpoint=checkpoint))
+    first = [positions.copy() for _, positions, _, _ in engine.iter_ensemble(5, 20, start=checkpoint)]
+    second = [positions.copy() for _, positions, _, _ in engine.iter_ensemble(5, 20, start=checkpoint)]
+    assert all((a == b).all() for a, b in zip(first, second))
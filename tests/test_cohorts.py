@@ -0,0 +1,47 @@
+"""آزمون‌های موتور گروه‌های سنی (cohorts.py)"""
+import numpy as np
+import pytest
+
+from cohorts import AGES, RETIREMENT_START_AGE, CohortEngine, hazard_table, spread
+
+
+@pytest.fixture(scope='module')
+def engine(simulator, defaults):
+    return CohortEngine(*defaults, simulator.retirement_stats)
+
+
+def test_hazard_table_reproduces_cumulative_shares(simulator):
+    """سهم تجمعی بازنشستگی از جدول نرخ‌ها همان retirement_stats در هر افق است"""
+    hazard = hazard_table(simulator.retirement_stats)
+    assert not hazard[AGES < RETIREMENT_START_AGE].any()
+    survival = np.cumprod(1 - hazard[AGES >= RETIREMENT_START_AGE])
+    for key, share in simulator.retirement_stats.items():
+        years = int(key.split('_')[0])
+        assert 1 - survival[years - 1] == pytest.approx(share)
+    assert hazard[-1] == 1
+
+
+def test_spread_keeps_totals_within_weights():
+    weights = np.array([[3, 0, 5, 2], [1, 1, 1, 1]])
+    parts = spread([7, 4], weights)
+    assert parts.sum(axis=-1).tolist() == [7, 4] and (parts <= weights).all()
+
+
+@pytest.mark.parametrize('seed', [None, 3])
+def test_tenure_and_age_views_stay_consistent(engine, defaults, seed):
+    """جمع هر گره در نمای سابقه و نمای سن در همه سال‌ها برابر است و کسی گم نمی‌شود"""
+    rng = None if seed is None else np.random.default_rng(seed)
+    state = engine.initial_state()
+    total = state[..., :engine.tenure_buckets].sum()
+    for year in range(1, 21):
+        state, hires, retirements, _ = engine.step(year, state, rng)
+        tenure, ages = engine.split(state)
+        assert (tenure >= 0).all() and (ages >= 0).all()
+        assert (tenure.sum(axis=-1) == ages.sum(axis=-1)).all()
+        total += hires - retirements
+        assert tenure.sum() == total
+
+
+def test_acceleration_retires_more(simulator, defaults, engine):
+    faster = CohortEngine(*defaults, simulator.retirement_stats, retirement_acceleration=1.5)
+    assert sum(faster.run(10)[10]['وضعیت_مناصب'].values()) < sum(engine.run(10)[10]['وضعیت_مناصب'].values())
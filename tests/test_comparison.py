@@ -0,0 +1,56 @@
+"""آزمون‌های مقایسه سناریوها با اعداد تصادفی مشترک (comparison.py)"""
+import math
+
+import numpy as np
+import pytest
+
+from comparison import TOTAL, CommonRandomStream, binomial_quantile, compare_scenarios
+
+
+@pytest.mark.parametrize('n, p', [(10, 0.3), (40, 0.05), (7, 0.9), (200, 0.5), (5000, 0.02), (1000, 0.97)])
+def test_quantile_moments_match_generator(n, p):
+    """میانگین و واریانس وارون تابع توزیع روی u یکنواخت همان نمونه‌های rng.binomial است"""
+    u = np.random.default_rng(0).random(200000)
+    samples = binomial_quantile(n, p, u)
+    reference = np.random.default_rng(1).binomial(n, p, 200000)
+    mean, variance = n * p, n * p * (1 - p)
+    tolerance = 4 * math.sqrt(variance / len(u))
+    assert abs(samples.mean() - mean) < tolerance and abs(reference.mean() - mean) < tolerance
+    assert samples.var() == pytest.approx(variance, rel=0.03)
+    assert samples.var() == pytest.approx(reference.var(), rel=0.04)
+    assert samples.min() >= 0 and samples.max() <= n
+
+
+def test_small_variance_quantile_is_exact():
+    """در ناحیه جمع تجمعی، نتیجه کوچک‌ترین k با CDF(k) >= u است"""
+    n, p = 12, 0.2
+    cdf = np.cumsum([math.comb(n, k) * p ** k * (1 - p) ** (n - k) for k in range(n + 1)])
+    u = np.linspace(0.001, 0.999, 500)
+    assert (binomial_quantile(n, p, u) == np.searchsorted(cdf, u)).all()
+
+
+def test_quantile_is_monotone_in_u_and_p():
+    """یکنوایی در u و p همان چیزی است که همبستگی جفت‌شده سناریوها را می‌سازد"""
+    u = np.linspace(0, 1, 1001)
+    for n, p in [(30, 0.1), (500, 0.4), (50, 0.8)]:
+        assert (np.diff(binomial_quantile(n, p, u)) >= 0).all()
+    p = np.linspace(0, 1, 101)
+    for n in (20, 300):
+        for value in (0.1, 0.5, 0.9):
+            assert (np.diff(binomial_quantile(n, p, value)) >= 0).all()
+
+
+def test_stream_handles_edge_cases():
+    draws = CommonRandomStream(0).binomial([0, 5, 5, 1000], [0.5, 0.0, 1.0, 0.5])
+    assert draws[:3].tolist() == [0, 0, 5] and 0 <= draws[3] <= 1000
+
+
+def test_identical_scenarios_have_zero_paired_difference(defaults):
+    """با اعداد مشترک دو سناریوی یکسان دقیقاً یک مسیر دارند و تفاضلشان صفر است"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    scenario = {'probabilities': probabilities, 'years_required': years_required, 'capacity': capacity,
+                'annual_hiring': annual_hiring}
+    summary = compare_scenarios([{**scenario, 'name': 'a'}, {**scenario, 'name': 'b'}], 3, seed=0, batch=50,
+                                min_replications=50, max_replications=50)
+    total = next(row for row in summary['rows'] if row['metric'] == TOTAL)
+    assert total['difference'] == 0 and total['half_width'] == 0 and total['resolved']
@@ -0,0 +1,64 @@
+"""آزمون‌های شبیه‌ساز جایگزین (emulator.py)"""
+import numpy as np
+import pytest
+
+from cache import ResultCache
+from emulator import (ANCHOR_STEPS, TOTAL, cached_emulator, emulator_box, parameter_vector, simulate_outputs,
+                      snap_anchor)
+from orgchart import load_graph
+from sweep import ANNUAL_HIRING
+
+YEARS = 10
+SAMPLES = 600
+
+
+@pytest.fixture(scope='module')
+def trained(defaults):
+    probabilities, years_required, capacity, annual_hiring = defaults
+    cache = ResultCache(max_entries=4)
+    return cache, cached_emulator(cache, probabilities, years_required, capacity, annual_hiring, YEARS,
+                                  samples=SAMPLES)
+
+
+def test_snapped_box_contains_current_settings(defaults):
+    """گرد کردن مبنا هیچ‌وقت تنظیمات فعلی را از جعبه آموزش بیرون نمی‌برد"""
+    probabilities, years_required, _, _ = defaults
+    graph = load_graph()
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        shifted = {key: float(np.clip(value + rng.uniform(-0.2, 0.2), 0, 1)) for key, value in probabilities.items()}
+        hiring = int(rng.integers(100, 1001))
+        names, ranges = emulator_box(shifted, years_required, hiring, graph)
+        values = parameter_vector(names, shifted, years_required, hiring)
+        low, high = np.array(list(ranges.values())).T
+        assert ((low <= values) & (values <= high)).all()
+
+
+def test_snap_anchor_uses_grid():
+    names = ['a', ANNUAL_HIRING, 'years:a']
+    snapped = snap_anchor(names, [0.33, 520, 3.2])
+    assert snapped.tolist() == pytest.approx([0.35, 500, 3])
+    assert snapped[0] / ANCHOR_STEPS['probability'] == pytest.approx(7)
+
+
+def test_nearby_settings_reuse_trained_emulator(defaults, trained):
+    """تغییر کوچک تنظیمات sidebar همان شبیه‌ساز کش‌شده را برمی‌گرداند و دوباره آموزش نمی‌دهد"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    cache, emulator = trained
+    nudged = dict(probabilities)
+    edge = next(iter(nudged))
+    nudged[edge] = round(nudged[edge] + 0.01, 2)
+    assert cached_emulator(cache, nudged, years_required, capacity, annual_hiring + 10, YEARS,
+                           samples=SAMPLES) is emulator
+    assert cached_emulator(cache, probabilities, years_required, capacity, annual_hiring, YEARS + 1,
+                           samples=SAMPLES) is not emulator
+
+
+def test_prediction_tracks_full_simulation(defaults, trained):
+    probabilities, years_required, capacity, annual_hiring = defaults
+    _, emulator = trained
+    prediction = emulator.predict(probabilities, years_required, annual_hiring)
+    simulated = simulate_outputs(probabilities, years_required, capacity, annual_hiring, YEARS)
+    assert not prediction['extrapolation']
+    assert abs(prediction['mean'][TOTAL] - simulated[TOTAL]) <= 4 * prediction['std'][TOTAL] + 1
+    assert emulator.validation['r2'][TOTAL] > 0.75
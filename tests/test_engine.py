@@ -0,0 +1,185 @@
+"""آزمون‌های موتور برداری (engine.VectorizedEngine)"""
+import numpy as np
+import pytest
+
+from agents import AgentEngine
+from capacity import capacity_usage
+from engine import VectorizedEngine, ensemble_bands
+from orgchart import OrgGraph, load_graph
+
+
+def test_matches_legacy_without_transitions(simulator, defaults):
+    """بدون انتقال و ظرفیت، استخدام و بازنشستگی همان مسیر دیکشنری قدیمی است
+
+    از user-007 انتقال‌ها فقط در موتور برداری افراد را جابه‌جا می‌کنند، پس
+    برابری فقط بدون انتقال برقرار است؛ بازنشستگی موتور برداری برای هر گره
+    جداگانه گرد می‌شود و اختلاف هر سال حداکثر تعداد گره‌هاست.
+    """
+    probabilities, years_required, _, hiring = defaults
+    probabilities = {key: 0.0 for key in probabilities}
+    args = (20, probabilities, years_required, {}, hiring)
+    legacy = simulator.simulate_career_progression(*args, engine='legacy')
+    vectorized = simulator.simulate_career_progression(*args, engine='vectorized')
+
+    nodes = len(load_graph().node_names)
+    for year in legacy:
+        assert vectorized[year]['استخدام_جدید'] == legacy[year]['استخدام_جدید']
+        assert abs(vectorized[year]['بازنشستگی'] - legacy[year]['بازنشستگی']) <= nodes
+        assert set(vectorized[year]['وضعیت_مناصب']) == set(legacy[year]['وضعیت_مناصب'])
+        gap = sum(vectorized[year]['وضعیت_مناصب'].values()) - sum(legacy[year]['وضعیت_مناصب'].values())
+        assert abs(gap) <= nodes * year
+    assert not any(value for year in vectorized for value in vectorized[year]['ارتقاءها'].values())
+
+
+def test_headcount_balance(defaults):
+    """تعداد هر سال = سال قبل + استخدام - بازنشستگی (انتقال‌ها افراد را حفظ می‌کنند)"""
+    engine = VectorizedEngine(*defaults)
+    total = engine.initial_state().sum()
+    for year, data in engine.iter_run(20):
+        total += data['استخدام_جدید'] - data['بازنشستگی']
+        assert sum(data['وضعیت_مناصب'].values()) == total
+
+
+def test_batched_step_matches_single(defaults):
+    """یک گام روی محور دسته‌ای همان نتیجه گام تکی برای هر ردیف است"""
+    engine = VectorizedEngine(*defaults)
+    single = engine.initial_state()
+    batch = np.tile(single, (3, 1, 1))
+    for year in range(1, 11):
+        single, _, retired, promoted = engine.step(year, single)
+        batch, _, batch_retired, batch_promoted = engine.step(year, batch)
+        assert (batch == single).all()
+        assert (batch_retired == retired).all() and (batch_promoted == promoted).all()
+
+
+def test_ensemble_is_reproducible(defaults):
+    """همان بذر همان مسیرها را می‌دهد و بذر دیگر مسیر دیگری"""
+    engine = VectorizedEngine(*defaults)
+    first = engine.run_ensemble(10, 50, seed=7)
+    again = engine.run_ensemble(10, 50, seed=7)
+    other = engine.run_ensemble(10, 50, seed=8)
+    assert (first['وضعیت_مناصب'] == again['وضعیت_مناصب']).all()
+    assert (first['وضعیت_مناصب'] != other['وضعیت_مناصب']).any()
+    assert first['وضعیت_مناصب'].shape == (50, 10, len(engine.positions))
+
+
+def test_ensemble_bands_are_ordered(defaults):
+    """صدک‌های ۵، ۵۰ و ۹۵ در هر سال و سمت صعودی‌اند"""
+    bands = ensemble_bands(VectorizedEngine(*defaults).run_ensemble(10, 200, seed=0))
+    assert (np.diff(bands['کل_پرسنل'], axis=0) >= 0).all()
+    for band in bands['مناصب'].values():
+        assert (np.diff(band, axis=0) >= 0).all()
+
+
+def test_streamed_run_matches_full_run(simulator, defaults):
+    """iter_career_progression سال به سال همان نتایج simulate_career_progression است"""
+    streamed = list(simulator.iter_career_progression(10, *defaults))
+    assert [year for year, _ in streamed] == list(range(1, 11))
+    assert dict(streamed) == simulator.simulate_career_progression(10, *defaults)
+
+
+def capped_inflow_ok(graph, limits, counts, inflow):
+    """هر گره محدودی که ورودی ارتقا گرفته است از سقفش بالاتر نرفته است"""
+    gained = np.isfinite(limits) & (inflow > 0)
+    return ((counts <= limits) | ~gained).all()
+
+
+@pytest.mark.parametrize('seed', [None, 0])
+def test_capped_nodes_never_overfilled_by_promotions(defaults, seed):
+    """با تعداد اولیه بسیار بیشتر از ظرفیت (مثلاً رئیس_شعبه4)، ارتقا هیچ گره محدودی را از سقف رد نمی‌کند"""
+    engine = VectorizedEngine(*defaults)
+    graph = engine.graph
+    rng = None if seed is None else np.random.default_rng(seed)
+    state = engine.initial_state() if rng is None else np.tile(engine.initial_state(), (20, 1, 1))
+    over = (engine.initial_state().sum(axis=-1) > engine.node_limits)
+    assert over[graph.node_names.index('رئیس_شعبه4')] and over[graph.hiring_node]
+
+    inflow_matrix = graph.inflow_matrix[engine.promotion_edges]
+    for year in range(1, 21):
+        state, hires, _, promoted = engine.step(year, state, rng)
+        counts = state.sum(axis=-1)
+        counts[..., graph.hiring_node] -= hires
+        assert capped_inflow_ok(graph, engine.node_limits, counts, promoted @ inflow_matrix)
+
+
+def vacancy_chart():
+    """دو گره پایه A و B که به T (ظرفیت ۳) می‌روند و T که به S (ظرفیت ۱) می‌رود"""
+    return {
+        'positions': ['pa', 'pb', 'pt', 'ps'],
+        'hiring_node': 'A',
+        'nodes': [{'name': name, 'position': f"p{name.lower()}"} for name in 'ABTS'],
+        'transitions': [
+            {'key': 'A_to_T', 'source': 'A', 'target': 'T', 'probability': 1.0},
+            {'key': 'B_to_T', 'source': 'B', 'target': 'T', 'probability': 1.0},
+            {'key': 'T_to_S', 'source': 'T', 'target': 'S', 'probability': 1.0},
+        ]
+    }
+
+
+def test_vacancy_chain_fills_seats_top_down_by_tenure():
+    """S با یک نفر از T پر می‌شود و صندلی آزادشده T در همان سال به باسابقه‌ترین متقاضیان A و B می‌رسد"""
+    engine = VectorizedEngine({}, {}, {'pt': 3, 'ps': 1}, 0, graph=OrgGraph(vacancy_chart()))
+    tenure = np.zeros((4, engine.tenure_buckets), dtype=np.int64)
+    tenure[0, [5, 2]] = [1, 2]      # A
+    tenure[1, [4, 1]] = [1, 3]      # B
+    tenure[2, 3] = 1                # T (یک صندلی از سه پر)
+    counts = np.array([3, 4, 1])    # همه واجدین هر یال متقاضی‌اند
+
+    moved, after = engine.transitions(tenure, counts)
+    assert not moved.any() and (after == tenure).all()
+    moved, after = engine.adjust_for_capacity(after, counts, moved)
+
+    # S: یک نفر از T؛ T: سه صندلی خالی به سابقه ۵ (A)، ۴ (B) و یکی از سابقه ۲ (A)
+    assert moved.tolist() == [2, 1, 1]
+    assert after[0].tolist()[:6] == [0, 0, 1, 0, 0, 0] and after[1].tolist()[:5] == [0, 3, 0, 0, 0]
+    assert after[2].tolist()[:4] == [3, 0, 0, 0] and after[3, 0] == 1
+    assert after.sum() == tenure.sum()
+
+
+def test_unenforced_capacity_leaves_transitions_untouched(defaults):
+    """enforce_capacity=False همان انتقال‌های بدون ظرفیت را می‌دهد ولی درصد استفاده را گزارش می‌کند"""
+    probabilities, years_required, capacity, hiring = defaults
+    loose = VectorizedEngine(probabilities, years_required, capacity, hiring, enforce_capacity=False)
+    unlimited = VectorizedEngine(probabilities, years_required, None, hiring)
+    assert loose.capacity_plan == []
+
+    tenure = loose.initial_state()
+    counts = loose.applicants(tenure)
+    moved, after = loose.transitions(tenure, counts)
+    assert (moved == counts).all()
+    adjusted, adjusted_after = loose.adjust_for_capacity(after.copy(), counts, moved.copy())
+    assert (adjusted == moved).all() and (adjusted_after == after).all()
+
+    first, second = loose.run(10), unlimited.run(10)
+    for year in first:
+        assert first[year]['ارتقاءها'] == second[year]['ارتقاءها']
+        assert first[year]['وضعیت_مناصب'] == second[year]['وضعیت_مناصب']
+    assert first[10]['ظرفیت_استفاده'] and not second[10]['ظرفیت_استفاده']
+    assert first != VectorizedEngine(*defaults).run(10)
+
+
+def test_capacity_usage_is_count_over_limit(defaults):
+    """درصد استفاده از ظرفیت تعداد واقعی تقسیم بر سقف است (نه ۸۵٪ ثابت قدیمی)"""
+    usage = capacity_usage(np.array([50, 10, 7]), np.array([100, np.inf, 35]))
+    assert usage.tolist() == [50.0, 0.0, 20.0]
+
+    engine = VectorizedEngine(*defaults)
+    for year, data in engine.iter_run(5):
+        reported = data['ظرفیت_استفاده']
+        assert set(reported) == {p for p, limit in zip(engine.positions, engine.position_limits) if np.isfinite(limit)}
+        for position, value in reported.items():
+            limit = engine.position_limits[engine.positions.index(position)]
+            assert value == pytest.approx(data['وضعیت_مناصب'][position] / limit * 100)
+        assert len(set(round(value, 6) for value in reported.values())) > 1
+
+
+def test_agent_engine_respects_capacity(defaults):
+    engine = AgentEngine(*defaults, seed=2)
+    graph = engine.graph
+    population = engine.initial_population()
+    inflow_matrix = graph.inflow_matrix[engine.promotion_edges]
+    for year in range(1, 11):
+        population, _, _, promoted = engine.step(year, population)
+        node = graph.node_lookup[population.view('position'), population.view('grade') + 1]
+        counts = np.bincount(node, minlength=len(graph.node_names))
+        assert capped_inflow_ok(graph, engine.node_limits, counts, promoted @ inflow_matrix)
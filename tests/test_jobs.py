@@ -0,0 +1,77 @@
+"""آزمون‌های صف کارهای پس‌زمینه (jobs.py)"""
+import threading
+
+import pytest
+
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def blocking(job, gate, steps=50):
+    """کاری که تا باز شدن gate در حلقه گزارش پیشرفت می‌ماند"""
+    for step in range(steps):
+        job.report(step / steps, step=step)
+        if gate.wait(0.01):
+            break
+    return 'ok'
+
+
+def test_same_key_is_deduplicated(queue):
+    gate = threading.Event()
+    first = queue.submit('a', blocking, gate, steps=10 ** 6)
+    second = queue.submit('a', blocking, gate, steps=10 ** 6)
+    assert second is first and first.subscribers == 2
+    assert queue.stats()['deduplicated'] == 1
+
+    gate.set()
+    assert first.wait(5) and first.state == DONE and first.result == 'ok'
+    # کار تمام‌شده دوباره اجرا می‌شود
+    assert queue.submit('a', blocking, gate) is not first
+
+
+def test_private_jobs_are_never_shared(queue):
+    gate = threading.Event()
+    gate.set()
+    first, second = queue.submit(None, blocking, gate), queue.submit(None, blocking, gate)
+    assert first is not second
+    assert first.wait(5) and second.wait(5)
+
+
+def test_cancel_waits_for_last_subscriber(queue):
+    """لغو یک نشست کار مشترک را متوقف نمی‌کند؛ لغو آخرین مشترک آن را در نقطه report متوقف می‌کند"""
+    gate = threading.Event()
+    job = queue.submit('a', blocking, gate, steps=10 ** 6)
+    queue.submit('a', blocking, gate, steps=10 ** 6)
+    queue.cancel(job)
+    assert not job.cancelled
+    queue.cancel(job)
+    assert job.wait(5) and job.state == CANCELLED and job.result is None
+
+
+def test_queued_job_reports_position_and_cancels_before_start(queue):
+    gate = threading.Event()
+    running = queue.submit('a', blocking, gate, steps=10 ** 6)
+    queued = queue.submit('b', blocking, gate)
+    while running.state != RUNNING:
+        running.wait(0.01)
+    assert queued.state == QUEUED and queue.position(queued) == 0
+
+    queue.cancel(queued)
+    gate.set()
+    assert queued.wait(5) and queued.state == CANCELLED and queued.started is None
+    assert running.wait(5) and running.state == DONE and running.partial['step'] >= 0
+
+
+def test_failure_is_reported(queue):
+    def broken(job):
+        raise RuntimeError('boom')
+
+    job = queue.submit('x', broken)
+    assert job.wait(5) and job.state == FAILED and isinstance(job.error, RuntimeError)
+    assert queue.stats()[FAILED] == 1
@@ -0,0 +1,70 @@
+"""آزمون‌های حل تحلیلی زنجیره مارکوف (markov.py)"""
+import numpy as np
+import pytest
+
+from engine import PROMOTION_SCALE
+from markov import MarkovChain
+from orgchart import OrgGraph
+
+RETIREMENT = 0.1
+
+
+@pytest.fixture(scope='module')
+def chain():
+    """زنجیره A -> B -> C بدون شرط سابقه؛ نرخ هر ارتقا 0.1 و بازنشستگی 0.1
+
+    ماندن در A و B برابر 0.8 و در C برابر 0.9 است، پس N[A] = (5, 2.5, 2.5) سال.
+    """
+    graph = OrgGraph({
+        'positions': ['p'],
+        'grades': ['g1', 'g2'],
+        'hiring_node': 'A',
+        'nodes': [{'name': 'A', 'position': 'p'}, {'name': 'B', 'position': 'p', 'grade': 'g1'},
+                  {'name': 'C', 'position': 'p', 'grade': 'g2'}],
+        'transitions': [
+            {'key': 'A_to_B', 'source': 'A', 'target': 'B', 'probability': 1.0},
+            {'key': 'B_to_C', 'source': 'B', 'target': 'C', 'probability': 1.0},
+        ]
+    })
+    assert PROMOTION_SCALE == 0.1
+    return MarkovChain({}, {}, 100, graph=graph, retirement_rate=RETIREMENT, tenure_aware=False)
+
+
+def test_steady_state_solves_balance_equation(chain):
+    steady = chain.steady_state()
+    assert steady @ (np.eye(chain.size) - chain.matrix) == pytest.approx(chain.inflow)
+    assert steady.tolist() == pytest.approx([500, 250, 250])
+    assert chain.steady_state_positions() == pytest.approx({'p': 1000})
+
+
+def test_fundamental_and_time_to_reach(chain):
+    """از A با احتمال ۰٫۵ × ۰٫۵ به C می‌رسد و در هر گره به شرط ارتقا ۵ سال می‌ماند: ۱۰ سال"""
+    assert chain.fundamental()[0].tolist() == pytest.approx([5, 2.5, 2.5])
+    probability, years = chain.time_to_reach('C')
+    assert probability == pytest.approx(0.25) and years == pytest.approx(10)
+    assert chain.time_to_reach('C', 'B') == pytest.approx((0.5, 5))
+    assert chain.time_to_reach('A', 'C') == (0.0, float('inf'))
+    assert chain.time_to_reach('A') == (1.0, 0.0)
+
+
+def test_visits_by_grade_sum_graded_nodes(chain):
+    assert chain.visits_by_grade() == pytest.approx({'g1': 2.5, 'g2': 2.5})
+    assert chain.visits_by_grade('C') == pytest.approx({'g1': 0, 'g2': 10})
+    assert chain.visits_by_position() == pytest.approx({'p': 10})
+
+
+def test_default_chart_grade_visits_add_up(defaults):
+    probabilities, years_required, _, annual_hiring = defaults
+    chain = MarkovChain(probabilities, years_required, annual_hiring)
+    visits = chain.expected_visits()
+    graded = chain.graph.node_grade >= 0
+    assert sum(chain.visits_by_grade().values()) == pytest.approx(visits[graded].sum())
+    assert sum(chain.visits_by_position().values()) == pytest.approx(visits.sum())
+
+
+def test_cross_check_matches_iterative_engine(defaults):
+    """توزیع پایا در حدود ۱٪ میانگین مونت‌کارلوی VectorizedEngine (بدون ظرفیت) پس از ۶۰ سال است"""
+    probabilities, years_required, _, annual_hiring = defaults
+    check = MarkovChain(probabilities, years_required, annual_hiring).cross_check()
+    assert check['total_error'] < 0.01
+    assert check['max_abs_error'] < 0.05 * check['simulated'].sum()
@@ -0,0 +1,47 @@
+"""آزمون‌های بهینه‌ساز سیاست استخدام و ارتقا (optimizer.py)"""
+import numpy as np
+import pytest
+
+from optimizer import (capacity_gaps, capacity_objective, iter_cross_entropy, optimize_policy, policy_names,
+                       policy_values)
+from sweep import SweepEngine
+
+
+def test_burn_in_drops_early_years(defaults):
+    """سال‌های آغازین (با مازاد اولیه اصلاح‌ناپذیر) از هدف کنار می‌روند ولی سال آخر همیشه می‌ماند"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    names = policy_names(probabilities)
+    engine = SweepEngine(names, [policy_values(names, probabilities, annual_hiring)], probabilities, years_required,
+                         capacity, annual_hiring)
+    full = capacity_gaps(engine, 10)
+    assert full.shape[1] == 10
+    assert np.array_equal(capacity_gaps(engine, 10, burn_in=5), full[:, 5:])
+    assert np.array_equal(capacity_gaps(engine, 10, burn_in=20), full[:, -1:])
+    # مازاد سال اول بیشتر از پایان افق است، پس حذف آن هدف را کم می‌کند
+    assert np.abs(full[:, 0]).max() > np.abs(full[:, -1]).max()
+    values = [policy_values(names, probabilities, annual_hiring)]
+    args = (probabilities, years_required, capacity, annual_hiring)
+    assert capacity_objective(names, values, 10, *args, burn_in=5) < capacity_objective(names, values, 10, *args,
+                                                                                         burn_in=0)
+
+
+def test_cross_entropy_finds_minimum():
+    def evaluate(values):
+        return ((values - [0.3, 7.0]) ** 2).sum(axis=1)
+
+    trace = list(iter_cross_entropy(evaluate, [0, 0], [1, 10], population=100, time_budget=5, seed=0))
+    assert trace[-1]['best_values'] == pytest.approx([0.3, 7.0], abs=0.02)
+    assert all(later['best'] <= earlier['best'] for earlier, later in zip(trace, trace[1:]))
+
+
+def test_objective_is_for_rounded_policy(defaults):
+    """مقدار هدف گزارش‌شده همان سیاست گردشده پیشنهادی است و از تنظیمات فعلی بدتر نیست"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    result = optimize_policy(probabilities, years_required, capacity, annual_hiring, years=10, population=40,
+                             time_budget=0.5)
+    names = result['names']
+    values = [policy_values(names, result['probabilities'], result['annual_hiring'])]
+    expected = capacity_objective(names, values, 10, probabilities, years_required, capacity, annual_hiring)
+    assert result['objective'] == pytest.approx(float(expected[0]))
+    assert all(round(result['probabilities'][name], 2) == result['probabilities'][name] for name in names[1:])
+    assert result['objective'] <= result['baseline'] + 0.01
@@ -0,0 +1,107 @@
+"""آزمون‌های گراف کامپایل‌شده ساختار سازمانی (orgchart.py)"""
+import copy
+import json
+
+import numpy as np
+import pytest
+
+from orgchart import DEFAULT_CHART_PATH, OrgGraph, load_graph, read_chart
+
+
+def small_chart():
+    """نمودار سه‌گره‌ای A -> B -> C و میان‌بر A -> C با خروج از C"""
+    return {
+        'positions': ['p'],
+        'hiring_node': 'A',
+        'nodes': [{'name': name, 'position': 'p', 'initial': 10} for name in 'ABC'],
+        'transitions': [
+            {'key': 'A_to_B', 'source': 'A', 'target': 'B', 'probability': 0.5, 'min_years': 1},
+            {'key': 'B_to_C', 'source': 'B', 'target': 'C', 'probability': 0.5, 'min_years': 1},
+            {'key': 'A_to_C', 'source': 'A', 'target': 'C', 'probability': 0.1, 'min_years': 3},
+            {'key': 'C_retire', 'source': 'C', 'target': None, 'probability': 0.2},
+        ]
+    }
+
+
+def broken(change):
+    chart = small_chart()
+    change(chart)
+    return chart
+
+
+@pytest.mark.parametrize('chart', [
+    broken(lambda chart: chart['transitions'].append(
+        {'key': 'C_to_A', 'source': 'C', 'target': 'A', 'probability': 0.1})),
+    broken(lambda chart: chart['transitions'][0].update(target='Z')),
+    broken(lambda chart: chart['transitions'][1].update(probability=1.5)),
+    broken(lambda chart: chart['transitions'][1].update(probability=-0.1)),
+    broken(lambda chart: chart['nodes'].append({'name': 'B', 'position': 'p'})),
+    broken(lambda chart: chart.update(hiring_node='Z')),
+], ids=['cycle', 'unknown_endpoint', 'probability_above_one', 'negative_probability', 'duplicate_node',
+        'unknown_hiring_node'])
+def test_invalid_charts_are_rejected(chart):
+    with pytest.raises(ValueError):
+        OrgGraph(chart)
+
+
+def test_cycle_is_named():
+    chart = small_chart()
+    chart['transitions'].append({'key': 'C_to_B', 'source': 'C', 'target': 'B', 'probability': 0.1})
+    with pytest.raises(ValueError, match='دور'):
+        OrgGraph(chart)
+    assert OrgGraph(small_chart()).cycle_nodes() == []
+
+
+def test_yaml_and_json_charts_compile_identically(tmp_path):
+    yaml = pytest.importorskip('yaml')
+    chart = read_chart(DEFAULT_CHART_PATH)
+    json_path, yaml_path = tmp_path / 'chart.json', tmp_path / 'chart.yaml'
+    json_path.write_text(json.dumps(chart, ensure_ascii=False), encoding='utf-8')
+    yaml_path.write_text(yaml.safe_dump(chart, allow_unicode=True), encoding='utf-8')
+
+    from_json, from_yaml = OrgGraph.from_file(str(json_path)), OrgGraph.from_file(str(yaml_path))
+    assert from_yaml.fingerprint() == from_json.fingerprint() == load_graph().fingerprint()
+    assert np.array_equal(from_yaml.edge_prob, from_json.edge_prob)
+
+
+def test_seniority_order_uses_longest_path():
+    """C با میان‌بر A -> C هم در عمق ۲ است (مسیر A -> B -> C)، پس ارشدتر از B است"""
+    graph = OrgGraph(small_chart())
+    assert [graph.node_names[node] for node in graph.seniority_order()] == ['C', 'B', 'A']
+
+
+def test_with_parameters_does_not_mutate_cached_graph():
+    graph = load_graph()
+    prob, years = graph.edge_prob.copy(), graph.edge_min_years.copy()
+    key = next(key for key in graph.edge_keys if not graph.edge_is_exit[graph.edge_index[key]])
+    changed = graph.with_parameters({key: 0.01, 'ناشناخته': 0.5}, {key: 9})
+
+    assert changed.edge_prob[graph.edge_index[key]] == 0.01
+    assert changed.edge_min_years[graph.edge_index[key]] == 9
+    assert load_graph() is graph
+    assert np.array_equal(graph.edge_prob, prob) and np.array_equal(graph.edge_min_years, years)
+    with pytest.raises(ValueError):
+        graph.with_parameters({key: 2.0})
+
+
+def test_with_roster_replaces_initial_counts():
+    class Snapshot:
+        counts = np.ones((3, 2, 2), dtype=np.int64)
+
+        def node_totals(self):
+            return self.counts.sum(axis=(1, 2))
+
+    graph = OrgGraph(small_chart())
+    rostered = graph.with_roster(Snapshot())
+    assert rostered.node_initial.tolist() == [4, 4, 4] and graph.node_initial.tolist() == [10, 10, 10]
+    assert graph.roster is None
+    with pytest.raises(ValueError):
+        load_graph().with_roster(Snapshot())
+
+
+def test_warnings_report_outgoing_probability_above_one():
+    chart = copy.deepcopy(small_chart())
+    chart['transitions'][2]['probability'] = 0.8
+    warnings = OrgGraph(chart).warnings()
+    assert len(warnings) == 1 and 'A' in warnings[0]
+    assert OrgGraph(small_chart()).warnings() == []
@@ -0,0 +1,68 @@
+"""آزمون‌های اجرای بخش‌بندی‌شده مونت‌کارلو (parallel.py)"""
+import numpy as np
+import pytest
+
+from engine import VectorizedEngine, ensemble_bands
+from jobs import DONE, JobQueue
+from parallel import START_METHOD, IntegerHistogram, iter_ensemble_bands, run_parallel_ensemble, stack_bands
+
+
+def test_histogram_merge_is_exact():
+    """ادغام هیستوگرام دو بخش همان هیستوگرام همه نمونه‌هاست"""
+    rng = np.random.default_rng(0)
+    first = rng.integers(-5, 40, (300, 4, 3))
+    second = rng.integers(10, 90, (200, 4, 3))
+    merged = IntegerHistogram.from_samples(first).merge(IntegerHistogram.from_samples(second))
+    whole = IntegerHistogram.from_samples(np.concatenate([first, second]))
+
+    assert (merged.offset == whole.offset).all()
+    width = whole.counts.shape[-1]
+    assert (merged.counts[..., :width] == whole.counts).all() and not merged.counts[..., width:].any()
+
+
+@pytest.mark.parametrize('q', [0, 5, 37.5, 50, 95, 100])
+def test_histogram_percentile_matches_numpy(q):
+    samples = np.random.default_rng(1).integers(0, 50, (101, 3, 2))
+    hist = IntegerHistogram.from_samples(samples)
+    assert np.allclose(hist.percentile(q), np.percentile(samples, q, axis=0))
+
+
+def test_bands_do_not_depend_on_workers(defaults):
+    """بخش‌ها بذر خودشان را دارند، پس تعداد پردازه‌ها نتیجه را تغییر نمی‌دهد"""
+    engine = VectorizedEngine(*defaults)
+    single = run_parallel_ensemble(engine, 5, 300, seed=3, workers=1, shard_size=100)
+    pooled = run_parallel_ensemble(engine, 5, 300, seed=3, workers=2, shard_size=100)
+    assert (single['کل_پرسنل'] == pooled['کل_پرسنل']).all()
+    for position in engine.positions:
+        assert (single['مناصب'][position] == pooled['مناصب'][position]).all()
+
+
+def test_single_shard_matches_ensemble_bands(defaults):
+    """با یک بخش، صدک‌های هیستوگرام همان np.percentile روی مسیرهای کامل است"""
+    engine = VectorizedEngine(*defaults)
+    sharded = run_parallel_ensemble(engine, 5, 200, seed=4, workers=1, shard_size=200)
+    seed = np.random.SeedSequence(4).spawn(1)[0]
+    direct = ensemble_bands(engine.run_ensemble(5, 200, seed))
+    assert np.allclose(sharded['کل_پرسنل'], direct['کل_پرسنل'])
+
+
+def test_streamed_bands_match_pooled_run(defaults):
+    """صدک‌های سال به سال iter_ensemble_bands همان صدک‌های اجرای یکجای بخش‌هاست"""
+    engine = VectorizedEngine(*defaults)
+    rows = [band for _, band in iter_ensemble_bands(engine, 5, 300, seed=9, shard_size=100)]
+    streamed = stack_bands(engine.positions, (5, 50, 95), np.stack(rows, axis=1))
+    pooled = run_parallel_ensemble(engine, 5, 300, seed=9, workers=1, shard_size=100)
+    assert np.allclose(streamed['کل_پرسنل'], pooled['کل_پرسنل'])
+    for position in engine.positions:
+        assert np.allclose(streamed['مناصب'][position], pooled['مناصب'][position])
+
+
+def test_pool_started_from_job_thread(defaults):
+    """استخر پردازه درون رشته کارگر JobQueue بدون fork ساخته می‌شود و همان نتیجه را می‌دهد"""
+    assert START_METHOD != 'fork'
+    engine = VectorizedEngine(*defaults)
+    queue = JobQueue(workers=1)
+    job = queue.submit(None, lambda job: run_parallel_ensemble(engine, 3, 200, seed=5, workers=2, shard_size=100))
+    assert job.wait(60) and job.state == DONE
+    single = run_parallel_ensemble(engine, 3, 200, seed=5, workers=1, shard_size=100)
+    assert (job.result['کل_پرسنل'] == single['کل_پرسنل']).all()
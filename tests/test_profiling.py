@@ -0,0 +1,46 @@
+"""آزمون‌های زمان‌سنجی و ردیابی حافظه مراحل (profiling.py)"""
+import json
+
+from profiling import _NULL_PHASE, NULL_PROFILER, PhaseProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = PhaseProfiler(enabled=False, track_memory=True)
+    assert profiler.phase('a') is _NULL_PHASE and NULL_PROFILER.phase('b') is _NULL_PHASE
+    with profiler.phase('a'):
+        pass
+    assert profiler.events == [] and profiler.summary() == {} and not profiler.track_memory
+
+
+def test_nested_phase_keeps_outer_peak():
+    """ورود مرحله درونی اوج تا آن لحظه مرحله بیرونی را پاک نمی‌کند و اوج درونی به بیرونی می‌رسد"""
+    profiler = PhaseProfiler(track_memory=True)
+    with profiler.phase('render'):
+        temporary = bytearray(4_000_000)
+        del temporary
+        with profiler.phase('figures'):
+            inner = bytearray(1_000_000)
+            del inner
+        with profiler.phase('figures'):
+            pass
+    summary = profiler.summary()
+    assert 1_000_000 <= summary['figures']['peak'] < 4_000_000
+    assert summary['render']['peak'] >= 4_000_000 >= summary['figures']['peak']
+    assert [event[0] for event in profiler.events] == ['figures', 'figures', 'render']
+
+
+def test_chrome_trace_uses_complete_events_in_microseconds():
+    profiler = PhaseProfiler(track_memory=True)
+    with profiler.phase('outer'):
+        with profiler.phase('inner'):
+            pass
+    trace = json.loads(profiler.chrome_trace_json())
+    assert trace['displayTimeUnit'] == 'ms'
+    events = {event['name']: event for event in trace['traceEvents']}
+    assert set(events) == {'outer', 'inner'}
+    for (name, start, duration, *_), event in zip(profiler.events, trace['traceEvents']):
+        assert event['name'] == name and event['ph'] == 'X'
+        assert event['ts'] == start / 1e3 and event['dur'] == duration / 1e3
+        assert set(event['args']) == {'allocated_bytes', 'peak_bytes'}
+    outer, inner = events['outer'], events['inner']
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
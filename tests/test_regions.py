@@ -0,0 +1,51 @@
+"""آزمون‌های شبیه‌سازی شعبه و منطقه (regions.py)"""
+import numpy as np
+
+from engine import VectorizedEngine
+from regions import BRANCH_POSITION, REGION_POSITION, RegionalSimulation, run_regions, transfer_flows
+
+
+def test_layout_places_every_branch_and_person(defaults):
+    probabilities, years_required, capacity, annual_hiring = defaults
+    simulation = RegionalSimulation(probabilities, years_required, capacity, annual_hiring, seed=0)
+    layout = simulation.layout
+    assert layout.regions == capacity[REGION_POSITION]
+    assert layout.branch_rows.sum() == sum(capacity[BRANCH_POSITION].values())
+    assert np.bincount(layout.branch_region).min() >= np.bincount(layout.branch_region).max() - 1
+
+    initial = VectorizedEngine(*defaults).initial_state()
+    distributed = layout.distribute(initial)
+    assert (distributed.sum(axis=(0, 1)) == initial).all()
+
+
+def test_transfers_conserve_people():
+    """هر انتقال از مازاد یک منطقه به کسری منطقه دیگر است و از کسری کل بیشتر نمی‌شود"""
+    counts = np.array([[30, 5], [2, 9], [10, 1]])
+    limits = np.array([[10, 5], [12, 5], [10, 5]])
+    capped = np.array([True, False])
+    outflow, inflow = transfer_flows(counts, limits, capped, share=0.5)
+    assert (outflow.sum(axis=0) == inflow.sum(axis=0)).all()
+    assert outflow[:, 1].sum() == 0 and outflow[0, 0] == 10 and inflow[1, 0] == 10
+    assert (outflow <= np.maximum(0, counts - limits)).all() and (inflow <= np.maximum(0, limits - counts)).all()
+
+
+def test_headcount_balance(defaults):
+    """کل پرسنل هر سال = سال قبل + استخدام - بازنشستگی؛ انتقال‌ها کسی را کم یا زیاد نمی‌کنند"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    simulation = RegionalSimulation(probabilities, years_required, capacity, annual_hiring, seed=1)
+    total = VectorizedEngine(*defaults).initial_state().sum()
+    for _, totals in simulation.iter_years(4):
+        total += totals['hires'].sum() - totals['retirements'].sum()
+        assert totals['counts'].sum() == total
+
+    branches, offices = simulation.branch_positions()
+    assert branches.sum() + offices.sum() == total
+
+
+def test_results_do_not_depend_on_workers(defaults):
+    """هر بخش بذر خودش را دارد، پس اجرای چندپردازه‌ای همان نتیجه تک‌پردازه است"""
+    single = run_regions(*defaults, years=3, seed=4, workers=1)
+    pooled = run_regions(*defaults, years=3, seed=4, workers=2)
+    for key in ('region_positions', 'retirements', 'transfers', 'branch_positions', 'office_positions'):
+        assert np.array_equal(single[key], pooled[key])
+    assert not np.array_equal(single['region_positions'], run_regions(*defaults, years=3, seed=5)['region_positions'])
@@ -0,0 +1,36 @@
+"""آزمون‌های جدول بلند نتایج (results_table.py)"""
+import io
+
+import pandas as pd
+
+import results_table as rt
+from engine import VectorizedEngine
+from orgchart import load_graph
+
+
+def test_table_round_trips_results(simulator, defaults):
+    graph = load_graph()
+    results = simulator.simulate_career_progression(5, *defaults, graph=graph)
+    table = rt.from_results(results, graph)
+
+    assert list(table.columns) == rt.COLUMNS
+    headcount = rt.position_pivot(table, rt.HEADCOUNT)
+    for year, data in results.items():
+        assert headcount.loc[year].to_dict() == data['وضعیت_مناصب']
+    assert rt.yearly_total(table, rt.RETIREMENTS).tolist() == [data['بازنشستگی'] for data in results.values()]
+
+
+def test_ensemble_table_averages_replications(defaults):
+    graph = load_graph()
+    ensemble = VectorizedEngine(*defaults, graph=graph).run_ensemble(3, 20, seed=0)
+    table = rt.from_ensemble(ensemble, graph, annual_hiring=defaults[-1])
+    assert table['replication'].nunique() == 20
+    expected = ensemble['بازنشستگی'].mean(axis=0)
+    assert rt.yearly_total(table, rt.RETIREMENTS).tolist() == expected.tolist()
+
+
+def test_parquet_keeps_types(simulator, defaults):
+    graph = load_graph()
+    table = rt.from_results(simulator.simulate_career_progression(3, *defaults, graph=graph), graph)
+    restored = pd.read_parquet(io.BytesIO(rt.to_parquet_bytes(table)))
+    pd.testing.assert_frame_equal(restored, table)
@@ -0,0 +1,68 @@
+"""آزمون‌های بارگذاری تکه‌ای فهرست کارکنان (roster.py)"""
+import datetime
+import warnings
+
+import numpy as np
+
+from cache import ResultCache
+from engine import VectorizedEngine
+from orgchart import load_graph
+from roster import MAX_AGE, MAX_TENURE, MIN_AGE, cached_roster, load_roster
+
+AS_OF = datetime.date(2024, 1, 1)
+
+ROWS = [
+    # سمت، درجه، تاریخ استخدام، تاریخ تولد
+    ('بانکدار', '', '2020-06-01', '1990-03-01'),
+    ('بانکدار', '', '2023-12-31', '1999-01-01'),
+    ('معاون_شعبه', 'درجه3', '2010-01-01', '1980-01-01'),
+    ('معاون_شعبه', 'ممتاز', '1970-01-01', '1940-01-01'),
+    ('مدیر_شعب', '', '2000-01-01', '1970-01-01'),
+    ('ناشناخته', '', '2000-01-01', '1970-01-01'),
+    ('بانکدار', '', 'نامعتبر', '1990-01-01'),
+    ('بانکدار', '', '2025-01-01', '1990-01-01'),
+]
+
+
+def write_roster(path, rows=ROWS):
+    path.write_text('position,grade,hire_date,birth_date\n' + ''.join(f"{','.join(row)}\n" for row in rows),
+                    encoding='utf-8')
+    return str(path)
+
+
+def test_roster_counts_by_node_tenure_and_age(tmp_path):
+    """ردیف‌های نامعتبر شمرده و کنار گذاشته می‌شوند و سابقه و سن به بازه بریده می‌شوند"""
+    graph = load_graph()
+    with warnings.catch_warnings():
+        # تاریخ‌ها با قالب صریح خوانده می‌شوند، نه حدس ردیف به ردیف pandas
+        warnings.simplefilter('error')
+        snapshot = load_roster(write_roster(tmp_path / 'roster.csv'), graph, AS_OF, chunk_rows=3)
+    assert (snapshot.rows, snapshot.skipped) == (8, 3)
+    assert snapshot.counts.shape == (len(graph.node_names), MAX_TENURE + 1, MAX_AGE - MIN_AGE + 1)
+
+    totals = dict(zip(graph.node_names, snapshot.node_totals().tolist()))
+    assert totals['بانکدار'] == 2 and totals['معاون_شعبه3'] == 1 and totals['معاون_شعبه_ممتاز'] == 1
+    assert totals['مدیر_شعب'] == 1 and sum(totals.values()) == 5
+
+    banker = snapshot.counts[graph.node_names.index('بانکدار')]
+    assert banker[3, 33 - MIN_AGE] == 1 and banker[0, 24 - MIN_AGE] == 1
+    senior = snapshot.counts[graph.node_names.index('معاون_شعبه_ممتاز')]
+    assert senior[MAX_TENURE, MAX_AGE - MIN_AGE] == 1
+
+
+def test_roster_sets_initial_state(tmp_path):
+    """وضعیت اولیه موتور با فهرست کارکنان همان ماتریس گره × سابقه آن است"""
+    graph = load_graph()
+    snapshot = load_roster(write_roster(tmp_path / 'roster.csv'), graph, AS_OF)
+    engine = VectorizedEngine({}, {}, None, 0, graph=graph.with_roster(snapshot))
+    tenure = engine.initial_state()
+    assert (tenure.sum(axis=-1) == snapshot.node_totals()).all()
+    assert (tenure == snapshot.tenure_matrix(engine.tenure_buckets)).all()
+
+
+def test_cached_roster_reads_file_once(tmp_path):
+    path = write_roster(tmp_path / 'roster.csv')
+    cache = ResultCache(max_entries=2)
+    first = cached_roster(path, cache, as_of=AS_OF)
+    assert cached_roster(path, cache, as_of=AS_OF) is first
+    assert np.array_equal(cached_roster(path, ResultCache(max_entries=2), as_of=AS_OF).counts, first.counts)
@@ -0,0 +1,59 @@
+"""آزمون‌های هسته شبیه‌سازی و سناریوهای خط فرمان (simulator.py، cli.py)"""
+import json
+
+import pytest
+
+import cli
+from simulator import ENGINES
+
+
+@pytest.mark.parametrize('engine', ['vectorised', 'Agent', ''])
+def test_unknown_engine_is_rejected(simulator, defaults, engine):
+    with pytest.raises(ValueError):
+        simulator.simulate_career_progression(2, *defaults, engine=engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_every_engine_runs(simulator, defaults, engine):
+    results = simulator.simulate_career_progression(2, *defaults, engine=engine, seed=0)
+    assert sorted(results) == [1, 2]
+
+
+def test_scenario_defaults_and_overrides(simulator):
+    params = simulator.scenario_parameters({'years': 3, 'probabilities': {'بانکدار_to_رئیس_دایره4': 0.5}})
+    assert params['years'] == 3 and params['engine'] == 'vectorized'
+    assert params['probabilities']['بانکدار_to_رئیس_دایره4'] == 0.5
+    assert len(params['probabilities']) == len(simulator.default_probabilities)
+
+
+def test_cli_reports_failed_scenarios(tmp_path):
+    scenarios = tmp_path / 'scenarios'
+    scenarios.mkdir()
+    (scenarios / 'good.yaml').write_text('name: good\nyears: 2\n', encoding='utf-8')
+    (scenarios / 'bad.json').write_text('{"name": "bad", "years": 2, "engine": "vectorised"}', encoding='utf-8')
+
+    output = tmp_path / 'out'
+    status = cli.main([str(scenarios), '--output-dir', str(output), '--workers', '1'])
+    assert status == 1
+    assert (output / 'good.parquet').exists() and not (output / 'bad.parquet').exists()
+
+
+@pytest.mark.parametrize('name', ['../escaped', 'a/b', '..'])
+def test_cli_rejects_names_outside_output_dir(tmp_path, name):
+    output = tmp_path / 'nested' / 'out'
+    with pytest.raises(ValueError):
+        cli.output_path(str(output), name, 'csv')
+
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'name': name, 'years': 2}, {'name': 'ok', 'years': 2}]), encoding='utf-8')
+    assert cli.main([str(scenarios), '--output-dir', str(output), '--format', 'csv']) == 1
+    assert sorted(path.name for path in tmp_path.rglob('*.csv')) == ['ok.csv']
+
+
+def test_cli_reports_missing_roster_per_scenario(tmp_path, capsys):
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'name': 'missing', 'years': 2, 'roster': str(tmp_path / 'none.csv')},
+                                     {'name': 'ok', 'years': 2}]), encoding='utf-8')
+    assert cli.main([str(scenarios), '--output-dir', str(tmp_path / 'out'), '--format', 'csv']) == 1
+    assert 'missing:' in capsys.readouterr().err
+    assert (tmp_path / 'out' / 'ok.csv').exists()
@@ -0,0 +1,54 @@
+"""آزمون بودجه شروع سرد داشبورد (app.py)؛ نسخه دقیق‌تر با چند تکرار: benchmarks/startup_time.py"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Streamlit خودش plotly.graph_objects را وارد می‌کند، پس فقط plotly.express و charts بررسی می‌شوند
+IMPORT_LAZY = ('charts', 'plotly.express', 'results_table', 'markov', 'sweep', 'optimizer', 'regions', 'emulator')
+PAINT_LAZY = ('charts', 'plotly.express', 'results_table', 'parallel', 'comparison', 'trajectories', 'roster',
+              'agents', 'cohorts', 'markov', 'optimizer', 'regions', 'emulator')
+# سهم خود app پس از Streamlit (ثانیه)؛ گشاده‌تر از بودجه benchmarks برای ماشین‌های کند
+APP_IMPORT_BUDGET = 0.5
+
+
+def run_probe(code, *flags):
+    completed = subprocess.run([sys.executable, *flags, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                               check=True, env={**os.environ, 'PYTHONPATH': ROOT})
+    return completed.stdout.strip().splitlines()[-1], completed.stderr
+
+
+def test_import_app_stays_light():
+    """import app هیچ ماژول نمودار یا تحلیلی وارد نمی‌کند و سهم خودش در بودجه است"""
+    code = f"import json, sys, streamlit, app; print(json.dumps([m for m in {IMPORT_LAZY!r} if m in sys.modules]))"
+    loaded, importtime = run_probe(code, '-X', 'importtime')
+    assert json.loads(loaded) == []
+
+    # خط‌های -X importtime: «import time: self [us] | cumulative | package»
+    cumulative = next(int(line.split('|')[1]) for line in importtime.splitlines()
+                      if line.split('|')[-1].strip() == 'app')
+    assert cumulative / 1e6 < APP_IMPORT_BUDGET
+
+
+def test_first_paint_leaves_analysis_modules_unloaded():
+    pytest.importorskip('streamlit.testing.v1')
+    code = f"""
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('app.py', default_timeout=60).run()
+print(json.dumps({{'exceptions': len(at.exception), 'loaded': [m for m in {PAINT_LAZY!r} if m in sys.modules]}}))
+"""
+    result = json.loads(run_probe(code)[0])
+    assert result == {'exceptions': 0, 'loaded': []}
+
+
+def test_form_defaults_match_modules():
+    import app
+    from optimizer import BURN_IN
+    from regions import TRANSFER_SHARE
+
+    assert app.OPTIMIZER_BURN_IN == BURN_IN and app.REGIONS_TRANSFER_SHARE == TRANSFER_SHARE
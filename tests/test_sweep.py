@@ -0,0 +1,50 @@
+"""آزمون‌های جاروب پارامترها و تحلیل حساسیت (sweep.py)"""
+import numpy as np
+import pytest
+
+import sweep
+from engine import VectorizedEngine
+
+
+def test_parameter_names_skip_capacity_without_nodes(defaults):
+    """گروه‌هایی که گره‌ای در گراف ندارند (رئیس_صندوق، رئیس_اعتبارات) میله صفر گردبادی نمی‌سازند"""
+    probabilities, years_required, capacity, _ = defaults
+    names = sweep.parameter_names(probabilities, years_required, capacity)
+    groups = {name.split(':')[1] for name in names if name.startswith(sweep.CAPACITY_PREFIX)}
+    assert {'رئیس_شعبه', 'مدیر_شعب'} <= groups
+    assert not groups & {'رئیس_صندوق', 'رئیس_اعتبارات'}
+    for name in names:
+        if name.startswith(sweep.CAPACITY_PREFIX):
+            assert len(sweep.capacity_nodes(name, capacity))
+
+
+def test_relative_ranges_reject_capacity_without_nodes(defaults):
+    probabilities, years_required, capacity, annual_hiring = defaults
+    ranges = sweep.relative_ranges(['capacity:مدیر_شعب'], 0.2, probabilities, years_required, capacity,
+                                   annual_hiring)
+    assert ranges['capacity:مدیر_شعب'] == pytest.approx((28, 42))
+    with pytest.raises(ValueError):
+        sweep.relative_ranges(['capacity:رئیس_صندوق:درجه3'], 0.2, probabilities, years_required, capacity,
+                              annual_hiring)
+
+
+def test_latin_hypercube_hits_every_stratum():
+    """هر پارامتر از هر قسمت بازه دقیقاً یک نمونه دارد"""
+    names, values = sweep.latin_hypercube({'a': (0, 1), 'b': (10, 20)}, 50, seed=0)
+    assert names == ['a', 'b'] and values.shape == (50, 2)
+    assert sorted(np.floor(values[:, 0] * 50).astype(int)) == list(range(50))
+    assert sorted(np.floor((values[:, 1] - 10) * 5).astype(int)) == list(range(50))
+
+
+def test_sweep_base_point_matches_current_settings(defaults):
+    """ردیف تنظیمات فعلی جاروب همان تعداد نهایی اجرای قطعی VectorizedEngine است"""
+    probabilities, years_required, capacity, annual_hiring = defaults
+    names = [sweep.ANNUAL_HIRING, 'capacity:مدیر_شعب']
+    current = [annual_hiring, capacity['مدیر_شعب']]
+    outputs, base = sweep.run_sweep(names, [current], 5, probabilities, years_required, capacity, annual_hiring)
+
+    final = VectorizedEngine(*defaults).run(5)[5]['وضعیت_مناصب']
+    for target in sweep.TARGETS:
+        expected = sum(count for position, count in final.items() if position.startswith(target))
+        assert base[target] == outputs[target][0] == expected
+    assert base['مدیر_شعب'] == final['مدیر_شعب'] and base['رئیس_شعبه'] > final['مدیر_شعب']
@@ -0,0 +1,94 @@
+"""آزمون‌های ذخیره memmap مسیرهای مونت‌کارلو (trajectories.py)"""
+import os
+import time
+
+import numpy as np
+
+from engine import VectorizedEngine
+from parallel import run_parallel_ensemble
+from trajectories import (META_FILE, WRITING_FILE, WRITING_TIMEOUT, TrajectoryStore, is_writing, prune_stores,
+                          store_directory, write_ensemble)
+
+
+def test_store_percentiles_match_parallel_ensemble(tmp_path, defaults):
+    """صدک‌های ذخیره همان صدک‌های اجرای عادی مونت‌کارلو با همان بخش‌ها و بذرهاست"""
+    engine = VectorizedEngine(*defaults)
+    directory = str(tmp_path / 'store')
+    assert list(write_ensemble(engine, directory, 4, 150, seed=2, shard_size=100)) == [100, 150]
+    store = TrajectoryStore(directory)
+    bands = store.percentiles()
+    expected = run_parallel_ensemble(engine, 4, 150, seed=2, workers=1, shard_size=100)
+    assert np.allclose(bands['کل_پرسنل'], expected['کل_پرسنل'])
+
+    matches = store.where('مدیر_شعب', '>=', 0, year=4)
+    assert len(matches) == 150
+    assert store.trajectories(matches[:3], ['مدیر_شعب']).shape[0] == 3
+
+
+def make_stores(root, sizes):
+    """زیرپوشه‌های ذخیره کامل با حجم داده‌شده، از قدیمی به جدید"""
+    for i, size in enumerate(sizes):
+        directory = os.path.join(root, f"store{i}")
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'positions.npy'), 'wb') as f:
+            f.write(b'\0' * size)
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            f.write('{}')
+        os.utime(directory, (1000 + i, 1000 + i))
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    root = str(tmp_path)
+    make_stores(root, [10] * 5)
+    removed = prune_stores(root, max_stores=3)
+    assert sorted(os.path.basename(path) for path in removed) == ['store0', 'store1']
+    assert sorted(os.listdir(root)) == ['store2', 'store3', 'store4']
+
+
+def test_prune_respects_byte_cap_and_keeps_current(tmp_path):
+    """ذخیره در حال استفاده حتی اگر قدیمی‌ترین و بزرگ‌تر از سقف باشد پاک نمی‌شود"""
+    root = str(tmp_path)
+    make_stores(root, [100, 40, 40, 40])
+    prune_stores(root, keep=os.path.join(root, 'store0'), max_bytes=150)
+    assert sorted(os.listdir(root)) == ['store0', 'store3']
+    prune_stores(root, keep=os.path.join(root, 'store0'), max_bytes=50)
+    assert os.listdir(root) == ['store0']
+
+
+def test_store_directory_marks_use_without_pruning(tmp_path):
+    """استفاده دوباره ذخیره قدیمی را تازه می‌کند و چیزی پاک نمی‌شود؛ جای ذخیره تازه در prune کنار گذاشته می‌شود"""
+    root = str(tmp_path)
+    make_stores(root, [10] * 3)
+    assert store_directory(root, 'store0') == os.path.join(root, 'store0')
+    assert store_directory(root, 'new') == os.path.join(root, 'new')
+    assert sorted(os.listdir(root)) == ['store0', 'store1', 'store2']
+
+    prune_stores(root, keep=os.path.join(root, 'new'), max_stores=3)
+    assert sorted(os.listdir(root)) == ['store0', 'store2']
+
+
+def test_prune_skips_stores_being_written(tmp_path, defaults):
+    """ذخیره‌ای که نشست دیگری در حال نوشتن آن است (بدون meta.json) پاک نمی‌شود، مگر نشانه‌اش کهنه باشد"""
+    root = str(tmp_path)
+    make_stores(root, [10] * 3)
+    directory = os.path.join(root, 'writing')
+    writer = write_ensemble(VectorizedEngine(*defaults), directory, 3, 20, seed=0, shard_size=10)
+    next(writer)
+    assert is_writing(directory) and not TrajectoryStore.exists(directory)
+    os.utime(directory, (1, 1))
+
+    prune_stores(root, max_stores=2)
+    assert sorted(os.listdir(root)) == ['store1', 'store2', 'writing']
+
+    list(writer)
+    assert TrajectoryStore.exists(directory) and not is_writing(directory)
+    assert not os.path.exists(os.path.join(directory, WRITING_FILE))
+
+    # نشانه نویسنده‌ای که از کار افتاده پس از WRITING_TIMEOUT دیگر مانع پاک شدن نیست
+    stale = time.time() - WRITING_TIMEOUT - 1
+    open(os.path.join(root, 'store1', WRITING_FILE), 'w').close()
+    os.utime(os.path.join(root, 'store1', WRITING_FILE), (stale, stale))
+    os.utime(os.path.join(root, 'store1'), (1001, 1001))
+    assert not is_writing(os.path.join(root, 'store1'))
+    prune_stores(root, keep=directory, max_stores=2)
+    assert sorted(os.listdir(root)) == ['store2', 'writing']
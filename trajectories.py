@@ -0,0 +1,220 @@
+"""ذخیره کامل مسیرهای مونت‌کارلو روی دیسک با np.memmap
+
+هر سری در یک فایل .npy با ترتیب (سمت، سال، تکرار) نوشته می‌شود تا مقادیر یک
+سمت در یک سال برای همه تکرارها پشت سر هم باشند: صدک‌ها و پرس‌وجوهای شرطی فقط
+ستون‌های لازم را می‌خوانند و مسیر کامل چند تکرار برای کاوش جزئی با خواندن
+پراکنده به دست می‌آید. ماتریس سابقه (گره، سابقه، سال، تکرار) اختیاری است.
+
+تکرارها با همان بخش‌بندی و بذرهای parallel.run_parallel_ensemble تولید می‌شوند،
+بنابراین صدک‌های ذخیره همان صدک‌های اجرای عادی مونت‌کارلو هستند.
+
+ذخیره‌های هر سناریو زیرپوشه‌های یک ریشه مشترک‌اند؛ store_directory زمان آخرین
+استفاده را ثبت می‌کند و پس از نوشتن هر ذخیره تازه prune_stores قدیمی‌ترین زیرپوشه‌های
+بیش از MAX_STORES یا MAX_BYTES را پاک می‌کند (LRU)، پس پوشه موقت با تغییر سناریوها
+بی‌حد بزرگ نمی‌شود. ذخیره‌ای که نشست دیگری در حال نوشتن آن است (نشانه WRITING_FILE
+تازه‌تر از WRITING_TIMEOUT) هرگز پاک نمی‌شود.
+"""
+import json
+import operator
+import os
+import shutil
+import time
+
+import numpy as np
+
+from parallel import SHARD_SIZE, shard_sizes, stack_bands
+
+META_FILE = 'meta.json'
+POSITIONS_FILE = 'positions.npy'
+RETIREMENTS_FILE = 'retirements.npy'
+TENURE_FILE = 'tenure.npy'
+# نشانه ذخیره در حال نوشتن؛ پس از هر بخش لمس و پس از meta.json پاک می‌شود
+WRITING_FILE = 'writing'
+# نشانه قدیمی‌تر از این (ثانیه) از نویسنده‌ای است که از کار افتاده است
+WRITING_TIMEOUT = 3600
+
+# سقف تعداد و حجم ذخیره‌های زیر یک ریشه؛ ذخیره در حال استفاده هیچ‌وقت پاک نمی‌شود
+MAX_STORES = 8
+MAX_BYTES = 2 * 1024 ** 3
+
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '==': operator.eq}
+
+
+def write_ensemble(engine, directory, years, replications, seed=None, shard_size=SHARD_SIZE, with_tenure=False):
+    """اجرای بخش به بخش مجموعه و نوشتن مسیرها؛ پس از هر بخش تعداد تکرارهای نوشته‌شده را می‌دهد
+
+    فقط وضعیت یک بخش در حافظه است. meta.json در پایان نوشته می‌شود، پس ذخیره
+    نیمه‌کاره با TrajectoryStore.exists شناخته می‌شود؛ تا آن زمان نشانه WRITING_FILE
+    ذخیره را از prune_stores نشست‌های دیگر حفظ می‌کند.
+    """
+    os.makedirs(directory, exist_ok=True)
+    marker = os.path.join(directory, WRITING_FILE)
+    open(marker, 'w').close()
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        os.remove(os.path.join(directory, META_FILE))
+
+    graph = engine.graph
+    positions = np.lib.format.open_memmap(os.path.join(directory, POSITIONS_FILE), mode='w+', dtype=np.int32,
+                                          shape=(len(engine.positions), years, replications))
+    retirements = np.lib.format.open_memmap(os.path.join(directory, RETIREMENTS_FILE), mode='w+', dtype=np.int32,
+                                            shape=(years, replications))
+    tenure = None
+    if with_tenure:
+        tenure = np.lib.format.open_memmap(
+            os.path.join(directory, TENURE_FILE), mode='w+', dtype=np.int32,
+            shape=(len(graph.node_names), engine.tenure_buckets, years, replications)
+        )
+
+    sizes = shard_sizes(replications, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    offset = 0
+    for size, child in zip(sizes, seeds):
+        block = slice(offset, offset + size)
+        state = {}
+        for year, counts, retired, _ in engine.iter_ensemble(years, size, child, checkpoint=state):
+            positions[:, year - 1, block] = counts.T
+            retirements[year - 1, block] = retired
+            if tenure is not None:
+                tenure[:, :, year - 1, block] = np.moveaxis(state['state'], 0, -1)
+        offset += size
+        os.utime(marker)
+        yield offset
+
+    for array in (positions, retirements, tenure):
+        if array is not None:
+            array.flush()
+
+    meta = {
+        'positions': list(engine.positions),
+        'nodes': list(graph.node_names),
+        'years': years,
+        'replications': replications,
+        'seed': seed,
+        'shard_size': shard_size,
+        'tenure': with_tenure
+    }
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.remove(marker)
+
+
+def directory_size(directory):
+    """حجم فایل‌های یک پوشه ذخیره به بایت"""
+    with os.scandir(directory) as entries:
+        return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+
+def is_writing(directory, now=None):
+    """نشانه نوشتن ذخیره (یا خود پوشه بدون meta.json، پیش از ساخت نشانه) تازه است"""
+    try:
+        touched = os.path.getmtime(os.path.join(directory, WRITING_FILE))
+    except FileNotFoundError:
+        if os.path.exists(os.path.join(directory, META_FILE)):
+            return False
+        touched = os.path.getmtime(directory)
+    return (now or time.time()) - touched < WRITING_TIMEOUT
+
+
+def prune_stores(root, keep=None, max_stores=MAX_STORES, max_bytes=MAX_BYTES):
+    """پاک کردن قدیمی‌ترین زیرپوشه‌های root تا تعداد و حجم زیر سقف برسد؛ فهرست پوشه‌های پاک‌شده
+
+    ذخیره‌های در حال نوشتن نشست‌های دیگر نه پاک می‌شوند و نه در سقف شمرده می‌شوند.
+    """
+    if not os.path.isdir(root):
+        return []
+    now = time.time()
+    with os.scandir(root) as entries:
+        stores = sorted((entry for entry in entries if entry.is_dir() and not is_writing(entry.path, now)),
+                        key=lambda entry: -entry.stat().st_mtime)
+
+    # ذخیره keep (حتی اگر هنوز نوشته نشده باشد) پیش از بقیه جا و حجم خود را می‌گیرد
+    keep = os.path.abspath(keep) if keep else None
+    kept = int(keep is not None)
+    total = directory_size(keep) if keep is not None and os.path.isdir(keep) else 0
+    removed = []
+    for entry in stores:
+        if os.path.abspath(entry.path) == keep:
+            continue
+        size = directory_size(entry.path)
+        if kept < max_stores and total + size <= max_bytes:
+            kept += 1
+            total += size
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(entry.path)
+    return removed
+
+
+def store_directory(root, name):
+    """پوشه ذخیره name زیر root با ثبت زمان استفاده آن (برای LRU در prune_stores)"""
+    directory = os.path.join(root, name)
+    if os.path.isdir(directory):
+        os.utime(directory)
+    return directory
+
+
+class TrajectoryStore:
+    """خواندن مسیرهای ذخیره‌شده؛ آرایه‌ها memmap فقط‌خواندنی هستند"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.positions = self.meta['positions']
+        self.years = np.arange(1, self.meta['years'] + 1)
+        self.replications = self.meta['replications']
+        self.position_counts = np.load(os.path.join(directory, POSITIONS_FILE), mmap_mode='r')
+        self.retirements = np.load(os.path.join(directory, RETIREMENTS_FILE), mmap_mode='r')
+        self.tenure = np.load(os.path.join(directory, TENURE_FILE), mmap_mode='r') if self.meta['tenure'] else None
+
+    @staticmethod
+    def exists(directory):
+        """ذخیره کامل (با meta.json) در directory وجود دارد"""
+        return directory is not None and os.path.exists(os.path.join(directory, META_FILE))
+
+    def series(self, position):
+        """تعداد یک سمت به صورت (سال، تکرار) بدون خواندن بقیه سمت‌ها"""
+        return self.position_counts[self.positions.index(position)]
+
+    def total(self, block=SHARD_SIZE * 4):
+        """کل پرسنل (سال، تکرار) با جمع بلوک به بلوک تکرارها"""
+        total = np.empty((len(self.years), self.replications), dtype=np.int64)
+        for start in range(0, self.replications, block):
+            total[:, start:start + block] = self.position_counts[:, :, start:start + block].sum(axis=0)
+        return total
+
+    def position_percentiles(self, position, percentiles=(5, 50, 95), replications=None):
+        """صدک‌های یک سمت در هر سال (صدک، سال)؛ با replications فقط روی همان تکرارها"""
+        series = self.series(position)
+        return np.percentile(series if replications is None else series[:, replications], percentiles, axis=-1)
+
+    def percentiles(self, percentiles=(5, 50, 95), replications=None):
+        """صدک‌های کل و هر سمت در قالب ensemble_bands"""
+        total = self.total()
+        rows = [np.percentile(total if replications is None else total[:, replications], percentiles, axis=-1)]
+        rows += [self.position_percentiles(position, percentiles, replications) for position in self.positions]
+        return stack_bands(self.positions, percentiles, np.stack(rows, axis=-1))
+
+    def where(self, position, op, threshold, year=None):
+        """شماره تکرارهایی که شرط را دارند؛ year=None یعنی دست‌کم در یکی از سال‌ها
+
+        مثال: where('مدیر_شعب', '<', 30) تکرارهایی که مدیر شعب در سالی کمتر از 30 شده است.
+        """
+        compare = OPERATORS[op]
+        series = self.series(position)
+        if year is not None:
+            return np.flatnonzero(compare(series[year - 1], threshold))
+        return np.flatnonzero(compare(series, threshold).any(axis=0))
+
+    def trajectories(self, replications, positions=None):
+        """مسیر کامل تکرارهای انتخابی به صورت (تکرار، سال، سمت)"""
+        columns = [self.positions.index(position) for position in (positions or self.positions)]
+        replications = np.asarray(replications, dtype=np.int64)
+        return np.stack([self.position_counts[i][:, replications] for i in columns], axis=-1).transpose(1, 0, 2)
+
+    def tenure_profile(self, node, year, replications=None):
+        """توزیع سابقه یک گره در یک سال، میانگین روی تکرارها (یا تکرارهای انتخابی)"""
+        if self.tenure is None:
+            raise ValueError("ماتریس سابقه در این ذخیره نوشته نشده است")
+        values = self.tenure[self.meta['nodes'].index(node), :, year - 1]
+        return (values if replications is None else values[:, replications]).mean(axis=-1)